@@ -0,0 +1,419 @@
+"""
+Parsing and formatting of color codes for Color Fusion.
+
+Every conversion between RGB values and text goes through this module. Single colors use
+precomputed tables: a 256-entry table of two-digit hex strings for formatting, and a table
+of every two-character hex pair for parsing, so neither direction calls int() or str.format
+per channel. The bulk functions convert whole arrays of colors at once with NumPy, which
+is imported lazily.
+
+Accepted color codes are '#RGB', '#RRGGBB' and '#RRGGBBAA' (the '#' is optional, and digits
+may be upper or lower case) and the CSS named colors such as 'rebeccapurple', in any case.
+Whitespace around either kind of code is ignored. Colors can also be packed into integers as
+0xRRGGBB.
+"""
+
+import functools
+
+HEX_DIGITS = "0123456789ABCDEF"
+
+# Two uppercase hex digits for every byte value, e.g. HEX_BYTES[171] == 'AB'
+HEX_BYTES = tuple(high + low for high in HEX_DIGITS for low in HEX_DIGITS)
+
+# The byte value of every two-character hex pair, in any mix of upper and lower case
+BYTE_FROM_HEX = {
+    high + low: int(high + low, 16)
+    for high in HEX_DIGITS + "abcdef"
+    for low in HEX_DIGITS + "abcdef"
+}
+
+# The byte value of every single hex digit, repeated as in the short forms '#RGB' and '#RGBA'
+BYTE_FROM_SHORT_HEX = {digit: int(digit * 2, 16) for digit in HEX_DIGITS + "abcdef"}
+
+# The CSS named colors (CSS Color Module Level 4)
+CSS_COLORS = {
+    "aliceblue": (240, 248, 255),
+    "antiquewhite": (250, 235, 215),
+    "aqua": (0, 255, 255),
+    "aquamarine": (127, 255, 212),
+    "azure": (240, 255, 255),
+    "beige": (245, 245, 220),
+    "bisque": (255, 228, 196),
+    "black": (0, 0, 0),
+    "blanchedalmond": (255, 235, 205),
+    "blue": (0, 0, 255),
+    "blueviolet": (138, 43, 226),
+    "brown": (165, 42, 42),
+    "burlywood": (222, 184, 135),
+    "cadetblue": (95, 158, 160),
+    "chartreuse": (127, 255, 0),
+    "chocolate": (210, 105, 30),
+    "coral": (255, 127, 80),
+    "cornflowerblue": (100, 149, 237),
+    "cornsilk": (255, 248, 220),
+    "crimson": (220, 20, 60),
+    "cyan": (0, 255, 255),
+    "darkblue": (0, 0, 139),
+    "darkcyan": (0, 139, 139),
+    "darkgoldenrod": (184, 134, 11),
+    "darkgray": (169, 169, 169),
+    "darkgreen": (0, 100, 0),
+    "darkgrey": (169, 169, 169),
+    "darkkhaki": (189, 183, 107),
+    "darkmagenta": (139, 0, 139),
+    "darkolivegreen": (85, 107, 47),
+    "darkorange": (255, 140, 0),
+    "darkorchid": (153, 50, 204),
+    "darkred": (139, 0, 0),
+    "darksalmon": (233, 150, 122),
+    "darkseagreen": (143, 188, 143),
+    "darkslateblue": (72, 61, 139),
+    "darkslategray": (47, 79, 79),
+    "darkslategrey": (47, 79, 79),
+    "darkturquoise": (0, 206, 209),
+    "darkviolet": (148, 0, 211),
+    "deeppink": (255, 20, 147),
+    "deepskyblue": (0, 191, 255),
+    "dimgray": (105, 105, 105),
+    "dimgrey": (105, 105, 105),
+    "dodgerblue": (30, 144, 255),
+    "firebrick": (178, 34, 34),
+    "floralwhite": (255, 250, 240),
+    "forestgreen": (34, 139, 34),
+    "fuchsia": (255, 0, 255),
+    "gainsboro": (220, 220, 220),
+    "ghostwhite": (248, 248, 255),
+    "gold": (255, 215, 0),
+    "goldenrod": (218, 165, 32),
+    "gray": (128, 128, 128),
+    "green": (0, 128, 0),
+    "greenyellow": (173, 255, 47),
+    "grey": (128, 128, 128),
+    "honeydew": (240, 255, 240),
+    "hotpink": (255, 105, 180),
+    "indianred": (205, 92, 92),
+    "indigo": (75, 0, 130),
+    "ivory": (255, 255, 240),
+    "khaki": (240, 230, 140),
+    "lavender": (230, 230, 250),
+    "lavenderblush": (255, 240, 245),
+    "lawngreen": (124, 252, 0),
+    "lemonchiffon": (255, 250, 205),
+    "lightblue": (173, 216, 230),
+    "lightcoral": (240, 128, 128),
+    "lightcyan": (224, 255, 255),
+    "lightgoldenrodyellow": (250, 250, 210),
+    "lightgray": (211, 211, 211),
+    "lightgreen": (144, 238, 144),
+    "lightgrey": (211, 211, 211),
+    "lightpink": (255, 182, 193),
+    "lightsalmon": (255, 160, 122),
+    "lightseagreen": (32, 178, 170),
+    "lightskyblue": (135, 206, 250),
+    "lightslategray": (119, 136, 153),
+    "lightslategrey": (119, 136, 153),
+    "lightsteelblue": (176, 196, 222),
+    "lightyellow": (255, 255, 224),
+    "lime": (0, 255, 0),
+    "limegreen": (50, 205, 50),
+    "linen": (250, 240, 230),
+    "magenta": (255, 0, 255),
+    "maroon": (128, 0, 0),
+    "mediumaquamarine": (102, 205, 170),
+    "mediumblue": (0, 0, 205),
+    "mediumorchid": (186, 85, 211),
+    "mediumpurple": (147, 112, 219),
+    "mediumseagreen": (60, 179, 113),
+    "mediumslateblue": (123, 104, 238),
+    "mediumspringgreen": (0, 250, 154),
+    "mediumturquoise": (72, 209, 204),
+    "mediumvioletred": (199, 21, 133),
+    "midnightblue": (25, 25, 112),
+    "mintcream": (245, 255, 250),
+    "mistyrose": (255, 228, 225),
+    "moccasin": (255, 228, 181),
+    "navajowhite": (255, 222, 173),
+    "navy": (0, 0, 128),
+    "oldlace": (253, 245, 230),
+    "olive": (128, 128, 0),
+    "olivedrab": (107, 142, 35),
+    "orange": (255, 165, 0),
+    "orangered": (255, 69, 0),
+    "orchid": (218, 112, 214),
+    "palegoldenrod": (238, 232, 170),
+    "palegreen": (152, 251, 152),
+    "paleturquoise": (175, 238, 238),
+    "palevioletred": (219, 112, 147),
+    "papayawhip": (255, 239, 213),
+    "peachpuff": (255, 218, 185),
+    "peru": (205, 133, 63),
+    "pink": (255, 192, 203),
+    "plum": (221, 160, 221),
+    "powderblue": (176, 224, 230),
+    "purple": (128, 0, 128),
+    "rebeccapurple": (102, 51, 153),
+    "red": (255, 0, 0),
+    "rosybrown": (188, 143, 143),
+    "royalblue": (65, 105, 225),
+    "saddlebrown": (139, 69, 19),
+    "salmon": (250, 128, 114),
+    "sandybrown": (244, 164, 96),
+    "seagreen": (46, 139, 87),
+    "seashell": (255, 245, 238),
+    "sienna": (160, 82, 45),
+    "silver": (192, 192, 192),
+    "skyblue": (135, 206, 235),
+    "slateblue": (106, 90, 205),
+    "slategray": (112, 128, 144),
+    "slategrey": (112, 128, 144),
+    "snow": (255, 250, 250),
+    "springgreen": (0, 255, 127),
+    "steelblue": (70, 130, 180),
+    "tan": (210, 180, 140),
+    "teal": (0, 128, 128),
+    "thistle": (216, 191, 216),
+    "tomato": (255, 99, 71),
+    "turquoise": (64, 224, 208),
+    "violet": (238, 130, 238),
+    "wheat": (245, 222, 179),
+    "white": (255, 255, 255),
+    "whitesmoke": (245, 245, 245),
+    "yellow": (255, 255, 0),
+    "yellowgreen": (154, 205, 50),
+}
+
+
+def format_hex(color):
+    """
+    Formats an RGB color as an uppercase hex code.
+
+    Parameters:
+    color (sequence): The red, green and blue values, from 0 to 255.
+
+    Returns:
+    str: The hex code, such as '#A1B2C3'.
+    """
+    return "#" + HEX_BYTES[color[0]] + HEX_BYTES[color[1]] + HEX_BYTES[color[2]]
+
+
+def format_hex_rgba(color):
+    """
+    Formats an RGBA color as an uppercase '#RRGGBBAA' hex code.
+
+    Parameters:
+    color (sequence): The red, green, blue and alpha values, from 0 to 255.
+
+    Returns:
+    str: The hex code, such as '#A1B2C3FF'.
+    """
+    return format_hex(color) + HEX_BYTES[color[3]]
+
+
+def parse_hex_rgba(code):
+    """
+    Parses a color code into an RGBA tuple.
+
+    Parameters:
+    code (str): A '#RGB', '#RGBA', '#RRGGBB' or '#RRGGBBAA' hex code, with or without the
+    '#', or a CSS color name.
+
+    Returns:
+    tuple: The red, green, blue and alpha values. Alpha is 255 when the code has none.
+
+    Raises:
+    ValueError: If the code is not a valid color.
+    """
+    code = code.strip()
+    name = code.lower()
+    if name in CSS_COLORS:
+        return CSS_COLORS[name] + (255,)
+
+    digits = code[1:] if code.startswith("#") else code
+    try:
+        if len(digits) == 6:
+            return (
+                BYTE_FROM_HEX[digits[0:2]],
+                BYTE_FROM_HEX[digits[2:4]],
+                BYTE_FROM_HEX[digits[4:6]],
+                255,
+            )
+        if len(digits) == 8:
+            return (
+                BYTE_FROM_HEX[digits[0:2]],
+                BYTE_FROM_HEX[digits[2:4]],
+                BYTE_FROM_HEX[digits[4:6]],
+                BYTE_FROM_HEX[digits[6:8]],
+            )
+        if len(digits) in (3, 4):
+            values = tuple(BYTE_FROM_SHORT_HEX[digit] for digit in digits)
+            return values if len(values) == 4 else values + (255,)
+    except KeyError:
+        raise ValueError(f"Invalid hex color code: {code}") from None
+
+    raise ValueError("Hex color code must be 3, 4, 6 or 8 characters long")
+
+
+def parse_hex(code):
+    """
+    Parses a color code into an RGB tuple, ignoring any alpha.
+
+    Parameters:
+    code (str): A hex code or CSS color name, as accepted by 'parse_hex_rgba'.
+
+    Returns:
+    tuple: The red, green and blue values.
+
+    Raises:
+    ValueError: If the code is not a valid color.
+    """
+    # Fast path for the common '#RRGGBB' form
+    if len(code) == 7 and code[0] == "#":
+        try:
+            return (
+                BYTE_FROM_HEX[code[1:3]],
+                BYTE_FROM_HEX[code[3:5]],
+                BYTE_FROM_HEX[code[5:7]],
+            )
+        except KeyError:
+            raise ValueError(f"Invalid hex color code: {code}") from None
+    return parse_hex_rgba(code)[:3]
+
+
+def pack_rgb(color):
+    """
+    Packs an RGB color into a single integer, 0xRRGGBB.
+    """
+    return (color[0] << 16) | (color[1] << 8) | color[2]
+
+
+def unpack_rgb(value):
+    """
+    Unpacks an integer made by 'pack_rgb' into an RGB tuple.
+    """
+    return (value >> 16) & 0xFF, (value >> 8) & 0xFF, value & 0xFF
+
+
+@functools.lru_cache(maxsize=None)
+def _ascii_tables():
+    # Maps each ASCII code to its hex digit value (255 where it is not a digit), and each
+    # nibble back to its uppercase ASCII digit
+    import numpy as np
+
+    nibble_from_ascii = np.full(256, 255, dtype=np.uint8)
+    for value, digit in enumerate(HEX_DIGITS):
+        nibble_from_ascii[ord(digit)] = value
+        nibble_from_ascii[ord(digit.lower())] = value
+    ascii_from_nibble = np.frombuffer(HEX_DIGITS.encode("ascii"), dtype=np.uint8)
+    return nibble_from_ascii, ascii_from_nibble
+
+
+def parse_hex_array(codes):
+    """
+    Parses many color codes at once.
+
+    When every code has the '#RRGGBB' form, the codes are decoded together as one byte
+    buffer with NumPy table lookups. Otherwise each code is parsed with 'parse_hex'.
+
+    Parameters:
+    codes (iterable): Color codes, as accepted by 'parse_hex'.
+
+    Returns:
+    ndarray: A uint8 array shaped (len(codes), 3).
+
+    Raises:
+    ValueError: If any code is not a valid color.
+    """
+    import numpy as np
+
+    codes = list(codes)
+    if codes and all(len(code) == 7 for code in codes):
+        try:
+            data = np.frombuffer("".join(codes).encode("ascii"), dtype=np.uint8)
+        except UnicodeEncodeError:
+            data = None
+        if data is not None:
+            data = data.reshape(-1, 7)
+            nibble_from_ascii, _ = _ascii_tables()
+            nibbles = nibble_from_ascii[data[:, 1:]]
+            if (data[:, 0] == ord("#")).all() and not (nibbles == 255).any():
+                return (nibbles[:, 0::2] << 4) | nibbles[:, 1::2]
+
+    colors = np.empty((len(codes), 3), dtype=np.uint8)
+    for index, code in enumerate(codes):
+        colors[index] = parse_hex(code)
+    return colors
+
+
+def hex_ascii_array(colors):
+    """
+    Formats many RGB colors at once as the ASCII bytes of uppercase hex codes.
+
+    Parameters:
+    colors (array-like): RGB values shaped (N, 3), from 0 to 255.
+
+    Returns:
+    ndarray: A uint8 array shaped (N, 7), one '#RRGGBB' code per row.
+    """
+    import numpy as np
+
+    colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+    _, ascii_from_nibble = _ascii_tables()
+
+    chars = np.empty((len(colors), 7), dtype=np.uint8)
+    chars[:, 0] = ord("#")
+    chars[:, 1::2] = ascii_from_nibble[colors >> 4]
+    chars[:, 2::2] = ascii_from_nibble[colors & 0x0F]
+    return chars
+
+
+def format_hex_array(colors):
+    """
+    Formats many RGB colors at once as uppercase hex codes.
+
+    The codes are assembled as a single byte buffer with NumPy and split afterwards, so no
+    string formatting happens per color.
+
+    Parameters:
+    colors (array-like): RGB values shaped (N, 3), from 0 to 255.
+
+    Returns:
+    list: The hex codes, such as '#A1B2C3', one per color.
+    """
+    text = hex_ascii_array(colors).tobytes().decode("ascii")
+    return [text[start:start + 7] for start in range(0, len(text), 7)]
+
+
+def pack_array(colors):
+    """
+    Packs many RGB colors into integers, as 'pack_rgb' does.
+
+    Parameters:
+    colors (array-like): RGB values shaped (N, 3), from 0 to 255.
+
+    Returns:
+    ndarray: A uint32 array shaped (N,).
+    """
+    import numpy as np
+
+    colors = np.asarray(colors, dtype=np.uint32).reshape(-1, 3)
+    return (colors[:, 0] << 16) | (colors[:, 1] << 8) | colors[:, 2]
+
+
+def unpack_array(packed):
+    """
+    Unpacks integers made by 'pack_rgb' or 'pack_array' into RGB colors.
+
+    Parameters:
+    packed (array-like): Packed colors.
+
+    Returns:
+    ndarray: A uint8 array shaped (N, 3).
+    """
+    import numpy as np
+
+    packed = np.asarray(packed, dtype=np.uint32).ravel()
+    colors = np.empty((len(packed), 3), dtype=np.uint8)
+    colors[:, 0] = (packed >> 16) & 0xFF
+    colors[:, 1] = (packed >> 8) & 0xFF
+    colors[:, 2] = packed & 0xFF
+    return colors
@@ -0,0 +1,138 @@
+"""
+WCAG contrast analysis for whole palettes.
+
+Relative luminance, contrast ratios against a set of text colors and the most legible text
+color are computed for an entire array of colors in one vectorized call. Luminance uses the
+256-entry sRGB decoding table from color_spaces, so no transfer curve is evaluated per color.
+"""
+
+import color_spaces
+
+# Rec. 709 weights of linear red, green and blue in relative luminance
+LUMINANCE_WEIGHTS = (0.2126, 0.7152, 0.0722)
+
+# Minimum contrast ratios of the WCAG 2 success criteria
+WCAG_AA = 4.5
+WCAG_AA_LARGE = 3.0
+WCAG_AAA = 7.0
+
+BLACK_AND_WHITE = ((0, 0, 0), (255, 255, 255))
+
+
+def relative_luminance(colors):
+    """
+    Computes the WCAG relative luminance of 8-bit sRGB colors.
+
+    Parameters:
+    colors (array-like): RGB values shaped (..., 3), from 0 to 255.
+
+    Returns:
+    ndarray: A float64 array shaped (...), from 0 (black) to 1 (white).
+    """
+    import numpy as np
+
+    return color_spaces.srgb_to_linear(colors) @ np.array(LUMINANCE_WEIGHTS)
+
+
+def contrast_ratio(luminance1, luminance2):
+    """
+    Computes WCAG contrast ratios between luminances, in either order.
+
+    Parameters:
+    luminance1 (array-like): Relative luminances.
+    luminance2 (array-like): Relative luminances, broadcastable against luminance1.
+
+    Returns:
+    ndarray: Ratios from 1 to 21.
+    """
+    import numpy as np
+
+    lighter = np.maximum(luminance1, luminance2)
+    darker = np.minimum(luminance1, luminance2)
+    return (lighter + 0.05) / (darker + 0.05)
+
+
+def contrast_ratios(colors, text_colors=BLACK_AND_WHITE):
+    """
+    Computes the contrast ratio of every color against every text color.
+
+    Parameters:
+    colors (array-like): Background RGB values shaped (N, 3).
+    text_colors (array-like): Text RGB values shaped (M, 3).
+
+    Returns:
+    ndarray: A float64 array shaped (N, M).
+    """
+    import numpy as np
+
+    backgrounds = relative_luminance(np.asarray(colors).reshape(-1, 3))
+    texts = relative_luminance(np.asarray(text_colors).reshape(-1, 3))
+    return contrast_ratio(backgrounds[:, None], texts[None, :])
+
+
+def wcag_levels(ratios):
+    """
+    Names the highest WCAG level each contrast ratio meets.
+
+    Parameters:
+    ratios (array-like): Contrast ratios.
+
+    Returns:
+    ndarray: Strings of the same shape: 'AAA', 'AA', 'AA Large' or 'Fail'.
+    """
+    import numpy as np
+
+    ratios = np.asarray(ratios)
+    return np.select(
+        [ratios >= WCAG_AAA, ratios >= WCAG_AA, ratios >= WCAG_AA_LARGE],
+        ["AAA", "AA", "AA Large"],
+        "Fail",
+    )
+
+
+def analyze_contrast(colors, text_colors=BLACK_AND_WHITE):
+    """
+    Analyzes the legibility of text on every color of a palette.
+
+    Parameters:
+    colors (array-like): Background RGB values shaped (N, 3), such as a Palette.
+    text_colors (array-like): The candidate text RGB values shaped (M, 3).
+
+    Returns:
+    dict: NumPy arrays with one entry per color:
+        'luminance': the relative luminance, shaped (N,),
+        'ratios': the contrast against each text color, shaped (N, M),
+        'best': the index of the text color with the highest contrast, shaped (N,),
+        'best_ratio': that highest contrast, shaped (N,),
+        'level': the WCAG level reached by the best text color, shaped (N,).
+    """
+    import numpy as np
+
+    colors = np.asarray(colors).reshape(-1, 3)
+    text_luminance = relative_luminance(np.asarray(text_colors).reshape(-1, 3))
+    luminance = relative_luminance(colors)
+
+    ratios = contrast_ratio(luminance[:, None], text_luminance[None, :])
+    best = ratios.argmax(axis=1)
+    best_ratio = ratios[np.arange(len(ratios)), best]
+    return {
+        "luminance": luminance,
+        "ratios": ratios,
+        "best": best,
+        "best_ratio": best_ratio,
+        "level": wcag_levels(best_ratio),
+    }
+
+
+def legible_text_colors(colors, text_colors=BLACK_AND_WHITE):
+    """
+    Picks the text color with the highest contrast on each background color.
+
+    Parameters:
+    colors (array-like): Background RGB values shaped (N, 3).
+    text_colors (array-like): The candidate text RGB values shaped (M, 3).
+
+    Returns:
+    ndarray: The index into text_colors chosen for each color, shaped (N,).
+    """
+    return contrast_ratios(colors, text_colors).argmax(axis=1)
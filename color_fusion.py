@@ -1,17 +1,75 @@
-from tkinter import ttk, filedialog, simpledialog, messagebox, colorchooser
-from ttkthemes import ThemedTk, ThemedStyle
-from tkinter.colorchooser import askcolor
-from PIL import Image, ImageDraw
+import time
+
+# Start-up is timed from the moment this module starts loading
+LOAD_START = time.perf_counter()
+
+from tkinter import ttk
 import tkinter as tk
-import colorsys
+import color_codec
+import color_contrast
+import color_index
+import color_spaces
+import gradient_cache
+import gradient_engine
+import gradient_export
+import gradient_animation
+import gradient_stops
+import gradient_styles
+import instrumentation
+import palette_extract
+import palette_formats
+import functools
 import random
-import re
 import os
+import sys
+
+# ttk theme of the application: one of Tk's built-in themes, or a ttkthemes theme
+THEME = "clam"
+
+# Window icon, looked up next to this module
+ICON_FILE = "color_fusion.gif"
+
+# Delay used to coalesce bursts of redraw requests into a single redraw per frame
+REDRAW_DELAY_MS = 16
+
+# Dark and light text colors of the theme
+TEXT_COLORS = ("#31363B", "#EFF0F1")
+
+# Minimum spacing in pixels between contrast annotations on the gradient display
+ANNOTATION_SPACING = 48
+
+# Number of dominant colors taken from an image: the two ends plus the extra stops
+IMAGE_PALETTE_SIZE = 5
+
+# Largest number of intermediate colors that can be typed in; the slider stops at 64. The
+# display blends and formats as hex only gradients with at most one color per pixel column
+# and samples larger ones lazily, as the image, palette and animation exports do, so no
+# path allocates this many colors. The web server keeps a lower limit of its own
+# (gradient_server.MAX_MIDPOINTS) because /palette.json returns every color.
+MAX_INTERMEDIATE_COLORS = 10_000_000
+
+# Default number of frames of an exported animation
+ANIMATION_FRAMES = 60
+
+# Precision options for exported images: (bits per channel, dithering method)
+EXPORT_MODES = {
+    "8-bit": (8, None),
+    "8-bit, ordered dither": (8, "ordered"),
+    "8-bit, blue-noise dither": (8, "blue_noise"),
+    "16-bit": (16, None),
+}
+
+
+@functools.lru_cache(maxsize=None)
+def icon_path():
+    # The path of the window icon next to this module, or None if it is missing
+    path = os.path.join(os.path.dirname(os.path.abspath(__file__)), ICON_FILE)
+    return path if os.path.isfile(path) else None
 
 
 # GUI Application Class
 class ColorFusionApp:
-    def __init__(self, root):
+    def __init__(self, root, startup=None):
         """
         Objectives:
         - Develop a GUI application named 'Color Fusion' for blending colors.
@@ -50,22 +108,29 @@ class ColorFusionApp:
         Solution: Developed 'get_legible_text_color' to dynamically adjust text color for optimal contrast against different
         background colors. This method calculates the brightness of the background and selects a legible text color
         accordingly.
+
+        - Challenge: Starting up quickly.
+        Solution: Dialogs, image decoding and the optional ttkthemes package are imported
+        only when first used, the theme is set up once in 'setup_theme', and the icon path is
+        resolved once. Pass a StartupTimer as 'startup' to time each phase up to the first
+        frame; the report is printed when instrumentation is on.
         """
 
         # Root configuration
         self.root = root
         self.root.title("Color Fusion")
+        self.startup = startup
 
-        # Set up the icon
-        icon_path = "color_fusion.gif"  # Assuming the icon is in the same directory
-        self.root.iconphoto(True, tk.PhotoImage(file=icon_path))
+        # Set up the icon, found next to this module rather than in the working directory
+        if icon_path() is not None:
+            self.icon = tk.PhotoImage(file=icon_path())
+            self.root.iconphoto(True, self.icon)
 
         # Set minimum window size
         self.root.minsize(500, 700)
 
-        # Configure ttk Style using ThemedStyle
-        style = ThemedStyle(self.root)
-        style.theme_use("clam")
+        style = self.setup_theme()
+        self.mark_startup("theme")
 
         # Define a new style for the hover state
         style.map(
@@ -154,26 +219,76 @@ class ColorFusionApp:
         self.color_two_picker.pack(side=tk.LEFT, padx=entry_padding)
         self.color_two_frame.pack(pady=10)
 
+        # Extra color stops between Color One (at 0%) and Color Two (at 100%)
+        self.middle_stops = gradient_stops.MultiStopGradient()
+
+        self.stops_frame = ttk.Frame(root, style="TFrame", padding=(5, 5, 5, 5))
+        self.stops_listbox = tk.Listbox(
+            self.stops_frame,
+            height=4,
+            width=24,
+            bg="#32302F",
+            fg="#eff0f1",
+            selectbackground="#3daee9",
+            exportselection=False,
+        )
+        self.stops_listbox.pack(side=tk.LEFT, padx=entry_padding)
+
+        self.stops_buttons_frame = ttk.Frame(self.stops_frame, style="TFrame")
+        stop_buttons = [
+            ("Add Stop", self.add_gradient_stop),
+            ("Remove Stop", self.remove_gradient_stop),
+            ("Move Up", lambda: self.move_gradient_stop(-1)),
+            ("Move Down", lambda: self.move_gradient_stop(1)),
+            ("From Image", self.load_colors_from_image),
+        ]
+        for index, (text, command) in enumerate(stop_buttons):
+            ttk.Button(
+                self.stops_buttons_frame,
+                text=text,
+                command=command,
+                style="Hover.TButton",
+            ).grid(row=index // 2, column=index % 2, padx=2, pady=2, sticky="ew")
+        self.stops_buttons_frame.pack(side=tk.LEFT, padx=entry_padding)
+        self.stops_frame.pack(pady=5)
+
         # Bind KeyRelease event to color entry widgets
-        self.color_one_entry.bind("<KeyRelease>", self.update_gradient_display)
-        self.color_two_entry.bind("<KeyRelease>", self.update_gradient_display)
+        self.color_one_entry.bind("<KeyRelease>", self.schedule_redraw)
+        self.color_two_entry.bind("<KeyRelease>", self.schedule_redraw)
 
-        # Create label and scale for selecting intermediate colors
+        # Create label, entry box and scale for selecting intermediate colors. The box
+        # accepts counts far beyond the slider's range
+        self.intermediate_colors_frame = ttk.Frame(root, style="TFrame")
         self.intermediate_colors_label = tk.Label(
-            root,
+            self.intermediate_colors_frame,
             text="Number of Intermediate Colors:",
             bg="#31363b",
             fg="#eff0f1",
         )
+        self.intermediate_colors_label.pack(side=tk.LEFT, padx=entry_padding)
+
+        self.intermediate_colors_text = tk.StringVar(value="10")
+        self.intermediate_colors_entry = tk.Spinbox(
+            self.intermediate_colors_frame,
+            from_=1,
+            to=MAX_INTERMEDIATE_COLORS,
+            width=10,
+            textvariable=self.intermediate_colors_text,
+            command=self.on_intermediate_colors_typed,
+            bg="#32302F",
+            fg="#eff0f1",
+        )
+        self.intermediate_colors_entry.bind("<KeyRelease>", self.on_intermediate_colors_typed)
+        self.intermediate_colors_entry.pack(side=tk.LEFT, padx=entry_padding)
+        self.intermediate_colors_frame.pack(pady=5)
 
-        self.intermediate_colors_label.pack(pady=5)
         self.intermediate_colors_scale = tk.Scale(
             root,
             from_=1,
             to=64,
             orient=tk.HORIZONTAL,
             length=300,
-            command=self.update_gradient_display,
+            command=self.on_intermediate_colors_scale,
             bg="#31363b",
             fg="#eff0f1",
         )
@@ -186,37 +301,203 @@ class ColorFusionApp:
         self.show_separations = tk.BooleanVar(
             value=True
         )  # Default is True to show separations
+        # Frame holding the display options side by side
+        self.options_frame = ttk.Frame(root, style="TFrame")
+
         self.separations_checkbox = tk.Checkbutton(
-            root,
+            self.options_frame,
             text="Separations  ",
             variable=self.show_separations,
-            command=self.update_gradient_display,
+            command=self.schedule_redraw,
             bg="#3daee9",
             fg="#eff0f1",
         )
-        self.separations_checkbox.pack(pady=5)
+        self.separations_checkbox.pack(side=tk.LEFT, padx=entry_padding)
+
+        # Smooth mode draws one color per pixel column as a single canvas image
+        self.smooth_gradient = tk.BooleanVar(value=False)
+        self.smooth_checkbox = tk.Checkbutton(
+            self.options_frame,
+            text="Smooth  ",
+            variable=self.smooth_gradient,
+            command=self.schedule_redraw,
+            bg="#3daee9",
+            fg="#eff0f1",
+        )
+        self.smooth_checkbox.pack(side=tk.LEFT, padx=entry_padding)
+
+        # Annotates the colors with their WCAG contrast against the theme's text colors
+        self.show_contrast = tk.BooleanVar(value=False)
+        self.contrast_checkbox = tk.Checkbutton(
+            self.options_frame,
+            text="Contrast  ",
+            variable=self.show_contrast,
+            command=self.schedule_redraw,
+            bg="#3daee9",
+            fg="#eff0f1",
+        )
+        self.contrast_checkbox.pack(side=tk.LEFT, padx=entry_padding)
+
+        # Color space used to interpolate between the two colors
+        self.color_space = tk.StringVar(value=color_spaces.COLOR_SPACES["srgb"])
+        self.color_space_menu = tk.OptionMenu(
+            self.options_frame,
+            self.color_space,
+            *color_spaces.COLOR_SPACES.values(),
+            command=self.schedule_redraw,
+        )
+        self.color_space_menu.configure(
+            bg="#3daee9", fg="#eff0f1", highlightthickness=0
+        )
+        self.color_space_menu.pack(side=tk.LEFT, padx=entry_padding)
+
+        # Shape of the gradient: bands across, down, around the center or from four corners
+        self.gradient_style = tk.StringVar(value=gradient_styles.STYLES["horizontal"])
+        self.gradient_style_menu = tk.OptionMenu(
+            self.options_frame,
+            self.gradient_style,
+            *gradient_styles.STYLES.values(),
+            command=self.schedule_redraw,
+        )
+        self.gradient_style_menu.configure(
+            bg="#3daee9", fg="#eff0f1", highlightthickness=0
+        )
+        self.gradient_style_menu.pack(side=tk.LEFT, padx=entry_padding)
+        self.options_frame.pack(pady=5)
         self.gradient_display.pack(fill=tk.BOTH, expand=True, padx=20, pady=20)
 
         # Bind click event
         self.gradient_display.bind("<Button-1>", self.on_gradient_click)
 
-        # Track last valid gradient
+        # Track last valid gradient: its colors and the MultiStopGradient they came from,
+        # which the styles other than horizontal need to redraw it
         self.last_valid_gradient = None
+        self.last_valid_stops = None
+
+        # Canvas rectangle items of the gradient, with the (coords, fill, outline) each was
+        # last drawn with, so redraws only touch what changed
+        self.gradient_items = []
+        self.gradient_item_states = []
+        self.error_message_item = None
+        self.contrast_items = []
+
+        # Canvas image item and its PhotoImage used in smooth mode and for the styles other
+        # than horizontal, and the pixels of those styles, used to look up clicked colors
+        self.gradient_image_item = None
+        self.gradient_photo = None
+        self.gradient_pixels = None
+
+        # Pending 'after' job for the next redraw, and the inputs of the last completed one
+        self.redraw_job = None
+        self.resize_pending = False
+        self.last_redraw_inputs = None
+
+        # Redraw timings, recorded only when enabled through the environment. The Debug
+        # menu and the frame time overlay are only offered then.
+        self.instrumentation = instrumentation.Instrumentation(
+            instrumentation.enabled_from_env()
+        )
+        self.show_overlay = tk.BooleanVar(value=self.instrumentation.enabled)
+        self.overlay_items = None
+        if self.instrumentation.enabled:
+            self.create_debug_menu()
+
+        # Size of exported images, remembered between exports
+        self.export_width = 2160
+        self.export_height = 2160
 
         # Update gradient display
         self.update_gradient_display()
 
+        self.export_frame = ttk.Frame(root, style="TFrame")
         self.export_button = ttk.Button(
-            root,
+            self.export_frame,
             text="Export Gradient",
             command=self.export_gradient_as_png,
             style="Hover.TButton",
         )
+        self.export_button.pack(side=tk.LEFT, padx=2)
 
-        self.export_button.pack(pady=10)
+        self.export_palette_button = ttk.Button(
+            self.export_frame,
+            text="Export Palette",
+            command=self.export_palette,
+            style="Hover.TButton",
+        )
+        self.export_palette_button.pack(side=tk.LEFT, padx=2)
+        self.export_frame.pack(pady=10)
+
+        # Bit depth and dithering of exported images
+        self.export_mode = tk.StringVar(value=next(iter(EXPORT_MODES)))
+        self.export_mode_menu = tk.OptionMenu(root, self.export_mode, *EXPORT_MODES)
+        self.export_mode_menu.configure(bg="#3daee9", fg="#eff0f1", highlightthickness=0)
+        self.export_mode_menu.pack(pady=(0, 10))
+
+        # Keyframes of an animated export: (color one, color two, number of colors) captured
+        # from the inputs, spaced evenly over the animation
+        self.keyframes = []
+        self.animation_frame = ttk.Frame(root, style="TFrame")
+        animation_buttons = [
+            ("Add Keyframe", self.add_keyframe),
+            ("Clear Keyframes", self.clear_keyframes),
+            ("Export Animation", self.export_animation),
+        ]
+        for text, command in animation_buttons:
+            ttk.Button(
+                self.animation_frame, text=text, command=command, style="Hover.TButton"
+            ).pack(side=tk.LEFT, padx=2)
+        self.keyframes_label = tk.Label(
+            self.animation_frame, text="Hue cycle", bg="#31363b", fg="#eff0f1"
+        )
+        self.keyframes_label.pack(side=tk.LEFT, padx=entry_padding)
+        self.animation_frame.pack(pady=(0, 10))
 
         # Bind resize event
         root.bind("<Configure>", self.handle_resize)
+        self.mark_startup("widgets")
+
+    def setup_theme(self):
+        """
+        Selects the ttk theme THEME. Tk's built-in themes are used directly; ttkthemes is
+        only imported for the themes it adds.
+
+        Returns:
+        ttk.Style: The style object of the root window.
+        """
+        style = ttk.Style(self.root)
+        if THEME not in style.theme_names():
+            from ttkthemes import ThemedStyle
+
+            style = ThemedStyle(self.root)
+        style.theme_use(THEME)
+        return style
+
+    def mark_startup(self, phase):
+        # Records the end of a start-up phase, when start-up is being timed
+        if self.startup is not None:
+            self.startup.mark(phase)
+
+    def finish_startup(self):
+        """
+        Records the first frame on screen, which ends start-up, and reports the start-up
+        times when instrumentation is on.
+        """
+        if self.startup is None or not self.startup.finish("first_frame"):
+            return
+        if self.instrumentation.enabled:
+            self.instrumentation.startup = self.startup
+            print(self.startup.report(), file=sys.stderr)
+
+    def show_startup_report(self):
+        """
+        Shows the start-up times in a message box.
+        """
+        from tkinter import messagebox
+
+        if self.startup is None:
+            messagebox.showinfo("Start-up Times", "Start-up was not timed.")
+        else:
+            messagebox.showinfo("Start-up Times", self.startup.report())
 
     def fill_random_color(self, color_entry):
         """
@@ -225,8 +506,8 @@ class ColorFusionApp:
         Generates a random hex color code and updates the specified color entry field with
         this value. Also triggers an update of the gradient display.
         """
-        random_color = "#{:02X}{:02X}{:02X}".format(
-            random.randint(0, 255), random.randint(0, 255), random.randint(0, 255)
+        random_color = color_codec.format_hex(
+            (random.randint(0, 255), random.randint(0, 255), random.randint(0, 255))
         )
 
         color_entry.delete(0, tk.END)
@@ -237,15 +518,71 @@ class ColorFusionApp:
 
         self.update_gradient_display()
 
+    def on_intermediate_colors_scale(self, value):
+        # The slider was moved: show its value in the entry box and redraw
+        self.intermediate_colors_text.set(value)
+        self.schedule_redraw()
+
+    def on_intermediate_colors_typed(self, event=None):
+        # A count was typed or stepped in the entry box: move the slider along while the
+        # count is within its range, and redraw
+        value = self.get_num_midpoints()
+        if value <= self.intermediate_colors_scale.cget("to") and str(value) == (
+            self.intermediate_colors_text.get().strip()
+        ):
+            self.intermediate_colors_scale.set(value)
+        self.schedule_redraw()
+
+    def get_num_midpoints(self):
+        """
+        Returns the number of intermediate colors typed in the entry box, limited to
+        MAX_INTERMEDIATE_COLORS, or the slider's value while the box holds no valid number.
+        """
+        try:
+            value = int(self.intermediate_colors_text.get())
+        except ValueError:
+            return self.intermediate_colors_scale.get()
+        return min(max(value, 1), MAX_INTERMEDIATE_COLORS)
+
     def update_scale_length(self):
         gradient_width = self.gradient_display.winfo_width()
         new_scale_length = max(gradient_width - 20, 100)  # Ensures a minimum length
         self.intermediate_colors_scale.configure(length=new_scale_length)
 
     def handle_resize(self, event):
-        # Handle window resize event.
+        # Handle window resize event. <Configure> bound on the root also fires for every
+        # child widget, so only the root window's own events are acted on.
+        if event.widget is not self.root:
+            return
+        self.schedule_redraw(resize=True)
+
+    def schedule_redraw(self, event=None, resize=False):
+        """
+        Schedules a redraw of the gradient display for the next frame.
+
+        Bursts of events, such as typing, dragging the slider or resizing the window, are
+        coalesced: while a redraw is pending, further requests are folded into it.
+
+        Parameters:
+        event (Event): The triggering event, if any. Unused.
+        resize (bool): Whether the window size changed, so the slider length is updated too.
+        """
+        self.resize_pending = self.resize_pending or resize
+        self.instrumentation.count("redraw_requests")
+        if self.redraw_job is None:
+            self.redraw_job = self.root.after(REDRAW_DELAY_MS, self.run_scheduled_redraw)
+        else:
+            self.instrumentation.count("coalesced")
+
+    def run_scheduled_redraw(self):
+        """
+        Performs the redraw requested through 'schedule_redraw'.
+        """
+        self.redraw_job = None
         self.update_gradient_display()
-        self.update_scale_length()
+        if self.resize_pending:
+            self.resize_pending = False
+            self.update_scale_length()
 
     def pick_color(self, entry):
         """
@@ -255,16 +592,24 @@ class ColorFusionApp:
         Args:
             entry (tk.Entry): The entry widget to update with the selected color.
         """
-        color_value = entry.get().lstrip("#")
+        from tkinter import colorchooser
 
-        # Check if the current value is a placeholder, and set a default color if it is
+        color_value = entry.get()
+
+        # Placeholders and invalid codes open the picker on black. Valid codes are
+        # normalised to '#RRGGBB', since Tk does not understand every accepted form.
         if color_value in [
             self.color_one_entry.placeholder,
             self.color_two_entry.placeholder,
         ]:
-            color_value = "000000"  # Default color, e.g., black
+            color_value = "#000000"
+        else:
+            try:
+                color_value = color_codec.format_hex(color_codec.parse_hex(color_value))
+            except ValueError:
+                color_value = "#000000"
 
-        color = colorchooser.askcolor(title="Pick a Color", color="#" + color_value)
+        color = colorchooser.askcolor(title="Pick a Color", color=color_value)
         if color[1]:
             entry.delete(0, tk.END)
             entry.insert(0, color[1])
@@ -273,7 +618,13 @@ class ColorFusionApp:
     def update_gradient_display(self, event=None):
         """
         Update the gradient display based on user inputs.
+
+        The redraw is skipped when the colors, stops, color space, number of colors, canvas
+        size, style, separations and smooth settings are all the same as for the last completed
+        redraw.
         """
+        self.instrumentation.begin_frame()
+        skipped = False
         try:
             color_one_hex = self.color_one_entry.get()
             color_two_hex = self.color_two_entry.get()
@@ -285,21 +636,327 @@ class ColorFusionApp:
             rgb_color1 = self.get_rgb_from_hex(color_one_hex)
             rgb_color2 = self.get_rgb_from_hex(color_two_hex)
 
-            number_of_colors = self.intermediate_colors_scale.get()
-            blended_colors = self.blend_colors(rgb_color1, rgb_color2, number_of_colors)
+            number_of_colors = self.get_num_midpoints()
+
+            redraw_inputs = (
+                rgb_color1,
+                rgb_color2,
+                tuple(self.middle_stops.stops),
+                self.get_color_space(),
+                number_of_colors,
+                self.get_gradient_style(),
+                self.gradient_display.winfo_width(),
+                self.gradient_display.winfo_height(),
+                self.show_separations.get(),
+                self.smooth_gradient.get(),
+                self.show_contrast.get(),
+            )
+            if redraw_inputs == self.last_redraw_inputs:
+                skipped = True
+                return
+
+            canvas_width = self.gradient_display.winfo_width()
+            with self.instrumentation.stage("blend"):
+                gradient = self.build_gradient(rgb_color1, rgb_color2)
+                if self.smooth_gradient.get():
+                    # One color per pixel column
+                    number_of_colors = max(canvas_width - 2, 0)
+                if number_of_colors + 2 > max(canvas_width, 1):
+                    # More colors than pixel columns: the colors are sampled lazily, and
+                    # only those that land on a column are ever computed
+                    blended_colors = gradient.samples(number_of_colors)
+                else:
+                    blended_colors = gradient_cache.default_cache.palette(
+                        gradient, number_of_colors
+                    )
+            with self.instrumentation.stage("hex"):
+                if isinstance(blended_colors, gradient_stops.GradientSamples):
+                    hex_colors = None
+                else:
+                    hex_colors = gradient_cache.default_cache.hex_colors(
+                        gradient, number_of_colors
+                    )
 
             self.last_valid_gradient = blended_colors
-            self.draw_horizontal_gradient(blended_colors, rgb_color2)
+            self.last_valid_stops = gradient
+            self.draw_gradient(blended_colors, rgb_color2, hex_colors, gradient)
+            self.last_redraw_inputs = redraw_inputs
+
+            # The first gradient drawn on the visible canvas ends start-up
+            if self.startup is not None and self.gradient_display.winfo_ismapped():
+                self.finish_startup()
 
         except ValueError as e:
             self.handle_gradient_error(e)
+        finally:
+            self.finish_instrumented_frame(skipped)
+
+    def finish_instrumented_frame(self, skipped):
+        """
+        Completes the instrumentation record of a redraw and refreshes the overlay.
+
+        Tk normally paints the canvas later, when idle. While instrumentation is on, the
+        pending painting is flushed here so its cost is recorded as the 'tk' stage.
+
+        Parameters:
+        skipped (bool): Whether the redraw was skipped because nothing changed.
+        """
+        if not self.instrumentation.enabled:
+            return
+
+        if not skipped:
+            with self.instrumentation.stage("tk"):
+                self.gradient_display.update_idletasks()
+        items = len(self.gradient_display.find_all()) - len(self.overlay_items or ())
+        self.instrumentation.end_frame(skipped, items)
+        self.draw_instrumentation_overlay()
+
+    def draw_instrumentation_overlay(self):
+        """
+        Shows the last frame time and the redraw counters in the corner of the canvas.
+        """
+        if not self.show_overlay.get() or not self.instrumentation.frames:
+            if self.overlay_items is not None:
+                self.gradient_display.delete(*self.overlay_items)
+                self.overlay_items = None
+            return
+
+        drawn = [frame for frame in self.instrumentation.frames if not frame["skipped"]]
+        counters = self.instrumentation.counters
+        last_ms = drawn[-1]["duration"] * 1000 if drawn else 0.0
+        mean_ms = sum(frame["duration"] for frame in drawn) / max(len(drawn), 1) * 1000
+        text = (
+            f"frame {last_ms:.1f} ms (avg {mean_ms:.1f})\n"
+            f"redraws {counters['redraws']}  skipped {counters['skipped']}\n"
+            f"requests {counters['redraw_requests']}  coalesced {counters['coalesced']}\n"
+            f"items {drawn[-1]['items'] if drawn else 0}"
+        )
+
+        if self.overlay_items is None:
+            background = self.gradient_display.create_rectangle(
+                0, 0, 0, 0, fill="#31363B", outline=""
+            )
+            label = self.gradient_display.create_text(
+                8, 8, anchor="nw", fill="#EFF0F1", font=("Courier", 9)
+            )
+            self.overlay_items = (background, label)
+
+        background, label = self.overlay_items
+        self.gradient_display.itemconfigure(label, text=text)
+        x1, y1, x2, y2 = self.gradient_display.bbox(label)
+        self.gradient_display.coords(background, x1 - 4, y1 - 4, x2 + 4, y2 + 4)
+        self.gradient_display.tag_raise(background)
+        self.gradient_display.tag_raise(label)
+
+    def create_debug_menu(self):
+        """
+        Adds the Debug menu with the instrumentation overlay and trace and profile exports.
+        """
+        menubar = tk.Menu(self.root)
+        debug_menu = tk.Menu(menubar, tearoff=0)
+        debug_menu.add_checkbutton(
+            label="Show Frame Overlay",
+            variable=self.show_overlay,
+            command=self.draw_instrumentation_overlay,
+        )
+        debug_menu.add_command(label="Reset Counters", command=self.instrumentation.reset)
+        debug_menu.add_command(label="Start-up Times...", command=self.show_startup_report)
+        debug_menu.add_separator()
+        debug_menu.add_command(label="Save Trace...", command=self.save_instrumentation_trace)
+        debug_menu.add_command(label="Start Profiling", command=self.instrumentation.start_profile)
+        debug_menu.add_command(label="Stop Profiling and Save...", command=self.save_profile)
+        menubar.add_cascade(label="Debug", menu=debug_menu)
+        self.root.config(menu=menubar)
+
+    def save_instrumentation_trace(self):
+        """
+        Saves the recorded frames as a JSON trace for chrome://tracing or Perfetto.
+        """
+        from tkinter import filedialog, messagebox
+
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".json",
+            filetypes=[("Trace Event JSON", "*.json")],
+            initialfile="color_fusion_trace.json",
+        )
+        if file_path:
+            try:
+                self.instrumentation.dump_trace(file_path)
+            except OSError as e:
+                messagebox.showerror("Error", f"Failed to save trace: {e}")
+
+    def save_profile(self):
+        """
+        Stops cProfile and saves its statistics for pstats or snakeviz.
+        """
+        from tkinter import filedialog, messagebox
+
+        if not self.instrumentation.profiling:
+            messagebox.showinfo("Profiling", "Profiling has not been started.")
+            return
+        file_path = filedialog.asksaveasfilename(
+            defaultextension=".prof",
+            filetypes=[("cProfile statistics", "*.prof")],
+            initialfile="color_fusion.prof",
+        )
+        try:
+            self.instrumentation.stop_profile(file_path or None)
+        except OSError as e:
+            messagebox.showerror("Error", f"Failed to save profile: {e}")
+
+    def build_gradient(self, rgb_color1, rgb_color2):
+        """
+        Builds the multi-stop gradient from the two main colors and any extra stops.
+
+        Color One sits at 0% and Color Two at 100%; with no extra stops this is the
+        classic two-color gradient.
+
+        Parameters:
+        rgb_color1 (tuple): The RGB tuple of the first color.
+        rgb_color2 (tuple): The RGB tuple of the second color.
+
+        Returns:
+        MultiStopGradient: The gradient to display or export.
+        """
+        return gradient_stops.MultiStopGradient(
+            [(0.0, rgb_color1), *self.middle_stops.stops, (1.0, rgb_color2)],
+            self.get_color_space(),
+        )
+
+    def refresh_stops_list(self, selected_index=None):
+        """
+        Refreshes the list of extra stops and redraws the gradient.
+
+        Parameters:
+        selected_index (int): The index of the stop to select afterwards, if any.
+        """
+        self.stops_listbox.delete(0, tk.END)
+        for position, color in self.middle_stops.stops:
+            color_hex = color_codec.format_hex(color)
+            self.stops_listbox.insert(tk.END, f"{round(position * 100)}%  {color_hex}")
+
+        if selected_index is not None:
+            self.stops_listbox.selection_set(selected_index)
+            self.stops_listbox.see(selected_index)
+
+        self.update_gradient_display()
+
+    def add_gradient_stop(self):
+        """
+        Asks the user for a color and a position, and adds it as an extra gradient stop.
+        """
+        from tkinter import colorchooser, simpledialog
+
+        color = colorchooser.askcolor(title="Pick a Stop Color")
+        if not color[1]:
+            return
+
+        position = simpledialog.askfloat(
+            "Stop Position",
+            "Stop position (0-100%):",
+            initialvalue=50,
+            minvalue=0,
+            maxvalue=100,
+            parent=self.root,
+        )
+        if position is None:
+            return
+
+        index = self.middle_stops.add_stop(
+            position / 100, self.get_rgb_from_hex(color[1])
+        )
+        self.refresh_stops_list(index)
+
+    def remove_gradient_stop(self):
+        """
+        Removes the extra stop selected in the stops list.
+        """
+        selection = self.stops_listbox.curselection()
+        if not selection:
+            return
+
+        self.middle_stops.remove_stop(selection[0])
+        self.refresh_stops_list()
+
+    def move_gradient_stop(self, offset):
+        """
+        Reorders the extra stops by swapping the selected stop's color with a neighbour's.
+
+        The stop positions stay where they are, so the colors move along the gradient.
+
+        Parameters:
+        offset (int): -1 to move the color towards Color One, 1 to move it towards Color Two.
+        """
+        selection = self.stops_listbox.curselection()
+        if not selection:
+            return
+
+        index = selection[0]
+        target = index + offset
+        if not 0 <= target < len(self.middle_stops):
+            return
+
+        colors = self.middle_stops.colors
+        color, target_color = colors[index], colors[target]
+        self.middle_stops.set_color(index, target_color)
+        self.middle_stops.set_color(target, color)
+        self.refresh_stops_list(target)
+
+    def load_colors_from_image(self):
+        """
+        Seeds the gradient with the dominant colors of an image chosen by the user.
+
+        The colors are ordered from darkest to lightest: the darkest becomes Color One, the
+        lightest Color Two, and the rest replace the extra stops at even spacing.
+        """
+        from tkinter import filedialog, messagebox
+
+        file_path = filedialog.askopenfilename(
+            title="Choose an Image",
+            filetypes=[
+                ("Images", "*.png *.jpg *.jpeg *.bmp *.gif *.tif *.tiff *.webp"),
+                ("All files", "*.*"),
+            ],
+        )
+        if not file_path:
+            return
+
+        try:
+            palette = palette_extract.extract_palette(
+                file_path, IMAGE_PALETTE_SIZE, method="kmeans"
+            )
+        except (OSError, ValueError) as e:
+            messagebox.showerror("Error", f"Failed to read image: {e}")
+            return
+
+        lightness = color_spaces.to_space(palette.array, "oklab")[:, 0]
+        colors = [palette[int(index)] for index in lightness.argsort()]
+
+        for entry, color in (
+            (self.color_one_entry, colors[0]),
+            (self.color_two_entry, colors[-1]),
+        ):
+            entry.delete(0, tk.END)
+            entry.insert(0, color_codec.format_hex(color))
+            entry["fg"] = entry.default_fg_color
+
+        middle = colors[1:-1]
+        self.middle_stops = gradient_stops.MultiStopGradient(
+            [((index + 1) / (len(middle) + 1), color) for index, color in enumerate(middle)]
+        )
+        self.refresh_stops_list()
 
     def handle_gradient_error(self, error):
         """
         Handle errors that occur during gradient generation and display.
         """
+        self.last_redraw_inputs = None
         if self.last_valid_gradient:
-            self.draw_horizontal_gradient(self.last_valid_gradient, self.get_rgb_from_hex("#ffffff"))
+            self.draw_gradient(
+                self.last_valid_gradient,
+                self.get_rgb_from_hex("#ffffff"),
+                gradient=self.last_valid_stops,
+            )
         else:
             self.display_error_message(f"Error: {error}")
 
@@ -308,7 +965,14 @@ class ColorFusionApp:
         Display an error message on the gradient display area.
         """
         self.gradient_display.delete("all")
-        self.gradient_display.create_text(
+        self.gradient_items = []
+        self.gradient_item_states = []
+        self.gradient_image_item = None
+        self.gradient_photo = None
+        self.gradient_pixels = None
+        self.contrast_items = []
+        self.overlay_items = None
+        self.error_message_item = self.gradient_display.create_text(
             self.gradient_display.winfo_reqwidth() // 2,
             self.gradient_display.winfo_reqheight() // 2,
             text=message,
@@ -327,63 +991,225 @@ class ColorFusionApp:
         rgb (tuple): A tuple representing the RGB color (e.g., (255, 255, 255) for white).
 
         Returns:
-        str: A hex string representing the chosen text color ('#FFFFFF' for white, '#000000' for black).
+        str: A hex string representing the chosen text color, one of TEXT_COLORS.
+        """
+        dark_text, light_text = TEXT_COLORS
+        return light_text if self.is_color_dark(rgb) else dark_text
+
+    def draw_gradient(self, blended_colors, color2, hex_colors=None, gradient=None):
+        """
+        Draws the gradient with the rendering mode selected by the 'Smooth' option.
+
+        Horizontal gradients are drawn as rectangles unless 'Smooth' is on or there are more
+        colors than pixel columns; the other styles are always drawn as an image.
+
+        Parameters:
+        blended_colors (sequence): The RGB colors to be displayed, such as a Palette, or
+        lazy GradientSamples.
+        color2 (tuple): The RGB tuple of the second color, used for error handling.
+        hex_colors (sequence): The colors already formatted as hex codes, if available.
+        gradient (MultiStopGradient): The gradient the colors were blended from, needed by
+        the four-corner style.
+        """
+        if (
+            self.smooth_gradient.get()
+            or self.get_gradient_style() != "horizontal"
+            or len(blended_colors) > self.gradient_display.winfo_width()
+        ):
+            with self.instrumentation.stage("draw_image"):
+                self.draw_gradient_image(blended_colors, gradient)
+        else:
+            with self.instrumentation.stage("draw_rectangles"):
+                self.draw_horizontal_gradient(blended_colors, color2, hex_colors)
+        with self.instrumentation.stage("contrast"):
+            self.draw_contrast_annotations(blended_colors)
+
+    def draw_contrast_annotations(self, blended_colors):
+        """
+        Labels the colors on the display with their best WCAG contrast ratio and level.
+
+        Each label uses whichever of the theme's text colors contrasts most with the color
+        under it. When the colors are narrower than ANNOTATION_SPACING, only evenly spaced
+        colors are labelled. All colors are analyzed in one vectorized call. Only horizontal
+        gradients are labelled, since the labels are laid out across the display.
+
+        Parameters:
+        blended_colors (sequence): The RGB colors on the display, such as a Palette, or
+        lazy GradientSamples.
         """
-        return "#EFF0F1" if self.is_color_dark(rgb) else "#31363B"
+        if self.contrast_items:
+            self.gradient_display.delete(*self.contrast_items)
+            self.contrast_items = []
+        if not self.show_contrast.get() or not len(blended_colors):
+            return
+        if self.get_gradient_style() != "horizontal":
+            return
+
+        import numpy as np
+
+        canvas_width = self.gradient_display.winfo_width()
+        canvas_height = self.gradient_display.winfo_height()
+        color_width = canvas_width / len(blended_colors)
+        step = max(1, int(np.ceil(ANNOTATION_SPACING / max(color_width, 1e-9))))
+        indices = np.arange(step // 2, len(blended_colors), step)
+
+        if isinstance(blended_colors, gradient_stops.GradientSamples):
+            colors = blended_colors.take(indices)
+        else:
+            colors = np.asarray(blended_colors, dtype=np.uint8).reshape(-1, 3)[indices]
+        text_rgb = [color_codec.parse_hex(color) for color in TEXT_COLORS]
+        analysis = color_contrast.analyze_contrast(colors, text_rgb)
+
+        for index, best, ratio, level in zip(
+            indices.tolist(),
+            analysis["best"].tolist(),
+            analysis["best_ratio"].tolist(),
+            analysis["level"].tolist(),
+        ):
+            self.contrast_items.append(
+                self.gradient_display.create_text(
+                    (index + 0.5) * color_width,
+                    canvas_height / 2,
+                    text=f"{ratio:.1f}\n{level}",
+                    fill=TEXT_COLORS[best],
+                    font=("Arial", 9),
+                    justify="center",
+                )
+            )
 
-    def draw_horizontal_gradient(self, blended_colors, color2):
+    def draw_gradient_image(self, blended_colors, gradient=None):
+        """
+        Draws the gradient on the canvas as a single image item.
+
+        For horizontal gradients, one row of pixels is built from the colors and handed to Tk
+        as PPM data, so the cost does not depend on how many colors there are, and no
+        per-pixel calls are made. Lazy GradientSamples are only sampled at the colors that
+        land on a pixel. The other styles are rasterised over the whole canvas with
+        gradient_styles, the same code that exports them.
+
+        Parameters:
+        blended_colors (sequence): The RGB colors to be displayed, such as a Palette, or
+        lazy GradientSamples.
+        gradient (MultiStopGradient): The gradient the colors were blended from, needed by
+        the four-corner style.
+        """
+        # Remove the rectangles and any error message left by the other drawing modes
+        if self.gradient_items:
+            self.gradient_display.delete(*self.gradient_items)
+            self.gradient_items = []
+            self.gradient_item_states = []
+        if self.error_message_item is not None:
+            self.gradient_display.delete(self.error_message_item)
+            self.error_message_item = None
+
+        canvas_width = max(self.gradient_display.winfo_width(), 1)
+        canvas_height = max(self.gradient_display.winfo_height(), 1)
+        style = self.get_gradient_style()
+        if style == "horizontal":
+            row = gradient_engine.gradient_row(blended_colors, canvas_width)
+            data = gradient_engine.ppm_from_row(row, canvas_height)
+            self.gradient_pixels = None
+        else:
+            self.gradient_pixels = gradient_styles.StyleRasteriser(
+                gradient,
+                len(blended_colors) - 2,
+                style,
+                canvas_width,
+                canvas_height,
+                colors=blended_colors,
+            ).render()
+            data = gradient_engine.ppm_from_pixels(self.gradient_pixels)
+
+        # Keep a reference to the image, or Tk discards it
+        self.gradient_photo = tk.PhotoImage(data=data, format="PPM")
+        if self.gradient_image_item is None:
+            self.gradient_image_item = self.gradient_display.create_image(
+                0, 0, image=self.gradient_photo, anchor="nw"
+            )
+        else:
+            self.gradient_display.itemconfigure(
+                self.gradient_image_item, image=self.gradient_photo
+            )
+
+    def draw_horizontal_gradient(self, blended_colors, color2, hex_colors=None):
         """
         Draws a horizontal gradient on the canvas using the provided color list.
 
-        This method iterates over the list of blended colors and draws them as
-        rectangles on the canvas. If the 'show_separations' option is enabled, it
-        draws separations between the colors.
+        This method keeps one rectangle item per color on the canvas and reuses them between
+        redraws: only rectangles whose coordinates or colors changed are updated, and items are
+        created or deleted only when the number of colors changes. If the 'show_separations'
+        option is enabled, it draws separations between the colors.
 
         Parameters:
-        blended_colors (list): A list of RGB tuples representing the colors to be displayed.
+        blended_colors (sequence): The RGB colors to be displayed, such as a Palette.
         color2 (tuple): The RGB tuple of the second color, used for error handling.
+        hex_colors (sequence): The colors already formatted as hex codes, if available.
         """
 
-        self.gradient_display.delete("all")
+        # Remove an earlier error message and the image used in smooth mode
+        if self.error_message_item is not None:
+            self.gradient_display.delete(self.error_message_item)
+            self.error_message_item = None
+        if self.gradient_image_item is not None:
+            self.gradient_display.delete(self.gradient_image_item)
+            self.gradient_image_item = None
+            self.gradient_photo = None
+            self.gradient_pixels = None
+
+        # Match the number of rectangle items to the number of colors
+        while len(self.gradient_items) > len(blended_colors):
+            self.gradient_display.delete(self.gradient_items.pop())
+            self.gradient_item_states.pop()
+        while len(self.gradient_items) < len(blended_colors):
+            self.gradient_items.append(self.gradient_display.create_rectangle(0, 0, 0, 0))
+            self.gradient_item_states.append(None)
 
         canvas_height = self.gradient_display.winfo_height()
         canvas_width = self.gradient_display.winfo_width()
         color_width = canvas_width / len(blended_colors)
+        show_separations = self.show_separations.get()
 
         for i in range(len(blended_colors)):
-            color_hex = "#{:02X}{:02X}{:02X}".format(
-                blended_colors[i][0], blended_colors[i][1], blended_colors[i][2]
-            )
-            if self.show_separations.get():
-                # Draw rectangles with default outline for separation
-                self.gradient_display.create_rectangle(
-                    i * color_width,
-                    0,
-                    (i + 1) * color_width,
-                    canvas_height,
-                    fill=color_hex,
-                )
+            if hex_colors is not None:
+                color_hex = hex_colors[i]
+            else:
+                color_hex = color_codec.format_hex(blended_colors[i])
+            if show_separations:
+                # Default outline for separation
+                coords = (i * color_width, 0, (i + 1) * color_width, canvas_height)
+                outline = "black"
             else:
                 # Extend each rectangle slightly to the right to overlap with the next one and remove outline
-                self.gradient_display.create_rectangle(
-                    i * color_width,
-                    0,
-                    (i + 1) * color_width + 1,
-                    canvas_height,
-                    fill=color_hex,
-                    outline=color_hex,
-                )
+                coords = (i * color_width, 0, (i + 1) * color_width + 1, canvas_height)
+                outline = color_hex
+
+            item = self.gradient_items[i]
+            previous_state = self.gradient_item_states[i]
+            if previous_state is None or previous_state[0] != coords:
+                self.gradient_display.coords(item, *coords)
+            if previous_state is None or previous_state[1:] != (color_hex, outline):
+                self.gradient_display.itemconfigure(item, fill=color_hex, outline=outline)
+            self.gradient_item_states[i] = (coords, color_hex, outline)
 
     def on_gradient_click(self, event):
         """
         Handles the click event on the gradient display.
 
         This method calculates which color was clicked on the gradient and opens
-        a popup window to show details about that color.
+        a popup window to show details about that color. For the styles other than
+        horizontal, the color is read from the rendered pixels.
 
         Parameters:
         event (Event): The event object containing information about the click event.
         """
+        if self.gradient_pixels is not None:
+            height, width = self.gradient_pixels.shape[:2]
+            clicked_color = self.gradient_pixels[
+                min(max(event.y, 0), height - 1), min(max(event.x, 0), width - 1)
+            ]
+            self.show_color_details_popup(color_codec.format_hex(clicked_color))
+            return
+
         color_index = int(
             event.x
             / (self.gradient_display.winfo_width() / len(self.last_valid_gradient))
@@ -391,9 +1217,7 @@ class ColorFusionApp:
         clicked_color = self.last_valid_gradient[
             min(color_index, len(self.last_valid_gradient) - 1)
         ]
-        color_hex = "#{:02X}{:02X}{:02X}".format(
-            clicked_color[0], clicked_color[1], clicked_color[2]
-        )
+        color_hex = color_codec.format_hex(clicked_color)
 
         # Show color details popup
         self.show_color_details_popup(color_hex)
@@ -403,17 +1227,20 @@ class ColorFusionApp:
         Displays a popup window with details of the selected color.
 
         This method creates a new window showing the hex, RGB, and HSL values of
-        the provided color. It also includes a button to copy the hex code to the clipboard.
+        the provided color, and the nearest CSS named color by OKLab distance. It also
+        includes a button to copy the hex code to the clipboard.
 
         Parameters:
         color_hex (str): The hex string of the color to display details for.
         """
+        import colorsys
+
         rgb = self.get_rgb_from_hex(color_hex)
         hsl = colorsys.rgb_to_hls(rgb[0] / 255, rgb[1] / 255, rgb[2] / 255)
 
         popup = tk.Toplevel(self.root)
         popup.title("Color Details")
-        popup.geometry("300x200")  # Adjust size as needed
+        popup.geometry("300x240")  # Adjust size as needed
 
         # Determine text color for legibility
         text_color = self.get_legible_text_color(rgb)
@@ -439,6 +1266,15 @@ class ColorFusionApp:
             fg=text_color,
         ).pack(pady=5)
 
+        name, _, distance = color_index.css_index().nearest(rgb)
+        tk.Label(
+            popup,
+            text=f"Nearest: {name} (\u0394E {distance * 100:.1f})",
+            font=("Arial", 12),
+            bg=color_hex,
+            fg=text_color,
+        ).pack(pady=5)
+
         rgb = self.get_rgb_from_hex(color_hex)
         button_bg_color = self.adjust_color_brightness(
             rgb, 1.5 if self.is_color_dark(rgb) else 0.8
@@ -469,7 +1305,7 @@ class ColorFusionApp:
             max(min_threshold, min(255, int(rgb[1] * factor))),
             max(min_threshold, min(255, int(rgb[2] * factor))),
         )
-        return "#{:02X}{:02X}{:02X}".format(*adjusted_rgb)
+        return color_codec.format_hex(adjusted_rgb)
 
     def is_color_dark(self, rgb):
         # Calculate brightness
@@ -494,75 +1330,291 @@ class ColorFusionApp:
         elif hex_code == self.color_two_entry.placeholder:
             return (255, 255, 255)  # Default white for color two
 
-        hex_code = hex_code.lstrip("#")
-
-        if len(hex_code) != 6:
-            raise ValueError("Hex color code must be 6 characters long")
-
-        try:
-            r = int(hex_code[0:2], 16)
-            g = int(hex_code[2:4], 16)
-            b = int(hex_code[4:6], 16)
-            return r, g, b
-        except ValueError:
-            raise ValueError("Invalid hex color code")
+        return color_codec.parse_hex(hex_code)
 
     def blend_colors(self, color1, color2, num_midpoints):
-        blended_colors = [color1]
-
-        if num_midpoints >= 1:
-            for i in range(1, num_midpoints + 1):
-                ratio = i / (num_midpoints + 1)
-                blended_color = (
-                    round(color1[0] + ratio * (color2[0] - color1[0])),
-                    round(color1[1] + ratio * (color2[1] - color1[1])),
-                    round(color1[2] + ratio * (color2[2] - color1[2])),
-                )
-                blended_colors.append(blended_color)
+        return gradient_engine.blend_colors(
+            color1, color2, num_midpoints, self.get_color_space()
+        )
 
-        blended_colors.append(color2)  # Include color2 in the list
-        return blended_colors
+    def get_color_space(self):
+        # Map the label shown in the color space menu back to its engine name
+        label = self.color_space.get()
+        for name, display_name in color_spaces.COLOR_SPACES.items():
+            if display_name == label:
+                return name
+        return "srgb"
+
+    def get_gradient_style(self):
+        # Map the label shown in the style menu back to its gradient_styles name
+        label = self.gradient_style.get()
+        for name, display_name in gradient_styles.STYLES.items():
+            if display_name == label:
+                return name
+        return "horizontal"
 
     def export_gradient_as_png(self):
         """
         Exports the current gradient as a PNG file.
 
         This method allows the user to save the currently displayed gradient as a PNG image.
-        The user is prompted to choose a file location and name for saving the image.
+        The user is prompted for the image size and then for a file location and name.
         The default filename is based on the hex codes of the two primary colors used in the gradient.
+        The image is streamed to disk band by band, so very large sizes do not need to fit in memory.
+        PPM and raw RGB output are also available through the file type selector.
+        The export mode menu selects 16 bits per channel or dithering to 8 bits, which keep
+        smooth gradients free of banding; both work from the unrounded gradient colors.
+        The gradient is exported in the style selected in the style menu.
 
         Exceptions:
         Catches and displays an error message if there is an issue during the file saving process.
         """
+        from tkinter import filedialog, messagebox
+
         try:
             color_one_hex = self.color_one_entry.get() or "#000000"
             color_two_hex = self.color_two_entry.get() or "#ffffff"
             default_filename = f"{color_one_hex}_fused_with_{color_two_hex}.png"
             default_dir = os.path.join(os.path.expanduser("~"), "Downloads")
 
+            if not self.ask_export_size():
+                return
+
             file_path = filedialog.asksaveasfilename(
                 initialdir=default_dir,
                 defaultextension=".png",
                 initialfile=default_filename,
-                filetypes=[("PNG files", "*.png")],
+                filetypes=[
+                    ("PNG files", "*.png"),
+                    ("PPM files", "*.ppm"),
+                    ("Raw RGB files", "*.raw"),
+                ],
             )
             if not file_path:
                 return
 
-            gradient_image = self.generate_gradient(
-                color_one_hex, color_two_hex, 2160, 2160
+            gradient = self.build_gradient(
+                self.get_rgb_from_hex(color_one_hex),
+                self.get_rgb_from_hex(color_two_hex),
+            )
+            bit_depth, dither = EXPORT_MODES[self.export_mode.get()]
+            gradient_export.export_styled(
+                file_path,
+                gradient,
+                self.get_num_midpoints(),
+                self.export_width,
+                self.export_height,
+                style=self.get_gradient_style(),
+                bit_depth=bit_depth,
+                dither=dither,
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to save file: {e}")
+
+    def export_palette(self):
+        """
+        Exports the blended colors of the current gradient as palette data.
+
+        The colors are sampled chunk by chunk as they are written, as CSS custom properties
+        with a linear-gradient(), JSON, an Adobe swatch file (ASE), a GIMP palette (GPL) or a
+        NumPy array, chosen through the file type selector.
+
+        Exceptions:
+        Catches and displays an error message if there is an issue during the file saving process.
+        """
+        from tkinter import filedialog, messagebox
+
+        try:
+            rgb_color1, rgb_color2 = self.get_end_colors()
+            color_one_hex = color_codec.format_hex(rgb_color1)
+            color_two_hex = color_codec.format_hex(rgb_color2)
+            file_path = filedialog.asksaveasfilename(
+                initialdir=os.path.join(os.path.expanduser("~"), "Downloads"),
+                defaultextension=".css",
+                initialfile=f"{color_one_hex}_fused_with_{color_two_hex}.css",
+                filetypes=[
+                    ("CSS custom properties", "*.css"),
+                    ("JSON files", "*.json"),
+                    ("Adobe swatch exchange", "*.ase"),
+                    ("GIMP palettes", "*.gpl"),
+                    ("NumPy arrays", "*.npy"),
+                ],
+            )
+            if not file_path:
+                return
+
+            gradient = self.build_gradient(rgb_color1, rgb_color2)
+            colors = gradient.samples(self.get_num_midpoints())
+            palette_formats.export_palette(
+                file_path, colors, name=f"{color_one_hex} fused with {color_two_hex}"
             )
-            gradient_image.save(file_path)
         except Exception as e:
             messagebox.showerror("Error", f"Failed to save file: {e}")
 
+    def get_end_colors(self):
+        # The RGB tuples of Color One and Color Two, with the display defaults for empty or
+        # placeholder entries
+        color_one_hex = self.color_one_entry.get()
+        color_two_hex = self.color_two_entry.get()
+        if color_one_hex in [self.color_one_entry.placeholder, ""]:
+            color_one_hex = "#000000"
+        if color_two_hex in [self.color_two_entry.placeholder, ""]:
+            color_two_hex = "#ffffff"
+        return self.get_rgb_from_hex(color_one_hex), self.get_rgb_from_hex(color_two_hex)
+
+    def add_keyframe(self):
+        """
+        Captures the current colors and number of intermediate colors as an animation
+        keyframe.
+        """
+        from tkinter import messagebox
+
+        try:
+            rgb_color1, rgb_color2 = self.get_end_colors()
+        except ValueError as e:
+            messagebox.showerror("Error", f"Invalid color: {e}")
+            return
+        self.keyframes.append((rgb_color1, rgb_color2, self.get_num_midpoints()))
+        self.keyframes_label.configure(text=f"{len(self.keyframes)} keyframes")
+
+    def clear_keyframes(self):
+        """
+        Removes all animation keyframes, going back to the default hue cycle.
+        """
+        self.keyframes = []
+        self.keyframes_label.configure(text="Hue cycle")
+
+    def build_animation(self, num_frames, width, height):
+        """
+        Builds the animation exported by 'export_animation'.
+
+        With two or more keyframes, the animation moves through them evenly and loops back to
+        the first one. Otherwise Color One sweeps once around the color wheel while Color Two
+        stays fixed. Extra stops, the color space and the style are taken from the inputs.
+
+        Returns:
+        Animation: The animation to export.
+        """
+        if len(self.keyframes) >= 2:
+            count = len(self.keyframes)
+            keyframes = [
+                (index / count, color1, color2, midpoints)
+                for index, (color1, color2, midpoints) in enumerate(
+                    self.keyframes + self.keyframes[:1]
+                )
+            ]
+        else:
+            rgb_color1, rgb_color2 = self.get_end_colors()
+            keyframes = gradient_animation.hue_cycle(
+                rgb_color1, rgb_color2, self.get_num_midpoints()
+            )
+
+        return gradient_animation.Animation(
+            keyframes,
+            num_frames,
+            width,
+            height,
+            color_space=self.get_color_space(),
+            style=self.get_gradient_style(),
+            middle_stops=self.middle_stops.stops,
+        )
+
+    def export_animation(self):
+        """
+        Exports the keyframe animation as a GIF, an animated PNG or a PNG frame sequence.
+
+        The user is prompted for the number of frames, the frame size and the output file.
+        Frames are rendered in parallel and streamed to the file.
+
+        Exceptions:
+        Catches and displays an error message if there is an issue during the export.
+        """
+        from tkinter import filedialog, messagebox, simpledialog
+
+        try:
+            num_frames = simpledialog.askinteger(
+                "Export Animation",
+                "Number of frames:",
+                initialvalue=ANIMATION_FRAMES,
+                minvalue=1,
+                maxvalue=100000,
+                parent=self.root,
+            )
+            if num_frames is None or not self.ask_export_size():
+                return
+
+            file_types = [
+                ("GIF animation", "*.gif"),
+                ("Animated PNG", "*.png"),
+                ("PNG frame sequence", "*.png"),
+            ]
+            file_type = tk.StringVar(value=file_types[0][0])
+            file_path = filedialog.asksaveasfilename(
+                initialdir=os.path.join(os.path.expanduser("~"), "Downloads"),
+                defaultextension=".gif",
+                initialfile="color_fusion_animation.gif",
+                filetypes=file_types,
+                typevariable=file_type,
+            )
+            if not file_path:
+                return
+
+            if file_type.get() == "PNG frame sequence":
+                file_format = "frames"
+            else:
+                file_format = None
+            gradient_animation.export_animation(
+                file_path,
+                self.build_animation(num_frames, self.export_width, self.export_height),
+                file_format,
+            )
+        except Exception as e:
+            messagebox.showerror("Error", f"Failed to export animation: {e}")
+
+    def ask_export_size(self):
+        """
+        Prompts the user for the width and height of the exported image.
+
+        The chosen size is remembered and offered as the default for the next export.
+
+        Returns:
+        bool: True if the user entered both values, False if either prompt was cancelled.
+        """
+        from tkinter import simpledialog
+
+        width = simpledialog.askinteger(
+            "Export Size",
+            "Image width in pixels:",
+            initialvalue=self.export_width,
+            minvalue=1,
+            maxvalue=100000,
+            parent=self.root,
+        )
+        if width is None:
+            return False
+
+        height = simpledialog.askinteger(
+            "Export Size",
+            "Image height in pixels:",
+            initialvalue=self.export_height,
+            minvalue=1,
+            maxvalue=100000,
+            parent=self.root,
+        )
+        if height is None:
+            return False
+
+        self.export_width = width
+        self.export_height = height
+        return True
+
     def generate_gradient(self, color_one_hex, color_two_hex, width, height):
         """
         Generates a gradient image based on two color hex codes.
 
-        This method creates a new image with the specified width and height, and draws a gradient
-        between the two provided hex color codes. The gradient is created by blending the colors
-        and drawing rectangles of these colors side by side on the image.
+        The rendering itself is done by the headless 'gradient_engine' module; this method only
+        supplies the extra stops, the number of intermediate colors selected and
+        the chosen color space.
 
         Parameters:
         color_one_hex (str): The hex code of the first color.
@@ -573,23 +1625,13 @@ class ColorFusionApp:
         Returns:
         Image: The generated image with the gradient.
         """
-        gradient_image = Image.new("RGB", (width, height), "#FFFFFF")
-        draw = ImageDraw.Draw(gradient_image)
-
-        blended_colors = self.blend_colors(
+        gradient = self.build_gradient(
             self.get_rgb_from_hex(color_one_hex),
             self.get_rgb_from_hex(color_two_hex),
-            self.intermediate_colors_scale.get(),
         )
-        color_width = width / len(blended_colors)
-
-        for i, color in enumerate(blended_colors):
-            color_hex = "#{:02X}{:02X}{:02X}".format(color[0], color[1], color[2])
-            draw.rectangle(
-                [i * color_width, 0, (i + 1) * color_width, height], fill=color_hex
-            )
-
-        return gradient_image
+        return gradient_cache.default_cache.render(
+            gradient, self.get_num_midpoints(), width, height
+        )
 
 
 class PlaceholderEntry(tk.Entry):
@@ -628,6 +1670,9 @@ class PlaceholderEntry(tk.Entry):
 
 
 if __name__ == "__main__":
-    root = ThemedTk(theme="alt")
-    app = ColorFusionApp(root)
+    startup = instrumentation.StartupTimer(LOAD_START)
+    startup.mark("imports")
+    root = tk.Tk()
+    startup.mark("tk")
+    app = ColorFusionApp(root, startup)
     root.mainloop()
@@ -0,0 +1,221 @@
+"""
+Nearest-color lookup against named palettes.
+
+ColorIndex finds the closest entry of a reference palette, such as the CSS named colors or a
+brand library with tens of thousands of entries, by Euclidean distance in OKLab. The entries
+are bucketed into a uniform grid of cubic cells, sized so each cell holds about
+CELL_OCCUPANCY entries; a color repeated in the palette is bucketed once. A query only compares against the entries in the 3 x 3 x 3 block of
+cells around it, which is exact whenever the best match found there is no farther than one
+cell width; the few queries left unresolved widen the block once and are otherwise compared
+against every entry. Queries are processed together as NumPy arrays, in chunks of
+QUERY_CHUNK so memory stays bounded.
+"""
+
+import functools
+
+import color_codec
+import color_spaces
+
+# Average number of entries per grid cell
+CELL_OCCUPANCY = 2
+
+# Upper bound on the number of grid cells, whatever the palette size
+MAX_CELLS = 1 << 22
+
+# Number of query colors processed at a time
+QUERY_CHUNK = 8192
+
+
+class ColorIndex:
+    """
+    A spatial index over a palette of named colors, queried by perceptual distance.
+    """
+
+    def __init__(self, names, colors):
+        """
+        Parameters:
+        names (sequence): The name of each entry.
+        colors (array-like): The RGB color of each entry, shaped (N, 3).
+
+        Raises:
+        ValueError: If the palette is empty or names and colors differ in length.
+        """
+        import numpy as np
+
+        colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        if len(colors) == 0:
+            raise ValueError("Palette has no colors")
+        if len(names) != len(colors):
+            raise ValueError("Every color needs exactly one name")
+
+        self.names = list(names)
+        self.colors = colors
+
+        # Only distinct colors are indexed, each standing for its first entry: repeated
+        # colors add no candidates, and counting them would shrink the cells below
+        unique_colors, first_entries = np.unique(colors, axis=0, return_index=True)
+        self.points = color_spaces.to_space(unique_colors, "oklab")
+
+        # Size the cells from the volume of the bounding box of the entries, then refine the
+        # size from the cells actually occupied, since palettes rarely fill their box
+        self.origin = self.points.min(axis=0)
+        extent = np.maximum(self.points.max(axis=0) - self.origin, 1e-6)
+        min_cell_size = float(np.cbrt(extent.prod() / MAX_CELLS))
+        self.cell_size = float(np.cbrt(extent.prod() * CELL_OCCUPANCY / len(self.points)))
+        for _ in range(2):
+            self.cell_size = max(self.cell_size, min_cell_size)
+            self.shape = (np.floor(extent / self.cell_size).astype(np.int64) + 1).tolist()
+            cells = self._cell_ids(self._cell_coords(self.points))
+            occupancy = len(cells) / len(np.unique(cells))
+            self.cell_size *= float(np.cbrt(CELL_OCCUPANCY / occupancy))
+        self.cell_size = max(self.cell_size, min_cell_size)
+        self.shape = (np.floor(extent / self.cell_size).astype(np.int64) + 1).tolist()
+
+        # Points sorted by cell, with the start of each cell's run in 'cell_starts', and
+        # the entry each sorted point stands for in 'order'
+        cells = self._cell_ids(self._cell_coords(self.points))
+        by_cell = np.argsort(cells, kind="stable")
+        total_cells = self.shape[0] * self.shape[1] * self.shape[2]
+        self.cell_starts = np.searchsorted(cells[by_cell], np.arange(total_cells + 1))
+        self.sorted_points = self.points[by_cell]
+        self.order = first_entries[by_cell]
+
+    @classmethod
+    def from_mapping(cls, palette):
+        """
+        Creates an index from a mapping of names to RGB tuples or color codes.
+        """
+        names = list(palette)
+        colors = [
+            color_codec.parse_hex(color) if isinstance(color, str) else color
+            for color in palette.values()
+        ]
+        return cls(names, colors)
+
+    def __len__(self):
+        return len(self.names)
+
+    def _cell_coords(self, points):
+        import numpy as np
+
+        return np.floor((points - self.origin) / self.cell_size).astype(np.int64)
+
+    def _cell_ids(self, coords):
+        return (coords[:, 0] * self.shape[1] + coords[:, 1]) * self.shape[2] + coords[:, 2]
+
+    def _search_block(self, points, radius):
+        # Nearest entry among the cells within 'radius' cells of each point, as sorted
+        # indices and distances; points with no entry in the block get -1 and infinity
+        import numpy as np
+
+        span = np.arange(-radius, radius + 1)
+        offsets = np.stack(np.meshgrid(span, span, span, indexing="ij"), -1).reshape(-1, 3)
+
+        coords = self._cell_coords(points)[:, None, :] + offsets[None, :, :]
+        inside = ((coords >= 0) & (coords < np.array(self.shape))).all(axis=2).ravel()
+        cells = self._cell_ids(coords.reshape(-1, 3))[inside]
+
+        # Flatten every (point, candidate entry) pair, grouped by point
+        starts = self.cell_starts[cells]
+        counts = self.cell_starts[cells + 1] - starts
+        point_counts = np.zeros(len(points) * len(offsets), dtype=np.int64)
+        point_counts[inside] = counts
+        point_counts = point_counts.reshape(len(points), -1).sum(axis=1)
+        query_of_pair = np.repeat(np.arange(len(points)), point_counts)
+        run_offsets = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts)
+        candidates = np.repeat(starts, counts) + run_offsets
+
+        best = np.full(len(points), -1, dtype=np.int64)
+        distances = np.full(len(points), np.inf)
+        if len(candidates) == 0:
+            return best, distances
+
+        pair_distances = np.linalg.norm(
+            self.sorted_points[candidates] - points[query_of_pair], axis=1
+        )
+        # Pairs are grouped by point: take the minimum of every group, then the first pair
+        # of each group that reaches it
+        found = np.flatnonzero(point_counts)
+        group_starts = np.cumsum(point_counts) - point_counts
+        minimums = np.minimum.reduceat(pair_distances, group_starts[found])
+        hits = np.flatnonzero(pair_distances == np.repeat(minimums, point_counts[found]))
+        first = np.ones(len(hits), dtype=bool)
+        first[1:] = query_of_pair[hits][1:] != query_of_pair[hits][:-1]
+        winners = hits[first]
+        best[query_of_pair[winners]] = candidates[winners]
+        distances[query_of_pair[winners]] = pair_distances[winners]
+        return best, distances
+
+    def _search_all(self, points):
+        # Compare against every entry, a few points at a time. Squared distances are
+        # expanded as |p|^2 - 2 p.q + |q|^2 so the bulk of the work is one matrix product.
+        import numpy as np
+
+        entries = self.sorted_points
+        entry_norms = (entries**2).sum(axis=1)
+        rows = max(1, (1 << 22) // len(entries))
+        best = np.empty(len(points), dtype=np.int64)
+        for start in range(0, len(points), rows):
+            block = entry_norms[None, :] - 2 * (points[start:start + rows] @ entries.T)
+            best[start:start + rows] = block.argmin(axis=1)
+        return best, np.linalg.norm(entries[best] - points, axis=1)
+
+    def query(self, colors):
+        """
+        Finds the nearest entry for many colors at once.
+
+        Parameters:
+        colors (array-like): RGB colors shaped (M, 3), such as a Palette.
+
+        Returns:
+        tuple: The index of the nearest entry for each color, as an int64 array shaped (M,),
+        and the OKLab distance to it, as a float64 array shaped (M,).
+        """
+        import numpy as np
+
+        points = color_spaces.to_space(
+            np.asarray(colors, dtype=np.uint8).reshape(-1, 3), "oklab"
+        )
+        best = np.empty(len(points), dtype=np.int64)
+        distances = np.empty(len(points))
+
+        for start in range(0, len(points), QUERY_CHUNK):
+            chunk = points[start:start + QUERY_CHUNK]
+            chunk_best, chunk_distances = self._search_block(chunk, 1)
+
+            # A block reaching r cells out holds every entry within r cell widths, so a
+            # match any farther away may not be the nearest
+            unresolved = np.flatnonzero(chunk_distances > self.cell_size)
+            if len(unresolved):
+                found = self._search_block(chunk[unresolved], 2)
+                chunk_best[unresolved], chunk_distances[unresolved] = found
+                unresolved = unresolved[found[1] > 2 * self.cell_size]
+            if len(unresolved):
+                found = self._search_all(chunk[unresolved])
+                chunk_best[unresolved], chunk_distances[unresolved] = found
+
+            best[start:start + QUERY_CHUNK] = self.order[chunk_best]
+            distances[start:start + QUERY_CHUNK] = chunk_distances
+        return best, distances
+
+    def nearest(self, color):
+        """
+        Finds the nearest entry for a single color.
+
+        Parameters:
+        color (tuple): The RGB tuple to match.
+
+        Returns:
+        tuple: The name and RGB tuple of the nearest entry, and its OKLab distance.
+        """
+        best, distances = self.query([color])
+        index = int(best[0])
+        return self.names[index], tuple(self.colors[index].tolist()), float(distances[0])
+
+
+@functools.lru_cache(maxsize=None)
+def css_index():
+    """
+    Returns the shared index of the CSS named colors, built on first use.
+    """
+    return ColorIndex.from_mapping(color_codec.CSS_COLORS)
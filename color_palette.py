@@ -0,0 +1,129 @@
+"""
+Compact storage for large palettes.
+
+A list of RGB tuples costs around 100 bytes per color once the tuple, its three integers and
+the list slot are counted. Palette keeps the colors in a single NumPy uint8 buffer instead,
+three bytes per color, while still behaving like a read-only sequence of RGB tuples: it can
+be indexed, sliced, iterated and measured with len(). Slices share the buffer rather than
+copying it, and the buffer is exported without copies through the buffer protocol
+('memoryview(palette.data)') and to NumPy ('numpy.asarray(palette)').
+"""
+
+import color_codec
+
+# Number of colors converted to tuples at a time while iterating
+ITER_CHUNK = 4096
+
+
+class Palette:
+    """
+    A read-only sequence of RGB colors stored in one uint8 buffer shaped (N, 3).
+    """
+
+    __slots__ = ("_colors",)
+
+    def __init__(self, colors=()):
+        """
+        Parameters:
+        colors (array-like): RGB colors, as a sequence of tuples, an array shaped (N, 3) or
+        another Palette. uint8 arrays are used without copying.
+        """
+        import numpy as np
+
+        if isinstance(colors, Palette):
+            colors = colors._colors
+        colors = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        if colors.flags.writeable:
+            # Keep the caller's array writable; only this palette's view is read-only
+            colors = colors.view()
+            colors.setflags(write=False)
+        self._colors = colors
+
+    @classmethod
+    def from_packed(cls, packed):
+        """
+        Creates a palette from colors packed as 0xRRGGBB integers, such as an array('I').
+        """
+        return cls(color_codec.unpack_array(packed))
+
+    @classmethod
+    def from_hex(cls, codes):
+        """
+        Creates a palette from color codes, as accepted by color_codec.parse_hex.
+        """
+        return cls(color_codec.parse_hex_array(codes))
+
+    def __len__(self):
+        return len(self._colors)
+
+    def __getitem__(self, index):
+        if isinstance(index, slice):
+            return Palette(self._colors[index])
+        return tuple(self._colors[index].tolist())
+
+    def __iter__(self):
+        for start in range(0, len(self._colors), ITER_CHUNK):
+            for red, green, blue in self._colors[start:start + ITER_CHUNK].tolist():
+                yield red, green, blue
+
+    def __eq__(self, other):
+        if not isinstance(other, Palette):
+            return NotImplemented
+        return self._colors.shape == other._colors.shape and bool(
+            (self._colors == other._colors).all()
+        )
+
+    __hash__ = None
+
+    def __repr__(self):
+        return f"Palette({len(self)} colors)"
+
+    def __array__(self, dtype=None, copy=None):
+        if copy:
+            return self._colors.astype(dtype or self._colors.dtype)
+        if dtype is None:
+            return self._colors
+        return self._colors.astype(dtype, copy=False)
+
+    def __buffer__(self, flags):
+        # Buffer protocol for Python 3.12 and later; use 'data' on older versions
+        return memoryview(self._colors)
+
+    @property
+    def array(self):
+        """
+        ndarray: The read-only uint8 buffer shaped (N, 3).
+        """
+        return self._colors
+
+    @property
+    def data(self):
+        """
+        memoryview: The buffer of the palette, shaped (N, 3), without a copy.
+        """
+        return memoryview(self._colors)
+
+    @property
+    def nbytes(self):
+        """
+        int: The size of the color data in bytes.
+        """
+        return self._colors.nbytes
+
+    def to_list(self):
+        """
+        Returns the colors as a list of RGB tuples.
+        """
+        return [tuple(color) for color in self._colors.tolist()]
+
+    def to_hex(self):
+        """
+        Returns the colors formatted as hex codes, such as '#A1B2C3'.
+        """
+        return color_codec.format_hex_array(self._colors)
+
+    def to_packed(self):
+        """
+        Returns the colors packed as 0xRRGGBB integers in a uint32 array.
+        """
+        return color_codec.pack_array(self._colors)
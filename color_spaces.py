@@ -0,0 +1,431 @@
+"""
+Color space conversions used for gradient interpolation.
+
+All conversions are vectorized over NumPy arrays of colors shaped (..., 3). Decoding 8-bit
+sRGB to linear light goes through a 256-entry lookup table. Encoding back to 8-bit sRGB looks
+up a coarse code in a bucket table and corrects it with one comparison against the rounding
+threshold above it, so neither direction evaluates the sRGB transfer curve per color.
+'from_space_values' skips the rounding altogether for output with more than 8 bits.
+"""
+
+import functools
+
+# Number of equal buckets the linear range 0-1 is split into when encoding to sRGB. Each
+# bucket is narrower than the smallest gap between two sRGB rounding thresholds (about
+# 1/3300), so a bucket contains at most one threshold.
+ENCODE_BUCKETS = 4096
+
+# Interpolation spaces offered for blending, with their display names
+COLOR_SPACES = {
+    "srgb": "sRGB",
+    "linear": "Linear RGB",
+    "oklab": "OKLab",
+    "hsl": "HSL",
+    "lch": "LCh",
+}
+
+# Index of the hue channel for the cylindrical spaces, stored as a fraction of a turn
+HUE_CHANNELS = {
+    "hsl": 0,
+    "lch": 2,
+}
+
+# Chroma (or HSL saturation) at or below which a color counts as gray and has no hue. The
+# OKLab round trip leaves sRGB grays with a chroma of up to about 4e-8, while the least
+# saturated non-gray 8-bit color has a chroma of about 1e-3.
+GRAY_CHROMA = 1e-4
+
+
+def _decode_srgb(values):
+    import numpy as np
+
+    return np.where(
+        values <= 0.04045, values / 12.92, ((values + 0.055) / 1.055) ** 2.4
+    )
+
+
+def _encode_srgb(values):
+    import numpy as np
+
+    return np.where(
+        values <= 0.0031308, values * 12.92, 1.055 * np.abs(values) ** (1 / 2.4) - 0.055
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def srgb_tables():
+    """
+    Builds the lookup tables for converting between 8-bit sRGB and linear light.
+
+    Returns:
+    tuple: A 256-entry float64 array mapping each sRGB code to linear light, a 256-entry
+    array of the linear values halfway (in sRGB) between each code and the next, ending
+    with infinity, and an ENCODE_BUCKETS-entry array of the code at the start of each bucket.
+    """
+    import numpy as np
+
+    to_linear = _decode_srgb(np.arange(256, dtype=np.float64) / 255)
+    thresholds = np.append(
+        _decode_srgb((np.arange(255, dtype=np.float64) + 0.5) / 255), np.inf
+    )
+    bucket_codes = np.searchsorted(
+        thresholds, np.arange(ENCODE_BUCKETS) / ENCODE_BUCKETS
+    ).astype(np.uint8)
+    return to_linear, thresholds, bucket_codes
+
+
+def srgb_to_linear(colors):
+    """
+    Converts 8-bit sRGB colors to linear light in the range 0-1.
+
+    Parameters:
+    colors (array-like): Integer sRGB values in the range 0-255.
+
+    Returns:
+    ndarray: A float64 array of the same shape.
+    """
+    import numpy as np
+
+    to_linear, _, _ = srgb_tables()
+    return to_linear[np.asarray(colors, dtype=np.uint8)]
+
+
+def linear_to_srgb(linear):
+    """
+    Converts linear light to the nearest 8-bit sRGB codes, clipping out-of-gamut values.
+
+    Parameters:
+    linear (ndarray): Linear light values, nominally in the range 0-1.
+
+    Returns:
+    ndarray: A uint8 array of the same shape.
+    """
+    import numpy as np
+
+    _, thresholds, bucket_codes = srgb_tables()
+    linear = np.clip(linear, 0.0, 1.0)
+    bucket = np.minimum(
+        (linear * ENCODE_BUCKETS).astype(np.intp), ENCODE_BUCKETS - 1
+    )
+    codes = bucket_codes[bucket]
+    codes += linear > thresholds[codes]
+    return codes
+
+
+def linear_to_oklab(linear):
+    """
+    Converts linear RGB to OKLab.
+
+    Parameters:
+    linear (ndarray): Linear RGB values shaped (..., 3).
+
+    Returns:
+    ndarray: OKLab values (L, a, b) with the same shape.
+    """
+    import numpy as np
+
+    lms = linear @ np.array(
+        [
+            [0.4122214708, 0.2119034982, 0.0883024619],
+            [0.5363325363, 0.6806995451, 0.2817188376],
+            [0.0514459929, 0.1073969566, 0.6299787005],
+        ]
+    )
+    return np.cbrt(lms) @ np.array(
+        [
+            [0.2104542553, 1.9779984951, 0.0259040371],
+            [0.7936177850, -2.4285922050, 0.7827717662],
+            [-0.0040720468, 0.4505937099, -0.8086757660],
+        ]
+    )
+
+
+def oklab_to_linear(oklab):
+    """
+    Converts OKLab to linear RGB.
+
+    Parameters:
+    oklab (ndarray): OKLab values shaped (..., 3).
+
+    Returns:
+    ndarray: Linear RGB values with the same shape, not clipped to the sRGB gamut.
+    """
+    import numpy as np
+
+    lms = (
+        oklab
+        @ np.array(
+            [
+                [1.0, 1.0, 1.0],
+                [0.3963377774, -0.1055613458, -0.0894841775],
+                [0.2158037573, -0.0638541728, -1.2914855480],
+            ]
+        )
+    ) ** 3
+    return lms @ np.array(
+        [
+            [4.0767416621, -1.2684380046, -0.0041960863],
+            [-3.3077115913, 2.6097574011, -0.7034186147],
+            [0.2309699292, -0.3413193965, 1.7076147010],
+        ]
+    )
+
+
+def oklab_to_lch(oklab):
+    """
+    Converts OKLab to its polar form LCh, with hue as a fraction of a turn.
+
+    Parameters:
+    oklab (ndarray): OKLab values shaped (..., 3).
+
+    Returns:
+    ndarray: LCh values (L, C, h) with the same shape.
+    """
+    import numpy as np
+
+    lch = np.empty_like(oklab)
+    lch[..., 0] = oklab[..., 0]
+    lch[..., 1] = np.hypot(oklab[..., 1], oklab[..., 2])
+    lch[..., 2] = np.arctan2(oklab[..., 2], oklab[..., 1]) / (2 * np.pi) % 1.0
+    return lch
+
+
+def lch_to_oklab(lch):
+    """
+    Converts LCh back to OKLab.
+
+    Parameters:
+    lch (ndarray): LCh values shaped (..., 3), with hue as a fraction of a turn.
+
+    Returns:
+    ndarray: OKLab values with the same shape.
+    """
+    import numpy as np
+
+    angle = lch[..., 2] * (2 * np.pi)
+    oklab = np.empty_like(lch)
+    oklab[..., 0] = lch[..., 0]
+    oklab[..., 1] = lch[..., 1] * np.cos(angle)
+    oklab[..., 2] = lch[..., 1] * np.sin(angle)
+    return oklab
+
+
+def srgb_to_hsl(colors):
+    """
+    Converts 8-bit sRGB colors to HSL, with every channel in the range 0-1.
+
+    Parameters:
+    colors (array-like): Integer sRGB values shaped (..., 3).
+
+    Returns:
+    ndarray: HSL values (h, s, l) with the same shape.
+    """
+    import numpy as np
+
+    rgb = np.asarray(colors, dtype=np.float64) / 255
+    r, g, b = rgb[..., 0], rgb[..., 1], rgb[..., 2]
+    max_c = rgb.max(axis=-1)
+    min_c = rgb.min(axis=-1)
+    delta = max_c - min_c
+    lightness = (max_c + min_c) / 2
+
+    chromatic = delta > 0
+    safe_delta = np.where(chromatic, delta, 1.0)
+    saturation = np.where(
+        chromatic, delta / np.maximum(1 - np.abs(2 * lightness - 1), 1e-12), 0.0
+    )
+
+    hue = np.where(
+        max_c == r,
+        ((g - b) / safe_delta) % 6,
+        np.where(max_c == g, (b - r) / safe_delta + 2, (r - g) / safe_delta + 4),
+    )
+    hue = np.where(chromatic, hue / 6, 0.0)
+
+    return np.stack([hue, saturation, lightness], axis=-1)
+
+
+def hsl_to_srgb(hsl):
+    """
+    Converts HSL to 8-bit sRGB colors.
+
+    Parameters:
+    hsl (ndarray): HSL values shaped (..., 3), with every channel in the range 0-1.
+
+    Returns:
+    ndarray: A uint8 array with the same shape.
+    """
+    import numpy as np
+
+    return np.rint(_hsl_to_unit_rgb(hsl) * 255).astype(np.uint8)
+
+
+def _hsl_to_unit_rgb(hsl):
+    # sRGB in the range 0-1, unrounded
+    import numpy as np
+
+    hue = hsl[..., 0:1] * 12
+    saturation = hsl[..., 1:2]
+    lightness = hsl[..., 2:3]
+    amount = saturation * np.minimum(lightness, 1 - lightness)
+
+    k = (np.array([0.0, 8.0, 4.0]) + hue) % 12
+    rgb = lightness - amount * np.clip(np.minimum(k - 3, 9 - k), -1, 1)
+    return np.clip(rgb, 0, 1)
+
+
+def to_space(colors, color_space):
+    """
+    Converts 8-bit sRGB colors into the given interpolation space.
+
+    Parameters:
+    colors (ndarray): Integer sRGB values shaped (..., 3).
+    color_space (str): One of the keys of COLOR_SPACES other than 'srgb'.
+
+    Returns:
+    ndarray: A float64 array of the same shape.
+
+    Raises:
+    ValueError: If the color space is not recognised.
+    """
+    if color_space == "hsl":
+        return srgb_to_hsl(colors)
+
+    linear = srgb_to_linear(colors)
+    if color_space == "linear":
+        return linear
+    if color_space == "oklab":
+        return linear_to_oklab(linear)
+    if color_space == "lch":
+        return oklab_to_lch(linear_to_oklab(linear))
+    raise ValueError(f"Unknown color space: {color_space}")
+
+
+def from_space(values, color_space):
+    """
+    Converts values in the given interpolation space back to 8-bit sRGB.
+
+    Parameters:
+    values (ndarray): Float values shaped (..., 3).
+    color_space (str): One of the keys of COLOR_SPACES other than 'srgb'.
+
+    Returns:
+    ndarray: A uint8 array of the same shape.
+
+    Raises:
+    ValueError: If the color space is not recognised.
+    """
+    if color_space == "hsl":
+        return hsl_to_srgb(values)
+    if color_space == "linear":
+        return linear_to_srgb(values)
+    if color_space == "oklab":
+        return linear_to_srgb(oklab_to_linear(values))
+    if color_space == "lch":
+        return linear_to_srgb(oklab_to_linear(lch_to_oklab(values)))
+    raise ValueError(f"Unknown color space: {color_space}")
+
+
+def from_space_values(values, color_space):
+    """
+    Converts values in the given interpolation space to unrounded sRGB.
+
+    This is the high-precision counterpart of 'from_space', for 16-bit and dithered output.
+    The sRGB transfer curve is evaluated directly instead of through the 8-bit tables.
+
+    Parameters:
+    values (ndarray): Float values shaped (..., 3).
+    color_space (str): One of the keys of COLOR_SPACES.
+
+    Returns:
+    ndarray: A float64 array of the same shape, clipped to the range 0-255.
+
+    Raises:
+    ValueError: If the color space is not recognised.
+    """
+    import numpy as np
+
+    if color_space == "srgb":
+        return np.clip(values, 0, 255)
+    if color_space == "hsl":
+        return _hsl_to_unit_rgb(values) * 255
+
+    if color_space == "linear":
+        linear = values
+    elif color_space == "oklab":
+        linear = oklab_to_linear(values)
+    elif color_space == "lch":
+        linear = oklab_to_linear(lch_to_oklab(values))
+    else:
+        raise ValueError(f"Unknown color space: {color_space}")
+    return _encode_srgb(np.clip(linear, 0.0, 1.0)) * 255
+
+
+def align_hues(start, end, color_space):
+    """
+    Prepares pairs of colors in a cylindrical space so they interpolate along the short arc.
+
+    The end hue is unwrapped to lie within half a turn of the start hue. When one end of a
+    pair has no chroma, its hue is taken from the other end so the blend does not swing
+    through other hues. Spaces without a hue channel are returned unchanged.
+
+    Parameters:
+    start (ndarray): The start colors shaped (N, 3).
+    end (ndarray): The end colors shaped (N, 3).
+    color_space (str): The space the colors are expressed in.
+
+    Returns:
+    tuple: The adjusted (start, end) arrays.
+    """
+    hue_channel = HUE_CHANNELS.get(color_space)
+    if hue_channel is None:
+        return start, end
+
+    start = start.copy()
+    end = end.copy()
+    chroma_channel = 1
+    start_gray = start[:, chroma_channel] <= GRAY_CHROMA
+    end_gray = end[:, chroma_channel] <= GRAY_CHROMA
+    start[start_gray, hue_channel] = end[start_gray, hue_channel]
+    end[end_gray, hue_channel] = start[end_gray, hue_channel]
+
+    hue_delta = (end[:, hue_channel] - start[:, hue_channel] + 0.5) % 1.0 - 0.5
+    end[:, hue_channel] = start[:, hue_channel] + hue_delta
+    return start, end
+
+
+def wrap_hues(values, color_space):
+    """
+    Wraps the hue channel of interpolated values back into the range 0-1, in place.
+
+    Parameters:
+    values (ndarray): Values shaped (..., 3) in the given space.
+    color_space (str): The space the values are expressed in.
+
+    Returns:
+    ndarray: The same array.
+    """
+    hue_channel = HUE_CHANNELS.get(color_space)
+    if hue_channel is not None:
+        values[..., hue_channel] %= 1.0
+    return values
+
+
+def interpolate(start, end, ratios, color_space):
+    """
+    Interpolates between pairs of colors that are already in the given space.
+
+    Hue channels take the shorter way around the color wheel, as described in 'align_hues'.
+
+    Parameters:
+    start (ndarray): The start colors shaped (N, 3).
+    end (ndarray): The end colors shaped (N, 3).
+    ratios (ndarray): The interpolation positions shaped (steps,), from 0 to 1.
+    color_space (str): The space the colors are expressed in.
+
+    Returns:
+    ndarray: The interpolated values shaped (N, steps, 3).
+    """
+    start, end = align_hues(start, end, color_space)
+    blended = start[:, None, :] + ratios[None, :, None] * (end - start)[:, None, :]
+    return wrap_hues(blended, color_space)
@@ -0,0 +1,539 @@
+"""
+Animated gradient export for Color Fusion.
+
+An animation is defined by keyframes over the inputs of a still gradient: the two end
+colors and the number of intermediate colors, each at a time from 0 to 1. Frames in between
+interpolate the colors in the animation's color space and round the number of colors, and
+any extra stops stay fixed. 'hue_cycle' builds the keyframes of the first color sweeping
+once around the color wheel while the second color stays put.
+
+Frames are rendered in a process pool and handed to the encoder in order as they finish,
+with only a few frames in flight at a time, so memory does not grow with the length of the
+animation. Three outputs are supported:
+
+- 'gif': every frame uses one global palette, chosen up front from the colors of all
+  frames; the workers map pixels to it and compress each frame with PIL's LZW encoder.
+- 'apng': an animated PNG, compressed by the workers with gradient_export's PNG encoder.
+- 'frames': a numbered sequence of PNG files, for video tools, written by the workers.
+"""
+
+import bisect
+import collections
+import io
+import os
+import struct
+
+import gradient_engine
+import gradient_export
+import gradient_stops
+import gradient_styles
+import palette_extract
+
+DEFAULT_FPS = 25
+
+# GIF frame delays are whole hundredths of a second, so no faster rate can be shown, and
+# APNG stores the rate in a 16-bit field
+MAX_FPS = 100
+
+ANIMATION_FORMATS = ("gif", "apng", "frames")
+
+FORMATS_BY_EXTENSION = {
+    ".gif": "gif",
+    ".png": "apng",
+    ".apng": "apng",
+}
+
+# Bits per channel of the table mapping colors to a quantized GIF palette
+GIF_LOOKUP_BITS = 6
+
+# Frames submitted to the pool ahead of the one being written, per worker
+FRAMES_IN_FLIGHT = 2
+
+# Frames with more colors than this are subsampled evenly when choosing the GIF palette
+GIF_PALETTE_SAMPLES = 4096
+
+
+def hue_cycle(color1, color2, num_midpoints, steps=12):
+    """
+    Builds keyframes that rotate the hue of the first color through a full turn.
+
+    Parameters:
+    color1 (tuple): The RGB tuple of the first color, whose hue is rotated.
+    color2 (tuple): The RGB tuple of the second color, which stays fixed.
+    num_midpoints (int): The number of intermediate colors in every frame.
+    steps (int): The number of keyframes per turn. Frames between keyframes interpolate in
+    the animation's color space, so more keyframes follow the color wheel more closely.
+
+    Returns:
+    list: (time, color1, color2, num_midpoints) keyframes, ending where they started.
+    """
+    # Imported here so that loading this module stays cheap for the GUI
+    import colorsys
+
+    hue, lightness, saturation = colorsys.rgb_to_hls(*(channel / 255 for channel in color1))
+    keyframes = []
+    for step in range(steps + 1):
+        rgb = colorsys.hls_to_rgb((hue + step / steps) % 1.0, lightness, saturation)
+        rotated = tuple(round(channel * 255) for channel in rgb)
+        keyframes.append((step / steps, rotated, tuple(color2), num_midpoints))
+    return keyframes
+
+
+class Animation:
+    """
+    A gradient animation: keyframes, frame count and size, style and color space.
+    """
+
+    def __init__(
+        self,
+        keyframes,
+        num_frames,
+        width,
+        height,
+        color_space="srgb",
+        style="horizontal",
+        middle_stops=(),
+        fps=DEFAULT_FPS,
+        loop=True,
+    ):
+        """
+        Parameters:
+        keyframes (iterable): (time, color1, color2, num_midpoints) tuples, with times from
+        0 to 1, in any order.
+        num_frames (int): The number of frames.
+        width (int): The width of every frame.
+        height (int): The height of every frame.
+        color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+        It is used both within each frame and between keyframes.
+        style (str): One of the keys of gradient_styles.STYLES.
+        middle_stops (iterable): Fixed (position, color) stops between the two end colors.
+        fps (int): The number of frames per second, from 1 to MAX_FPS.
+        loop (bool): Whether the animation repeats. A looping animation leaves out the
+        frame at time 1, which would repeat the first one.
+
+        Raises:
+        ValueError: If there are no keyframes, or any parameter is out of range.
+        """
+        keyframes = sorted(keyframes, key=lambda keyframe: keyframe[0])
+        if not keyframes:
+            raise ValueError("Animation needs at least one keyframe")
+        if num_frames < 1:
+            raise ValueError("Animation needs at least one frame")
+        if width < 1 or height < 1:
+            raise ValueError("Frame width and height must be at least 1 pixel")
+        if style not in gradient_styles.STYLES:
+            raise ValueError(f"Unknown gradient style: {style}")
+        if fps != int(fps) or not 1 <= fps <= MAX_FPS:
+            raise ValueError(
+                f"Frame rate must be a whole number from 1 to {MAX_FPS} frames per second"
+            )
+
+        self.keyframes = keyframes
+        self.num_frames = num_frames
+        self.width = width
+        self.height = height
+        self.color_space = color_space
+        self.style = style
+        self.middle_stops = list(middle_stops)
+        self.fps = int(fps)
+        self.loop = loop
+
+        # Each end color moves along a gradient over time, which interpolates it between
+        # keyframes in the animation's color space
+        self.color1_timeline = gradient_stops.MultiStopGradient(
+            [(time, color1) for time, color1, _, _ in keyframes], color_space
+        )
+        self.color2_timeline = gradient_stops.MultiStopGradient(
+            [(time, color2) for time, _, color2, _ in keyframes], color_space
+        )
+
+    def frame_time(self, index):
+        """
+        Returns the time, from 0 to 1, shown by a frame.
+        """
+        if self.loop:
+            return index / self.num_frames
+        return index / max(self.num_frames - 1, 1)
+
+    def frame_gradient(self, index):
+        """
+        Builds the gradient shown by a frame.
+
+        Parameters:
+        index (int): The frame number, from 0.
+
+        Returns:
+        tuple: The MultiStopGradient and its number of intermediate colors.
+        """
+        time = self.frame_time(index)
+        times = [keyframe[0] for keyframe in self.keyframes]
+        midpoints = [keyframe[3] for keyframe in self.keyframes]
+
+        # The number of colors changes linearly between keyframes
+        after = bisect.bisect_right(times, time)
+        if after == 0:
+            num_midpoints = midpoints[0]
+        elif after == len(times):
+            num_midpoints = midpoints[-1]
+        else:
+            ratio = (time - times[after - 1]) / (times[after] - times[after - 1])
+            num_midpoints = round(
+                midpoints[after - 1] + ratio * (midpoints[after] - midpoints[after - 1])
+            )
+
+        gradient = gradient_stops.MultiStopGradient(
+            [(0.0, self.color1_timeline.sample(time))]
+            + self.middle_stops
+            + [(1.0, self.color2_timeline.sample(time))],
+            self.color_space,
+        )
+        return gradient, num_midpoints
+
+    def frame_rasteriser(self, index):
+        """
+        Returns a gradient_styles.StyleRasteriser for a frame.
+        """
+        gradient, num_midpoints = self.frame_gradient(index)
+        return gradient_styles.StyleRasteriser(
+            gradient, num_midpoints, self.style, self.width, self.height
+        )
+
+    def gif_palette(self):
+        """
+        Chooses the global palette shared by every frame of a GIF.
+
+        The palette is exact when all frames together use at most 256 colors, as banded
+        gradients with few colors do. Otherwise the colors of all frames are quantized to
+        256 with median cut. Four-corner frames are sampled from a thumbnail, and frames
+        with more than GIF_PALETTE_SAMPLES colors are subsampled evenly, so their palette
+        is never treated as exact.
+
+        Returns:
+        tuple: The palette as a uint8 array shaped (K, 3) with K at most 256, and whether
+        it holds every color exactly.
+        """
+        import numpy as np
+
+        colors = []
+        exact = self.style != "bilinear"
+        for index in range(self.num_frames):
+            gradient, num_midpoints = self.frame_gradient(index)
+            if num_midpoints + 2 > GIF_PALETTE_SAMPLES and self.style != "bilinear":
+                samples = gradient.samples(num_midpoints)
+                colors.append(
+                    samples.take(
+                        gradient_engine.band_indices(len(samples), GIF_PALETTE_SAMPLES)
+                    )
+                )
+                exact = False
+            elif self.style == "bilinear":
+                thumbnail = gradient_styles.StyleRasteriser(
+                    gradient,
+                    num_midpoints,
+                    self.style,
+                    min(self.width, 64),
+                    min(self.height, 64),
+                )
+                colors.append(thumbnail.render().reshape(-1, 3))
+            else:
+                colors.append(gradient.blend(num_midpoints))
+
+        colors = np.concatenate(colors)
+        packed = np.unique(_pack(colors))
+        if len(packed) <= 256:
+            unpacked = np.stack([packed >> 16, (packed >> 8) & 0xFF, packed & 0xFF], axis=1)
+            return unpacked.astype(np.uint8), exact
+
+        histogram = palette_extract.ColorHistogram()
+        histogram.add(colors)
+        palette, _ = histogram.median_cut(256)
+        return palette, False
+
+
+def _pack(colors):
+    import numpy as np
+
+    colors = colors.astype(np.uint32)
+    return (colors[..., 0] << 16) | (colors[..., 1] << 8) | colors[..., 2]
+
+
+class _GifPaletteMapper:
+    # Maps RGB pixels to indices into the global GIF palette: exactly, by binary search in
+    # the sorted packed palette, or through a table of the nearest entry for every color
+    # binned to GIF_LOOKUP_BITS bits per channel
+    def __init__(self, palette, exact):
+        import numpy as np
+
+        self.exact = exact
+        if exact:
+            self.packed = _pack(palette)
+            return
+
+        levels = (np.arange(1 << GIF_LOOKUP_BITS) << (8 - GIF_LOOKUP_BITS)) + (
+            1 << (7 - GIF_LOOKUP_BITS)
+        )
+        grid = np.stack(np.meshgrid(levels, levels, levels, indexing="ij"), -1)
+        grid = grid.reshape(-1, 3).astype(np.float64)
+        entries = palette.astype(np.float64)
+        norms = (entries**2).sum(axis=1)
+        self.table = np.empty(len(grid), dtype=np.uint8)
+        rows = max(1, (1 << 21) // len(entries))
+        for start in range(0, len(grid), rows):
+            block = norms[None, :] - 2 * (grid[start:start + rows] @ entries.T)
+            self.table[start:start + rows] = block.argmin(axis=1)
+
+    def indices(self, pixels):
+        import numpy as np
+
+        if self.exact:
+            return np.searchsorted(self.packed, _pack(pixels)).astype(np.uint8)
+        shift = 8 - GIF_LOOKUP_BITS
+        bins = (
+            ((pixels[..., 0] >> shift).astype(np.intp) << (2 * GIF_LOOKUP_BITS))
+            | ((pixels[..., 1] >> shift).astype(np.intp) << GIF_LOOKUP_BITS)
+            | (pixels[..., 2] >> shift)
+        )
+        return self.table[bins]
+
+
+def _gif_palette_bytes(palette):
+    # The palette padded to the 256 entries of the global color table
+    import numpy as np
+
+    table = np.zeros((256, 3), dtype=np.uint8)
+    table[:len(palette)] = palette
+    return table.tobytes()
+
+
+def _skip_sub_blocks(data, pos):
+    while data[pos]:
+        pos += data[pos] + 1
+    return pos + 1
+
+
+def _gif_image_block(gif_data, palette_bytes):
+    # Extracts the image descriptor and compressed data of a single-frame GIF. A frame
+    # whose color table differs from the global palette keeps it as a local color table.
+    flags = gif_data[10]
+    pos = 13
+    frame_table = b""
+    if flags & 0x80:
+        frame_table = gif_data[pos:pos + 3 * (2 << (flags & 7))]
+        pos += len(frame_table)
+
+    while gif_data[pos] == 0x21:
+        pos = _skip_sub_blocks(gif_data, pos + 2)
+    if gif_data[pos] != 0x2C:
+        raise ValueError("Encoded frame has no image")
+
+    descriptor = bytearray(gif_data[pos:pos + 10])
+    pos += 10
+    if descriptor[9] & 0x80:
+        local_table_size = 3 * (2 << (descriptor[9] & 7))
+        local_table = gif_data[pos:pos + local_table_size]
+        pos += local_table_size
+    elif frame_table and frame_table != palette_bytes[:len(frame_table)]:
+        descriptor[9] |= 0x80 | (flags & 7)
+        local_table = frame_table
+    else:
+        local_table = b""
+
+    end = _skip_sub_blocks(gif_data, pos + 1)
+    return bytes(descriptor) + local_table + gif_data[pos:end]
+
+
+# Per-process state of the pool workers, set once by '_init_worker'
+_worker_state = None
+
+
+def _init_worker(state):
+    global _worker_state
+    _worker_state = state
+
+
+def _render_frame(index):
+    # Renders and encodes one frame. Runs in a worker process.
+    from PIL import Image
+
+    animation, file_format, file_path, palette = _worker_state
+    rasteriser = animation.frame_rasteriser(index)
+
+    if file_format == "gif":
+        mapper, palette_bytes = palette
+        image = Image.fromarray(mapper.indices(rasteriser.render()), "P")
+        image.putpalette(palette_bytes)
+        buffer = io.BytesIO()
+        # Without 'optimize', PIL keeps the palette and the indices unchanged
+        image.save(buffer, "GIF", optimize=False)
+        return _gif_image_block(buffer.getvalue(), palette_bytes)
+
+    bands = (
+        band
+        for _, band in rasteriser.iter_bands(
+            gradient_export.default_band_height(animation.width)
+        )
+    )
+    if file_format == "frames":
+        with open(frame_path(file_path, index), "wb") as fileobj:
+            gradient_export.write_png(fileobj, animation.width, animation.height, bands)
+        return None
+    return b"".join(
+        compressed for _, compressed in gradient_export.encode_png_data(animation.width, bands)
+    )
+
+
+def _iter_rendered_frames(state, num_frames, workers):
+    # Yields the encoded frames in order, keeping at most FRAMES_IN_FLIGHT frames per
+    # worker submitted ahead of the one being consumed
+    if workers == 1:
+        _init_worker(state)
+        try:
+            for index in range(num_frames):
+                yield _render_frame(index)
+        finally:
+            _init_worker(None)
+        return
+
+    # Imported here so that loading this module stays cheap for the GUI
+    import concurrent.futures
+
+    with concurrent.futures.ProcessPoolExecutor(
+        max_workers=workers, initializer=_init_worker, initargs=(state,)
+    ) as executor:
+        pending = collections.deque()
+        next_index = 0
+        try:
+            while pending or next_index < num_frames:
+                while next_index < num_frames and len(pending) < workers * FRAMES_IN_FLIGHT:
+                    pending.append(executor.submit(_render_frame, next_index))
+                    next_index += 1
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
+
+def write_gif(fileobj, animation, palette_bytes, frames):
+    """
+    Writes a looping GIF from encoded frames that share one global palette.
+
+    Parameters:
+    fileobj (file): A binary file object to write to.
+    animation (Animation): The animation the frames belong to.
+    palette_bytes (bytes): The 768-byte global color table.
+    frames (iterable): The image blocks of the frames, in order.
+    """
+    if animation.width > 0xFFFF or animation.height > 0xFFFF:
+        raise ValueError("GIF frames are limited to 65535 pixels per side")
+
+    fileobj.write(b"GIF89a")
+    fileobj.write(struct.pack("<HHBBB", animation.width, animation.height, 0xF7, 0, 0))
+    fileobj.write(palette_bytes)
+    if animation.loop:
+        fileobj.write(b"\x21\xff\x0bNETSCAPE2.0\x03\x01\x00\x00\x00")
+
+    delay = max(1, round(100 / animation.fps))
+    for frame in frames:
+        # Graphic control extension: keep the previous frame, no transparency
+        fileobj.write(struct.pack("<BBBBHBB", 0x21, 0xF9, 4, 0x04, delay, 0, 0))
+        fileobj.write(frame)
+    fileobj.write(b"\x3b")
+
+
+def write_apng(fileobj, animation, frames):
+    """
+    Writes an animated PNG from frames encoded by gradient_export.encode_png_data.
+
+    The first frame is also the default image shown by viewers without APNG support.
+
+    Parameters:
+    fileobj (file): A binary file object to write to.
+    animation (Animation): The animation the frames belong to.
+    frames (iterable): The zlib streams of the frames, in order.
+    """
+    gradient_export.write_png_header(fileobj, animation.width, animation.height)
+    gradient_export.write_png_chunk(
+        fileobj, b"acTL", struct.pack(">II", animation.num_frames, 0 if animation.loop else 1)
+    )
+
+    sequence = 0
+    for index, data in enumerate(frames):
+        gradient_export.write_png_chunk(
+            fileobj,
+            b"fcTL",
+            struct.pack(
+                ">IIIIIHHBB",
+                sequence,
+                animation.width,
+                animation.height,
+                0,
+                0,
+                1,
+                animation.fps,
+                0,
+                0,
+            ),
+        )
+        sequence += 1
+        if index == 0:
+            gradient_export.write_png_chunk(fileobj, b"IDAT", data)
+        else:
+            gradient_export.write_png_chunk(fileobj, b"fdAT", struct.pack(">I", sequence) + data)
+            sequence += 1
+    gradient_export.write_png_chunk(fileobj, b"IEND", b"")
+
+
+def frame_path(file_path, index):
+    """
+    Returns the path of one file of a frame sequence: the name of file_path with the
+    zero-padded frame number appended, as in 'sweep_00012.png'.
+    """
+    stem, extension = os.path.splitext(file_path)
+    return f"{stem}_{index:05d}{extension or '.png'}"
+
+
+def export_animation(file_path, animation, file_format=None, workers=None):
+    """
+    Renders an animation in parallel and streams it to a GIF, an animated PNG or a
+    sequence of PNG files.
+
+    Parameters:
+    file_path (str): The path of the output file. For 'frames', the frame files are named
+    after it, as described in 'frame_path'.
+    animation (Animation): The animation to render.
+    file_format (str): One of ANIMATION_FORMATS. Inferred from the extension when omitted:
+    '.gif' gives 'gif', and '.png' or '.apng' give 'apng'.
+    workers (int): The number of worker processes. Defaults to the number of CPUs.
+
+    Raises:
+    ValueError: If the format is not supported.
+    """
+    if file_format is None:
+        extension = os.path.splitext(file_path)[1].lower()
+        if extension not in FORMATS_BY_EXTENSION:
+            raise ValueError(f"Unsupported animation format: {extension or file_path}")
+        file_format = FORMATS_BY_EXTENSION[extension]
+    if file_format not in ANIMATION_FORMATS:
+        raise ValueError(f"Unsupported animation format: {file_format}")
+
+    workers = max(1, min(workers or os.cpu_count() or 1, animation.num_frames))
+
+    palette = None
+    if file_format == "gif":
+        colors, exact = animation.gif_palette()
+        palette_bytes = _gif_palette_bytes(colors)
+        palette = (_GifPaletteMapper(colors, exact), palette_bytes)
+
+    frames = _iter_rendered_frames(
+        (animation, file_format, file_path, palette), animation.num_frames, workers
+    )
+    if file_format == "frames":
+        for _ in frames:
+            pass
+        return
+
+    with open(file_path, "wb") as fileobj:
+        if file_format == "gif":
+            write_gif(fileobj, animation, palette_bytes, frames)
+        else:
+            write_apng(fileobj, animation, frames)
@@ -0,0 +1,335 @@
+"""
+Command-line batch rendering of Color Fusion gradients.
+
+Reads gradient jobs from a CSV or JSON Lines file and renders them in parallel across all
+cores with a process pool. Each worker streams its own output file, so outputs are written
+concurrently. Failed jobs are reported individually instead of stopping the batch.
+
+Every job describes one gradient with these fields (CSV columns or JSON keys):
+
+- color1, color2: the two hex colors, or
+- stops: the color stops, as a JSON list of [position, hex] pairs, or in CSV as
+  'position:hex' pairs separated by ';' (for example '0:#FF0000;0.5:#FFFFFF;1:#0000FF')
+- midpoints: the number of intermediate colors (default 10)
+- width, height: the image size in pixels (default 2160 x 2160)
+- color_space: the interpolation space (default 'srgb')
+- style: 'horizontal', 'vertical', 'radial', 'conic' or 'bilinear' (default 'horizontal')
+- bit_depth: 8 or 16 bits per channel (default 8)
+- dither: 'ordered' or 'blue_noise' to dither 8-bit output instead of rounding (optional)
+- output: the output file name, relative to the output directory, whose subdirectories are
+  created as needed (optional)
+
+Outputs named with a palette extension ('.css', '.json', '.ase', '.gpl' or '.npy') receive
+the blended colors as palette data instead of an image; the size, style and precision
+fields are then ignored.
+
+Usage:
+    python gradient_batch.py jobs.jsonl --output-dir swatches
+"""
+
+import argparse
+import concurrent.futures
+import csv
+import json
+import os
+import sys
+
+import color_codec
+import color_spaces
+import gradient_engine
+import gradient_export
+import gradient_stops
+import gradient_styles
+import palette_formats
+
+DEFAULT_MIDPOINTS = 10
+DEFAULT_SIZE = 2160
+
+
+def parse_stops(value):
+    """
+    Parses the stops of a job into (position, RGB tuple) pairs.
+
+    Parameters:
+    value (str or list): 'position:hex' pairs separated by ';', or a list of [position, hex] pairs.
+
+    Returns:
+    list: The parsed stops.
+
+    Raises:
+    ValueError: If a stop is malformed.
+    """
+    if isinstance(value, str):
+        pairs = [item.split(":", 1) for item in value.split(";") if item.strip()]
+    else:
+        pairs = value
+
+    stops = []
+    for pair in pairs:
+        if len(pair) != 2:
+            raise ValueError(f"Invalid stop: {pair}")
+        position, color = pair
+        stops.append((float(position), gradient_engine.get_rgb_from_hex(str(color).strip())))
+    return stops
+
+
+def _int_field(record, name, default, minimum):
+    # An integer field of a job: missing or blank values take the default, so an explicit
+    # 0 is kept and then validated like any other value
+    value = record.get(name)
+    if value is None or (isinstance(value, str) and not value.strip()):
+        return default
+    if isinstance(value, bool) or (isinstance(value, float) and not value.is_integer()):
+        raise ValueError(f"Invalid {name}: {value!r}")
+    try:
+        value = int(value)
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid {name}: {value!r}") from None
+    if value < minimum:
+        raise ValueError(f"Field '{name}' must be at least {minimum}, got {value}")
+    return value
+
+
+def parse_job(record, index, output_dir, file_format):
+    """
+    Turns one CSV row or JSON object into a normalised job.
+
+    Parameters:
+    record (dict): The fields of the job.
+    index (int): The position of the job in the input, used for default file names.
+    output_dir (str): The directory outputs are written to.
+    file_format (str): The default output format when the job gives no file name.
+
+    Returns:
+    dict: The job, with 'stops', 'midpoints', 'width', 'height', 'color_space', 'style',
+    'bit_depth', 'dither' and 'output'.
+
+    Raises:
+    ValueError: If a field is missing or invalid.
+    """
+    if not isinstance(record, dict):
+        raise ValueError("Job must be an object with named fields")
+
+    color_space = record.get("color_space") or "srgb"
+    if color_space not in color_spaces.COLOR_SPACES:
+        raise ValueError(f"Unknown color space: {color_space}")
+
+    style = record.get("style") or "horizontal"
+    if style not in gradient_styles.STYLES:
+        raise ValueError(f"Unknown gradient style: {style}")
+
+    bit_depth = _int_field(record, "bit_depth", 8, 0)
+    if bit_depth not in gradient_export.BIT_DEPTHS:
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+    dither = record.get("dither") or None
+    if dither is not None and dither not in gradient_export.DITHER_METHODS:
+        raise ValueError(f"Unknown dithering method: {dither}")
+    if dither is not None and bit_depth != 8:
+        raise ValueError("Dithering only applies to 8-bit exports")
+
+    if record.get("stops"):
+        stops = parse_stops(record["stops"])
+        name_colors = [stops[0][1], stops[-1][1]]
+    elif record.get("color1") and record.get("color2"):
+        name_colors = [
+            gradient_engine.get_rgb_from_hex(str(record["color1"]).strip()),
+            gradient_engine.get_rgb_from_hex(str(record["color2"]).strip()),
+        ]
+        stops = [(0.0, name_colors[0]), (1.0, name_colors[1])]
+    else:
+        raise ValueError("Job needs either 'stops' or both 'color1' and 'color2'")
+
+    output = record.get("output")
+    midpoints = _int_field(record, "midpoints", DEFAULT_MIDPOINTS, 0)
+    width = _int_field(record, "width", DEFAULT_SIZE, 1)
+    height = _int_field(record, "height", DEFAULT_SIZE, 1)
+
+    if not output:
+        output = "{:06d}_{}_fused_with_{}.{}".format(
+            index,
+            color_codec.format_hex(name_colors[0])[1:],
+            color_codec.format_hex(name_colors[1])[1:],
+            file_format,
+        )
+
+    return {
+        "stops": stops,
+        "midpoints": midpoints,
+        "width": width,
+        "height": height,
+        "color_space": color_space,
+        "style": style,
+        "bit_depth": bit_depth,
+        "dither": dither,
+        "output": os.path.join(output_dir, output),
+    }
+
+
+def read_records(file_path):
+    """
+    Reads the raw job records from a CSV or JSON Lines file.
+
+    The format is taken from the extension: '.csv' is read as CSV with a header row, and
+    anything else as JSON Lines. Blank lines in JSON Lines files are skipped.
+
+    Parameters:
+    file_path (str): The path of the jobs file.
+
+    Yields:
+    tuple: The line number and either the record dict or the exception raised parsing it.
+    """
+    with open(file_path, newline="", encoding="utf-8") as jobs_file:
+        if file_path.lower().endswith(".csv"):
+            reader = csv.DictReader(jobs_file)
+            for record in reader:
+                yield reader.line_num, record
+            return
+
+        for line_number, line in enumerate(jobs_file, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield line_number, json.loads(line)
+            except ValueError as e:
+                yield line_number, e
+
+
+def render_job(job):
+    """
+    Renders one job to its output file. Runs in a worker process.
+
+    Parameters:
+    job (dict): A job as returned by 'parse_job'.
+
+    Returns:
+    str or None: None on success, or the error message if rendering failed.
+    """
+    try:
+        gradient = gradient_stops.MultiStopGradient(job["stops"], job["color_space"])
+        os.makedirs(os.path.dirname(job["output"]) or ".", exist_ok=True)
+        extension = os.path.splitext(job["output"])[1].lower()
+        if extension in palette_formats.FORMATS_BY_EXTENSION:
+            colors = gradient.samples(job["midpoints"])
+            palette_formats.export_palette(job["output"], colors)
+            return None
+
+        gradient_export.export_styled(
+            job["output"],
+            gradient,
+            job["midpoints"],
+            job["width"],
+            job["height"],
+            style=job["style"],
+            bit_depth=job["bit_depth"],
+            dither=job["dither"],
+        )
+        return None
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+
+
+def report_progress(done, total, failed, stream):
+    stream.write(f"\r{done}/{total} rendered, {failed} failed")
+    if done == total:
+        stream.write("\n")
+    stream.flush()
+
+
+def run_batch(jobs_path, output_dir, workers=None, file_format="png", progress=sys.stderr):
+    """
+    Renders every job in a jobs file, in parallel.
+
+    Parameters:
+    jobs_path (str): The path of the CSV or JSON Lines jobs file.
+    output_dir (str): The directory outputs are written to. Created if missing.
+    workers (int): The number of worker processes. Defaults to the number of CPUs.
+    file_format (str): The output format for jobs without an explicit file name.
+    progress (file): Where progress is reported, or None for no progress output.
+
+    Returns:
+    list: (line number, error message) pairs for every job that failed.
+    """
+    os.makedirs(output_dir, exist_ok=True)
+
+    jobs = []
+    job_lines = []
+    errors = []
+    for index, (line_number, record) in enumerate(read_records(jobs_path)):
+        try:
+            if isinstance(record, Exception):
+                raise record
+            jobs.append(parse_job(record, index, output_dir, file_format))
+            job_lines.append(line_number)
+        except (ValueError, TypeError) as e:
+            errors.append((line_number, f"{type(e).__name__}: {e}"))
+
+    workers = workers or os.cpu_count() or 1
+    total = len(jobs)
+    done = 0
+    # Report roughly every 1% so huge batches do not flood the terminal
+    progress_interval = max(1, total // 100)
+
+    if workers == 1:
+        results = map(render_job, jobs)
+        executor = None
+    else:
+        executor = concurrent.futures.ProcessPoolExecutor(max_workers=workers)
+        chunksize = max(1, min(64, total // (workers * 4)))
+        results = executor.map(render_job, jobs, chunksize=chunksize)
+
+    try:
+        for line_number, error in zip(job_lines, results):
+            done += 1
+            if error is not None:
+                errors.append((line_number, error))
+            if progress is not None and (done % progress_interval == 0 or done == total):
+                report_progress(done, total, len(errors), progress)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+
+    errors.sort()
+    return errors
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Render Color Fusion gradients in bulk from a CSV or JSON Lines file."
+    )
+    parser.add_argument("jobs", help="CSV (.csv) or JSON Lines file describing the gradients")
+    parser.add_argument(
+        "-o", "--output-dir", default=".", help="directory to write the images to"
+    )
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    parser.add_argument(
+        "-f",
+        "--format",
+        choices=sorted(set(gradient_export.WRITERS) | set(palette_formats.WRITERS)),
+        default="png",
+        help="output format for jobs without an output file name",
+    )
+    parser.add_argument(
+        "-q", "--quiet", action="store_true", help="do not report progress"
+    )
+    args = parser.parse_args(argv)
+
+    errors = run_batch(
+        args.jobs,
+        args.output_dir,
+        workers=args.workers,
+        file_format=args.format,
+        progress=None if args.quiet else sys.stderr,
+    )
+    for line_number, error in errors:
+        print(f"{args.jobs}:{line_number}: {error}", file=sys.stderr)
+    return 1 if errors else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
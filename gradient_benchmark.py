@@ -0,0 +1,531 @@
+"""
+Benchmarks for Color Fusion.
+
+Measures blending at various stop counts, hex parsing and formatting, full-size gradient
+generation, PNG encoding and canvas redraws. Every benchmark is run repeatedly for at least
+--min-time seconds and reported as operations per second, latency percentiles and the peak
+memory traced during one extra run.
+
+Canvas redraws use a real Tk canvas when a display is available, for example under Xvfb,
+and otherwise a headless stand-in canvas that records the same item calls, so the Python
+side of the redraw is still measured. Redraw benchmarks are skipped if the GUI's
+dependencies are not installed.
+
+Benchmarks named legacy.* time the implementations the optimized code replaced: the
+per-channel blend loop, int() hex parsing, one ImageDraw rectangle per color and a full
+canvas clear with one rectangle per color on every redraw. They run in the same process as
+the current code, so every saved baseline carries its own before/after comparison, for
+example legacy.generate.2160 against generate.2160.
+
+Results can be saved as a baseline and later runs compared against it. A p50 latency more
+than --tolerance slower than the baseline is reported as a regression, and the exit status
+is then 1.
+
+Usage:
+    python gradient_benchmark.py
+    python gradient_benchmark.py --filter hex --min-time 1
+    python gradient_benchmark.py --save benchmark_baseline.json
+    python gradient_benchmark.py --compare benchmark_baseline.json
+"""
+
+import argparse
+import io
+import json
+import os
+import platform
+import sys
+import time
+import tracemalloc
+import types
+
+import color_codec
+import gradient_engine
+import gradient_export
+import gradient_stops
+import instrumentation
+
+DEFAULT_MIN_TIME = 0.5
+DEFAULT_TOLERANCE = 0.25
+MIN_RUNS = 5
+MAX_RUNS = 100000
+
+
+def percentile(sorted_values, fraction):
+    """
+    Returns the value at a fraction of a sorted list, by the nearest-rank method.
+    """
+    index = max(0, min(len(sorted_values) - 1, round(fraction * len(sorted_values)) - 1))
+    return sorted_values[index]
+
+
+def run_benchmark(function, min_time=DEFAULT_MIN_TIME):
+    """
+    Times a function over repeated calls.
+
+    Parameters:
+    function (callable): Called with no arguments.
+    min_time (float): The minimum total time spent timing calls, in seconds.
+
+    Returns:
+    dict: The number of runs, operations per second, mean, p50, p90, p99 and maximum
+    latencies in milliseconds, and the peak traced memory of one call in bytes.
+    """
+    function()  # Warm up caches and lazy imports
+
+    latencies = []
+    total = 0
+    while (total < min_time * 1e9 or len(latencies) < MIN_RUNS) and len(latencies) < MAX_RUNS:
+        start = time.perf_counter_ns()
+        function()
+        elapsed = time.perf_counter_ns() - start
+        latencies.append(elapsed)
+        total += elapsed
+
+    # Memory is traced in a separate call, since tracing slows allocation down
+    tracemalloc.start()
+    try:
+        function()
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    latencies.sort()
+    return {
+        "runs": len(latencies),
+        "ops_per_sec": len(latencies) / (total / 1e9),
+        "mean_ms": total / len(latencies) / 1e6,
+        "p50_ms": percentile(latencies, 0.50) / 1e6,
+        "p90_ms": percentile(latencies, 0.90) / 1e6,
+        "p99_ms": percentile(latencies, 0.99) / 1e6,
+        "max_ms": latencies[-1] / 1e6,
+        "peak_bytes": peak,
+    }
+
+
+def blend_benchmarks():
+    red, blue = (255, 0, 0), (0, 0, 255)
+    yield "blend.two_colors.10", lambda: gradient_engine.blend_colors(red, blue, 10)
+    yield "blend.two_colors.2158", lambda: gradient_engine.blend_colors(red, blue, 2158)
+    yield "blend.two_colors.oklab.2158", lambda: gradient_engine.blend_colors(
+        red, blue, 2158, "oklab"
+    )
+
+    for stop_count in (2, 8, 64):
+        stops = [
+            (index / (stop_count - 1), ((index * 37) % 256, (index * 91) % 256, index % 256))
+            for index in range(stop_count)
+        ]
+        for color_space in ("srgb", "oklab"):
+
+            def blend(stops=stops, color_space=color_space):
+                gradient_stops.MultiStopGradient(stops, color_space).blend(1000)
+
+            yield f"blend.stops{stop_count}.{color_space}.1000", blend
+
+    import numpy as np
+
+    starts = np.random.default_rng(0).integers(0, 256, (10000, 3))
+    ends = np.random.default_rng(1).integers(0, 256, (10000, 3))
+    yield "blend.pairs10000.10", lambda: gradient_engine.blend_colors_array(starts, ends, 10)
+
+
+def hex_benchmarks():
+    import numpy as np
+
+    colors = np.random.default_rng(2).integers(0, 256, (100000, 3)).astype(np.uint8)
+    codes = color_codec.format_hex_array(colors)
+    color_tuples = [tuple(color) for color in colors[:1000].tolist()]
+    code_sample = codes[:1000]
+
+    yield "hex.parse.1000", lambda: [color_codec.parse_hex(code) for code in code_sample]
+    yield "hex.format.1000", lambda: [color_codec.format_hex(color) for color in color_tuples]
+    yield "hex.parse_array.100000", lambda: color_codec.parse_hex_array(codes)
+    yield "hex.format_array.100000", lambda: color_codec.format_hex_array(colors)
+
+
+def _legacy_blend(color1, color2, num_midpoints):
+    # The original per-channel blend loop
+    blended_colors = [color1]
+    for i in range(1, num_midpoints + 1):
+        ratio = i / (num_midpoints + 1)
+        blended_colors.append(
+            (
+                round(color1[0] + ratio * (color2[0] - color1[0])),
+                round(color1[1] + ratio * (color2[1] - color1[1])),
+                round(color1[2] + ratio * (color2[2] - color1[2])),
+            )
+        )
+    blended_colors.append(color2)
+    return blended_colors
+
+
+def _legacy_parse_hex(hex_code):
+    # The original hex parser
+    hex_code = hex_code.lstrip("#")
+    if len(hex_code) != 6:
+        raise ValueError("Hex color code must be 6 characters long")
+    return int(hex_code[0:2], 16), int(hex_code[2:4], 16), int(hex_code[4:6], 16)
+
+
+def _legacy_generate(color_one_hex, color_two_hex, width, height, num_midpoints):
+    # The original export path: one ImageDraw rectangle per blended color
+    from PIL import Image, ImageDraw
+
+    gradient_image = Image.new("RGB", (width, height), "#FFFFFF")
+    draw = ImageDraw.Draw(gradient_image)
+    blended_colors = _legacy_blend(
+        _legacy_parse_hex(color_one_hex), _legacy_parse_hex(color_two_hex), num_midpoints
+    )
+    color_width = width / len(blended_colors)
+    for i, color in enumerate(blended_colors):
+        color_hex = "#{:02X}{:02X}{:02X}".format(color[0], color[1], color[2])
+        draw.rectangle([i * color_width, 0, (i + 1) * color_width, height], fill=color_hex)
+    return gradient_image
+
+
+def _legacy_redraw(canvas, blended_colors):
+    # The original redraw: clear the canvas and create one rectangle per color
+    canvas.delete("all")
+    canvas_height = canvas.winfo_height()
+    color_width = canvas.winfo_width() / len(blended_colors)
+    for i, color in enumerate(blended_colors):
+        color_hex = "#{:02X}{:02X}{:02X}".format(color[0], color[1], color[2])
+        canvas.create_rectangle(
+            i * color_width, 0, (i + 1) * color_width, canvas_height, fill=color_hex
+        )
+
+
+def legacy_benchmarks():
+    red, blue = (255, 0, 0), (0, 0, 255)
+    yield "legacy.blend.two_colors.10", lambda: _legacy_blend(red, blue, 10)
+    yield "legacy.blend.two_colors.2158", lambda: _legacy_blend(red, blue, 2158)
+
+    import numpy as np
+
+    colors = np.random.default_rng(2).integers(0, 256, (1000, 3)).astype(np.uint8)
+    code_sample = color_codec.format_hex_array(colors)
+    yield "legacy.hex.parse.1000", lambda: [_legacy_parse_hex(code) for code in code_sample]
+
+    size = 2160
+    yield f"legacy.generate.{size}", lambda: _legacy_generate(
+        "#FF0000", "#0000FF", size, size, 10
+    )
+    yield f"legacy.generate.{size}.smooth", lambda: _legacy_generate(
+        "#FF0000", "#0000FF", size, size, size - 2
+    )
+
+
+def generate_benchmarks(large=False):
+    sizes = [2160, 4320] + ([8192] if large else [])
+    for size in sizes:
+
+        def generate(size=size):
+            gradient_engine.generate_gradient("#FF0000", "#0000FF", size, size, 10)
+
+        def generate_smooth(size=size):
+            gradient_engine.generate_gradient("#FF0000", "#0000FF", size, size, size - 2)
+
+        yield f"generate.{size}", generate
+        yield f"generate.{size}.smooth", generate_smooth
+
+
+def png_benchmarks():
+    size = 2160
+    blended = gradient_engine.blend_colors_array((255, 0, 0), (0, 0, 255), size - 2)[0]
+    row = gradient_engine.gradient_row(blended, size)
+    image = gradient_engine.image_from_row(row, size)
+
+    def encode_streamed():
+        gradient_export.write_png(
+            io.BytesIO(),
+            size,
+            size,
+            gradient_export.iter_row_bands(
+                row, size, gradient_export.default_band_height(size)
+            ),
+        )
+
+    yield f"png.streamed.{size}", encode_streamed
+    yield f"png.pil.{size}", lambda: image.save(io.BytesIO(), "PNG")
+
+
+class HeadlessCanvas:
+    """
+    A stand-in for tk.Canvas that records item calls, used when there is no display.
+    """
+
+    def __init__(self, width, height):
+        self.width = width
+        self.height = height
+        self.items = {}
+        self.next_item = 1
+
+    def winfo_width(self):
+        return self.width
+
+    def winfo_height(self):
+        return self.height
+
+    def _create(self, *args, **options):
+        item = self.next_item
+        self.next_item += 1
+        self.items[item] = (args, options)
+        return item
+
+    create_rectangle = _create
+    create_text = _create
+    create_image = _create
+
+    def coords(self, item, *args):
+        self.items[item] = (args, self.items[item][1])
+
+    def itemconfigure(self, item, **options):
+        self.items[item][1].update(options)
+
+    def delete(self, *items):
+        if "all" in items:
+            self.items.clear()
+        for item in items:
+            self.items.pop(item, None)
+
+    def update_idletasks(self):
+        pass
+
+
+class _Flag:
+    # Stands in for a tk.BooleanVar or tk.StringVar
+    def __init__(self, value):
+        self.value = value
+
+    def get(self):
+        return self.value
+
+
+def redraw_benchmarks():
+    try:
+        import color_fusion
+    except ImportError as e:
+        yield "redraw", None, f"GUI dependencies missing ({e})"
+        return
+
+    import tkinter as tk
+
+    width, height = 1200, 400
+    try:
+        # The window stays mapped, since an unmapped canvas reports a size of 1 x 1
+        root = tk.Tk()
+        canvas = tk.Canvas(root, width=width, height=height)
+        canvas.pack()
+        root.update()
+        mode = "tk"
+    except tk.TclError:
+        root = None
+        canvas = HeadlessCanvas(width, height)
+        mode = "headless"
+
+    # Only the state and methods the drawing code uses
+    app = types.SimpleNamespace(
+        gradient_display=canvas,
+        gradient_items=[],
+        gradient_item_states=[],
+        error_message_item=None,
+        gradient_image_item=None,
+        gradient_photo=None,
+        contrast_items=[],
+        show_separations=_Flag(True),
+        smooth_gradient=_Flag(False),
+        show_contrast=_Flag(False),
+        gradient_style=_Flag("Horizontal"),
+        gradient_pixels=None,
+        instrumentation=instrumentation.Instrumentation(),
+    )
+    for name in (
+        "draw_gradient",
+        "draw_horizontal_gradient",
+        "draw_gradient_image",
+        "draw_contrast_annotations",
+        "get_gradient_style",
+    ):
+        setattr(app, name, types.MethodType(getattr(color_fusion.ColorFusionApp, name), app))
+
+    palettes = [
+        gradient_engine.blend_palette((255, 0, 0), (0, 0, 255), 62),
+        gradient_engine.blend_palette((0, 255, 0), (255, 0, 255), 62),
+    ]
+    frame = [0]
+
+    def draw(palette, smooth=False, contrast=False):
+        app.smooth_gradient.value = smooth
+        app.show_contrast.value = contrast
+        app.draw_gradient(palette, palette[-1], palette.to_hex())
+        canvas.update_idletasks()
+
+    def changing(**options):
+        frame[0] += 1
+        draw(palettes[frame[0] % 2], **options)
+
+    yield f"redraw.{mode}.bands64.changed", lambda: changing(), None
+    yield f"redraw.{mode}.bands64.unchanged", lambda: draw(palettes[0]), None
+    yield f"redraw.{mode}.bands64.contrast", lambda: changing(contrast=True), None
+
+    def legacy_changing():
+        frame[0] += 1
+        _legacy_redraw(canvas, palettes[frame[0] % 2].to_list())
+
+    # Clears the canvas under the app's items, so it runs after the app's redraws
+    legacy = (f"legacy.redraw.{mode}.bands64", legacy_changing, None)
+
+    if root is None:
+        yield f"redraw.{mode}.smooth", None, "needs a display for tk.PhotoImage"
+        yield legacy
+        return
+
+    smooth_palettes = [
+        gradient_engine.blend_palette((255, 0, 0), (0, 0, 255), width - 2),
+        gradient_engine.blend_palette((0, 255, 0), (255, 0, 255), width - 2),
+    ]
+
+    def smooth():
+        frame[0] += 1
+        draw(smooth_palettes[frame[0] % 2], smooth=True)
+
+    yield f"redraw.{mode}.smooth", smooth, None
+    yield legacy
+    root.destroy()
+
+
+def all_benchmarks(large=False):
+    """
+    Yields (name, function, skip reason) for every benchmark.
+    """
+    groups = [
+        blend_benchmarks(),
+        hex_benchmarks(),
+        generate_benchmarks(large),
+        png_benchmarks(),
+        legacy_benchmarks(),
+    ]
+    for group in groups:
+        for name, function in group:
+            yield name, function, None
+    yield from redraw_benchmarks()
+
+
+def environment():
+    import numpy as np
+
+    try:
+        import PIL
+
+        pillow_version = PIL.__version__
+    except ImportError:
+        pillow_version = None
+
+    return {
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "machine": platform.machine(),
+        "cpus": os.cpu_count(),
+        "numpy": np.__version__,
+        "pillow": pillow_version,
+    }
+
+
+def compare(results, baseline):
+    """
+    Compares p50 latencies with a baseline.
+
+    Returns:
+    dict: The ratio of each benchmark's p50 to its baseline p50, for benchmarks in both.
+    """
+    ratios = {}
+    for name, result in results.items():
+        previous = baseline.get(name)
+        if previous and previous.get("p50_ms"):
+            ratios[name] = result["p50_ms"] / previous["p50_ms"]
+    return ratios
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark Color Fusion.")
+    parser.add_argument(
+        "-k", "--filter", default="", help="only run benchmarks whose name contains this"
+    )
+    parser.add_argument(
+        "--min-time",
+        type=float,
+        default=DEFAULT_MIN_TIME,
+        help="minimum seconds spent timing each benchmark",
+    )
+    parser.add_argument(
+        "--large", action="store_true", help="also generate 8192 x 8192 gradients"
+    )
+    parser.add_argument("--save", metavar="PATH", help="write the results as a baseline file")
+    parser.add_argument("--compare", metavar="PATH", help="compare against a baseline file")
+    parser.add_argument(
+        "--tolerance",
+        type=float,
+        default=DEFAULT_TOLERANCE,
+        help="allowed p50 slowdown against the baseline, as a fraction (default 0.25)",
+    )
+    args = parser.parse_args(argv)
+
+    baseline = {}
+    if args.compare:
+        with open(args.compare, encoding="utf-8") as baseline_file:
+            baseline_data = json.load(baseline_file)
+        baseline = baseline_data["results"]
+        if baseline_data.get("environment") != environment():
+            print(
+                "Note: the baseline was recorded in a different environment: "
+                + json.dumps(baseline_data.get("environment")),
+                file=sys.stderr,
+            )
+
+    print(
+        f"{'benchmark':<36} {'ops/s':>11} {'p50 ms':>9} {'p90 ms':>9} {'p99 ms':>9} "
+        f"{'peak MB':>8}" + ("  vs baseline" if baseline else "")
+    )
+
+    results = {}
+    regressions = []
+    for name, function, skip_reason in all_benchmarks(args.large):
+        if args.filter not in name:
+            continue
+        if function is None:
+            print(f"{name:<36} skipped: {skip_reason}")
+            continue
+
+        result = run_benchmark(function, args.min_time)
+        results[name] = result
+        line = (
+            f"{name:<36} {result['ops_per_sec']:>11.1f} {result['p50_ms']:>9.3f} "
+            f"{result['p90_ms']:>9.3f} {result['p99_ms']:>9.3f} "
+            f"{result['peak_bytes'] / 2**20:>8.1f}"
+        )
+        ratio = compare({name: result}, baseline).get(name)
+        if ratio is not None:
+            line += f"  {ratio:>6.2f}x"
+            if ratio > 1 + args.tolerance:
+                line += "  REGRESSION"
+                regressions.append(name)
+        print(line, flush=True)
+
+    if args.save:
+        with open(args.save, "w", encoding="utf-8") as baseline_file:
+            json.dump(
+                {"environment": environment(), "results": results},
+                baseline_file,
+                indent=2,
+                sort_keys=True,
+            )
+            baseline_file.write("\n")
+
+    if regressions:
+        print(f"{len(regressions)} regression(s): {', '.join(regressions)}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,237 @@
+"""
+Memoization of blended gradients, hex codes and rendered images.
+
+The same few color pairs and step counts tend to be requested over and over, both by the GUI
+on every redraw and by tools that render the same gradients repeatedly. GradientCache keeps
+the results in a least-recently-used cache bounded both by number of entries and by an
+estimate of their size in bytes, and counts hits, misses and evictions so it can be tuned.
+"""
+
+import collections
+import threading
+
+import color_codec
+import color_palette
+import gradient_engine
+
+# Rough size of a short hex string such as '#A1B2C3', plus its slot in a tuple
+HEX_STRING_BYTES = 64
+
+
+class GradientCache:
+    """
+    A thread-safe LRU cache for gradient results.
+
+    Keys are built from the gradient's stops and color space, the number of intermediate
+    colors and, for images, the size. Cached arrays are marked read-only, and images are
+    handed out as copies, so callers cannot change what is cached.
+    """
+
+    def __init__(self, max_entries=256, max_bytes=64 * 1024 * 1024):
+        """
+        Parameters:
+        max_entries (int): The maximum number of entries kept.
+        max_bytes (int): The maximum estimated size of all entries together.
+        """
+        self.max_entries = max_entries
+        self.max_bytes = max_bytes
+        self._entries = collections.OrderedDict()
+        self._lock = threading.Lock()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+
+    def __len__(self):
+        return len(self._entries)
+
+    def stats(self):
+        """
+        Returns the cache counters.
+
+        Returns:
+        dict: The number of hits, misses and evictions, and the current number of entries
+        and estimated size in bytes.
+        """
+        with self._lock:
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "evictions": self.evictions,
+                "entries": len(self._entries),
+                "bytes": self._bytes,
+            }
+
+    def clear(self):
+        """
+        Removes every entry and resets the counters.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+            self.hits = 0
+            self.misses = 0
+            self.evictions = 0
+
+    def get(self, key):
+        """
+        Returns the cached value for a key, or None on a miss.
+
+        Parameters:
+        key (hashable): The cache key.
+
+        Returns:
+        The cached value, or None.
+        """
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key][0]
+            self.misses += 1
+            return None
+
+    def put(self, key, value, size):
+        """
+        Stores a value, evicting the least recently used entries to stay within bounds.
+
+        Values larger than max_bytes on their own are not stored.
+
+        Parameters:
+        key (hashable): The cache key.
+        value: The value to store. Must not be None.
+        size (int): The estimated size of the value in bytes.
+        """
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._bytes -= self._entries.pop(key)[1]
+            self._entries[key] = (value, size)
+            self._bytes += size
+
+            while len(self._entries) > self.max_entries or self._bytes > self.max_bytes:
+                _, (_, evicted_size) = self._entries.popitem(last=False)
+                self._bytes -= evicted_size
+                self.evictions += 1
+
+    def get_or_compute(self, key, compute, size_of):
+        """
+        Returns the cached value for a key, computing and storing it on a miss.
+
+        The value is computed outside the lock, so two threads missing on the same key at
+        the same time may both compute it; the last one to finish is kept.
+
+        Parameters:
+        key (hashable): The cache key.
+        compute (callable): Called with no arguments to produce the value on a miss.
+        size_of (callable): Called with the value to estimate its size in bytes.
+
+        Returns:
+        The cached or newly computed value.
+        """
+        value = self.get(key)
+        if value is None:
+            value = compute()
+            self.put(key, value, size_of(value))
+        return value
+
+    @staticmethod
+    def _gradient_key(gradient, num_midpoints):
+        return (tuple(gradient.stops), gradient.color_space, max(num_midpoints, 0))
+
+    def blend(self, gradient, num_midpoints):
+        """
+        Returns the blended colors of a gradient, as MultiStopGradient.blend does.
+
+        Parameters:
+        gradient (MultiStopGradient): The gradient to blend.
+        num_midpoints (int): The number of colors between the two ends.
+
+        Returns:
+        ndarray: A read-only uint8 array shaped (num_midpoints + 2, 3).
+        """
+
+        def compute():
+            blended = gradient.blend(num_midpoints)
+            blended.setflags(write=False)
+            return blended
+
+        return self.get_or_compute(
+            ("blend",) + self._gradient_key(gradient, num_midpoints),
+            compute,
+            lambda blended: blended.nbytes,
+        )
+
+    def palette(self, gradient, num_midpoints):
+        """
+        Returns the blended colors of a gradient as a Palette sharing the cached array.
+
+        Parameters:
+        gradient (MultiStopGradient): The gradient to blend.
+        num_midpoints (int): The number of colors between the two ends.
+
+        Returns:
+        Palette: The blended colors.
+        """
+        return color_palette.Palette(self.blend(gradient, num_midpoints))
+
+    def hex_colors(self, gradient, num_midpoints):
+        """
+        Returns the blended colors of a gradient formatted as hex codes.
+
+        Parameters:
+        gradient (MultiStopGradient): The gradient to blend.
+        num_midpoints (int): The number of colors between the two ends.
+
+        Returns:
+        tuple: Hex strings such as '#A1B2C3', one per color.
+        """
+
+        def compute():
+            return tuple(
+                color_codec.format_hex_array(self.blend(gradient, num_midpoints))
+            )
+
+        return self.get_or_compute(
+            ("hex",) + self._gradient_key(gradient, num_midpoints),
+            compute,
+            lambda hex_colors: len(hex_colors) * HEX_STRING_BYTES,
+        )
+
+    def render(self, gradient, num_midpoints, width, height):
+        """
+        Returns a rendered image of a gradient.
+
+        Parameters:
+        gradient (MultiStopGradient): The gradient to render.
+        num_midpoints (int): The number of colors between the two ends.
+        width (int): The width of the image.
+        height (int): The height of the image.
+
+        Returns:
+        Image: An RGB image of its own, copied from the cached one, which callers may
+        modify freely.
+        """
+
+        def compute():
+            if max(num_midpoints, 0) + 2 > width:
+                # More colors than pixel columns: only the visible ones are sampled
+                colors = gradient.samples(num_midpoints)
+            else:
+                colors = self.blend(gradient, num_midpoints)
+            row = gradient_engine.gradient_row(colors, width)
+            return gradient_engine.image_from_row(row, height)
+
+        image = self.get_or_compute(
+            ("image",) + self._gradient_key(gradient, num_midpoints) + (width, height),
+            compute,
+            lambda image: image.width * image.height * 3,
+        )
+        # PIL images cannot be made read-only, so the cached one is never handed out
+        return image.copy()
+
+
+# Cache shared by the GUI and by callers that do not need their own
+default_cache = GradientCache()
@@ -0,0 +1,300 @@
+"""
+Headless gradient engine for Color Fusion.
+
+This module holds the color math and rasterisation used by the Color Fusion GUI, with no
+dependency on Tk or on any widget state. Every function takes its inputs as explicit
+arguments, so it can be imported by servers, batch jobs and worker processes that have
+no display. PIL is imported lazily, only when an image is actually rendered.
+"""
+
+import color_codec
+import color_palette
+import color_spaces
+import gradient_stops
+
+
+def get_rgb_from_hex(hex_code):
+    """
+    Convert a hex color code to an RGB tuple.
+
+    Args:
+        hex_code (str): The color code, as accepted by color_codec.parse_hex: '#RGB',
+            '#RRGGBB' or '#RRGGBBAA' with or without the '#', or a CSS color name.
+
+    Returns:
+        tuple: The corresponding RGB tuple.
+
+    Raises:
+        ValueError: If the hex code is invalid.
+    """
+    return color_codec.parse_hex(hex_code)
+
+
+def blend_colors_array(colors1, colors2, num_midpoints, color_space="srgb"):
+    """
+    Blends many pairs of colors at once into a NumPy array of gradients.
+
+    Every pair gets the same number of intermediate colors, and each value is rounded
+    exactly as 'blend_colors' rounds it (round half to even), so row i of the result
+    matches blend_colors(colors1[i], colors2[i], num_midpoints).
+
+    In the default 'srgb' space the gamma-encoded values are interpolated directly. The
+    other spaces in color_spaces.COLOR_SPACES convert only the two end colors of each pair,
+    interpolate there, and convert the blended colors back in one vectorized pass.
+
+    Parameters:
+    colors1 (array-like): The start colors, shaped (N, 3) or a single (3,) color.
+    colors2 (array-like): The end colors, with the same shape as colors1.
+    num_midpoints (int): The number of intermediate colors between each pair.
+    color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+
+    Returns:
+    ndarray: A C-contiguous uint8 array shaped (N, num_midpoints + 2, 3).
+
+    Raises:
+    ValueError: If the two color arrays do not have the same shape, or the color space
+    is not recognised.
+    """
+    import numpy as np
+
+    start = np.asarray(colors1, dtype=np.float64).reshape(-1, 3)
+    end = np.asarray(colors2, dtype=np.float64).reshape(-1, 3)
+    if start.shape != end.shape:
+        raise ValueError("Start and end color arrays must have the same shape")
+
+    num_steps = max(num_midpoints, 0) + 2
+    ratios = np.arange(num_steps, dtype=np.float64) / (num_steps - 1)
+
+    if color_space != "srgb":
+        start = start.astype(np.uint8)
+        end = end.astype(np.uint8)
+        blended = color_spaces.interpolate(
+            color_spaces.to_space(start, color_space),
+            color_spaces.to_space(end, color_space),
+            ratios,
+            color_space,
+        )
+        result = color_spaces.from_space(blended, color_space)
+        # Keep the end colors exact, whatever rounding the round trip introduced
+        result[:, 0] = start
+        result[:, -1] = end
+        return np.ascontiguousarray(result)
+
+    blended = start[:, None, :] + ratios[None, :, None] * (end - start)[:, None, :]
+    np.rint(blended, out=blended)
+    return blended.astype(np.uint8)
+
+
+def blend_colors(color1, color2, num_midpoints, color_space="srgb"):
+    """
+    Blends two colors into a list of evenly spaced colors.
+
+    This is a thin wrapper around 'blend_colors_array' for a single pair of colors.
+
+    Parameters:
+    color1 (tuple): The RGB tuple of the first color.
+    color2 (tuple): The RGB tuple of the second color.
+    num_midpoints (int): The number of intermediate colors between color1 and color2.
+    color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+
+    Returns:
+    list: A list of RGB tuples, starting with color1 and ending with color2.
+    """
+    blended = blend_colors_array(color1, color2, num_midpoints, color_space)[0]
+    return [tuple(color) for color in blended.tolist()]
+
+
+def blend_palette(color1, color2, num_midpoints, color_space="srgb"):
+    """
+    Same as 'blend_colors', but returns a compact Palette instead of a list of tuples.
+
+    Returns:
+    Palette: The blended colors, starting with color1 and ending with color2.
+    """
+    return color_palette.Palette(
+        blend_colors_array(color1, color2, num_midpoints, color_space)[0]
+    )
+
+
+def band_indices(num_colors, width):
+    """
+    Returns which color of a banded gradient covers each pixel column.
+
+    Each color covers an equal share of the row, and a band starts at the truncated left
+    edge of its rectangle, so band edges fall on the same pixel columns as the rectangles
+    drawn by the 'rectangles' rasteriser. Where bands overlap, the later one wins; with more
+    colors than columns, only the colors that land on a column are ever looked up. The
+    work is proportional to the width, however many colors there are.
+
+    Parameters:
+    num_colors (int): The number of colors in the gradient.
+    width (int): The width of the row in pixels.
+
+    Returns:
+    ndarray: An intp array shaped (width,) of color indices.
+    """
+    import numpy as np
+
+    color_width = width / num_colors
+    columns = np.arange(width)
+
+    # The last band whose start is at or before each column, estimated and then corrected
+    # against the same floating point band starts the rectangles use
+    index = np.ceil((columns + 1) / color_width).astype(np.intp) - 1
+    np.clip(index, 0, num_colors - 1, out=index)
+    index -= (index > 0) & (np.floor(index * color_width) > columns)
+    index += (index < num_colors - 1) & (np.floor((index + 1) * color_width) <= columns)
+    return index
+
+
+def gradient_row(blended_colors, width):
+    """
+    Builds one row of pixels for a banded gradient.
+
+    Each color covers an equal share of the row. Band edges fall on the same pixel columns
+    as the rectangles drawn by the 'rectangles' rasteriser, so both produce identical output.
+
+    Parameters:
+    blended_colors (array-like or GradientSamples): The RGB colors of the bands, from left
+    to right. Float colors, such as those from MultiStopGradient.blend_values, are kept
+    unrounded. Lazy GradientSamples are only sampled at the colors that are visible.
+    width (int): The width of the row in pixels.
+
+    Returns:
+    ndarray: A C-contiguous array shaped (width, 3), of uint8 or of the float colors.
+    """
+    import numpy as np
+
+    if isinstance(blended_colors, gradient_stops.GradientSamples):
+        return blended_colors.take(band_indices(len(blended_colors), width))
+
+    colors = np.asarray(blended_colors)
+    if colors.dtype.kind != "f":
+        colors = colors.astype(np.uint8)
+    colors = colors.reshape(-1, 3)
+    return colors[band_indices(len(colors), width)]
+
+
+def image_from_row(row, height):
+    """
+    Creates an image by replicating a single row of pixels down its full height.
+
+    Parameters:
+    row (ndarray): A uint8 array shaped (width, 3).
+    height (int): The height of the generated image.
+
+    Returns:
+    Image: The generated RGB image.
+    """
+    from PIL import Image
+
+    width = len(row)
+    strip = Image.frombuffer("RGB", (width, 1), row.tobytes(), "raw", "RGB", 0, 1)
+    return strip.resize((width, height), Image.NEAREST)
+
+
+def ppm_from_row(row, height):
+    """
+    Encodes a single row of pixels, replicated down the image, as binary PPM data.
+
+    Tk's PhotoImage reads this format natively, so the GUI can show a gradient as one image
+    without going through PIL.
+
+    Parameters:
+    row (ndarray): A uint8 array shaped (width, 3).
+    height (int): The height of the image.
+
+    Returns:
+    bytes: The PPM image data.
+    """
+    header = f"P6 {len(row)} {height} 255 ".encode("ascii")
+    return header + row.tobytes() * height
+
+
+def ppm_from_pixels(pixels):
+    """
+    Encodes a full image of pixels as binary PPM data, for Tk's PhotoImage.
+
+    Parameters:
+    pixels (ndarray): A uint8 array shaped (height, width, 3).
+
+    Returns:
+    bytes: The PPM image data.
+    """
+    height, width = pixels.shape[:2]
+    return f"P6 {width} {height} 255 ".encode("ascii") + pixels.tobytes()
+
+
+def render_gradient(
+    color1, color2, width, height, num_midpoints, method="row", color_space="srgb"
+):
+    """
+    Renders a horizontal gradient between two RGB colors as an image.
+
+    The colors are blended and laid out as bands of equal width side by side on the image.
+    For a continuous gradient, pass width - 2 as num_midpoints so every column gets its own color.
+
+    Parameters:
+    color1 (tuple): The RGB tuple of the first color.
+    color2 (tuple): The RGB tuple of the second color.
+    width (int): The width of the generated image.
+    height (int): The height of the generated image.
+    num_midpoints (int): The number of intermediate colors in the gradient.
+    method (str): 'row' builds one row of pixels and replicates it down the image;
+        'rectangles' draws one rectangle per color with ImageDraw. Both give identical images.
+    color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+
+    Returns:
+    Image: The generated image with the gradient.
+
+    Raises:
+    ValueError: If the method is not recognised.
+    """
+    if method == "row":
+        blended = blend_colors_array(color1, color2, num_midpoints, color_space)[0]
+        return image_from_row(gradient_row(blended, width), height)
+    if method != "rectangles":
+        raise ValueError(f"Unknown rasterisation method: {method}")
+
+    from PIL import Image, ImageDraw
+
+    gradient_image = Image.new("RGB", (width, height), "#FFFFFF")
+    draw = ImageDraw.Draw(gradient_image)
+
+    blended_colors = blend_colors(color1, color2, num_midpoints, color_space)
+    color_width = width / len(blended_colors)
+
+    for i, color in enumerate(blended_colors):
+        color_hex = color_codec.format_hex(color)
+        draw.rectangle(
+            [i * color_width, 0, (i + 1) * color_width, height], fill=color_hex
+        )
+
+    return gradient_image
+
+
+def generate_gradient(
+    color_one_hex, color_two_hex, width, height, num_midpoints, color_space="srgb"
+):
+    """
+    Generates a gradient image based on two color hex codes.
+
+    Parameters:
+    color_one_hex (str): The hex code of the first color.
+    color_two_hex (str): The hex code of the second color.
+    width (int): The width of the generated image.
+    height (int): The height of the generated image.
+    num_midpoints (int): The number of intermediate colors in the gradient.
+    color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+
+    Returns:
+    Image: The generated image with the gradient.
+    """
+    return render_gradient(
+        get_rgb_from_hex(color_one_hex),
+        get_rgb_from_hex(color_two_hex),
+        width,
+        height,
+        num_midpoints,
+        color_space=color_space,
+    )
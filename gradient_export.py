@@ -0,0 +1,638 @@
+"""
+Streaming image export for Color Fusion gradients.
+
+Gradients are written to disk one band of rows at a time, so peak memory is bounded by a
+single band no matter how large the output image is. PNG files are encoded directly with
+zlib rather than through PIL, which would need the whole image in memory before saving.
+
+Smooth gradients band visibly at 8 bits per channel, so every format can also be written
+with 16 bits per channel, or dithered to 8 bits with an ordered (Bayer) or blue-noise
+threshold matrix. Each row of an exported gradient is identical, so the dithered output
+repeats every matrix height: those few rows are computed once from the unrounded row and
+every band is gathered from them.
+"""
+
+import functools
+import os
+import struct
+import zlib
+
+import gradient_engine
+import gradient_stops
+import gradient_styles
+
+# Target size of one band of rows held in memory during export
+BAND_BYTES = 4 * 1024 * 1024
+
+PNG_SIGNATURE = b"\x89PNG\r\n\x1a\n"
+
+BIT_DEPTHS = (8, 16)
+
+DITHER_METHODS = ("ordered", "blue_noise")
+
+# Side of the square threshold matrices used for dithering
+BAYER_SIZE = 8
+BLUE_NOISE_SIZE = 64
+
+FORMATS_BY_EXTENSION = {
+    ".png": "png",
+    ".ppm": "ppm",
+    ".raw": "raw",
+    ".rgb": "raw",
+}
+
+
+def default_band_height(width, bytes_per_pixel=3):
+    """
+    Returns the number of rows per band that keeps one band close to BAND_BYTES.
+
+    Parameters:
+    width (int): The width of the image in pixels.
+    bytes_per_pixel (int): The number of bytes used by one pixel.
+
+    Returns:
+    int: The number of rows per band, at least 1.
+    """
+    return max(1, BAND_BYTES // (width * bytes_per_pixel))
+
+
+def iter_row_bands(row, height, band_height):
+    """
+    Yields bands of identical rows that together cover the full image height.
+
+    The bands are read-only broadcast views of the row, so no pixel data is copied here.
+
+    Parameters:
+    row (ndarray): A uint8 or uint16 array shaped (width, 3).
+    height (int): The height of the image.
+    band_height (int): The maximum number of rows per band.
+
+    Yields:
+    ndarray: Arrays shaped (rows, width, 3).
+    """
+    import numpy as np
+
+    for top in range(0, height, band_height):
+        yield np.broadcast_to(row, (min(band_height, height - top),) + row.shape)
+
+
+def bayer_matrix(size=BAYER_SIZE):
+    """
+    Builds the ordered dithering threshold matrix of the given size.
+
+    Parameters:
+    size (int): The side of the matrix, a power of two.
+
+    Returns:
+    ndarray: A float64 array shaped (size, size), with thresholds evenly spread over 0-1.
+    """
+    import numpy as np
+
+    matrix = np.zeros((1, 1), dtype=np.int64)
+    while len(matrix) < size:
+        matrix = np.block(
+            [[4 * matrix, 4 * matrix + 2], [4 * matrix + 3, 4 * matrix + 1]]
+        )
+    return (matrix + 0.5) / matrix.size
+
+
+@functools.lru_cache(maxsize=None)
+def blue_noise_matrix(size=BLUE_NOISE_SIZE, sigma=1.5, seed=0):
+    """
+    Builds a tileable blue-noise threshold matrix with the void-and-cluster method.
+
+    Each point's energy is the sum of a toroidal Gaussian over the points placed so far.
+    Starting from an evenly spread set of points, points are ranked by repeatedly removing
+    the one in the tightest cluster (highest energy) and then adding one in the largest void
+    (lowest energy) until the matrix is full. The matrix is built once per process.
+
+    Parameters:
+    size (int): The side of the matrix.
+    sigma (float): The width of the Gaussian, in cells.
+    seed (int): The seed of the initial random points, so the matrix is reproducible.
+
+    Returns:
+    ndarray: A read-only float64 array shaped (size, size), with thresholds evenly spread
+    over 0-1.
+    """
+    import numpy as np
+
+    distances = np.minimum(np.arange(size), size - np.arange(size))
+    kernel = np.exp(-(distances[:, None] ** 2 + distances[None, :] ** 2) / (2 * sigma**2))
+    total = size * size
+
+    def add_energy(energy, index, sign):
+        row, column = divmod(int(index), size)
+        energy += sign * np.roll(kernel, (row, column), axis=(0, 1)).ravel()
+
+    def tightest_cluster(points, energy):
+        return int(np.argmax(np.where(points, energy, -np.inf)))
+
+    def largest_void(points, energy):
+        return int(np.argmin(np.where(points, np.inf, energy)))
+
+    points = np.zeros(total, dtype=bool)
+    points[np.random.default_rng(seed).choice(total, total // 10, replace=False)] = True
+    energy = np.real(
+        np.fft.ifft2(np.fft.fft2(points.reshape(size, size)) * np.fft.fft2(kernel))
+    ).ravel()
+
+    # Move points from clusters into voids until the initial pattern is evenly spread
+    while True:
+        cluster = tightest_cluster(points, energy)
+        points[cluster] = False
+        add_energy(energy, cluster, -1)
+        void = largest_void(points, energy)
+        points[void] = True
+        add_energy(energy, void, 1)
+        if void == cluster:
+            break
+
+    ranks = np.empty(total, dtype=np.int64)
+    initial_count = int(points.sum())
+
+    removed, removed_energy = points.copy(), energy.copy()
+    for rank in range(initial_count - 1, -1, -1):
+        cluster = tightest_cluster(removed, removed_energy)
+        removed[cluster] = False
+        add_energy(removed_energy, cluster, -1)
+        ranks[cluster] = rank
+
+    for rank in range(initial_count, total):
+        void = largest_void(points, energy)
+        points[void] = True
+        add_energy(energy, void, 1)
+        ranks[void] = rank
+
+    matrix = ((ranks + 0.5) / total).reshape(size, size)
+    matrix.flags.writeable = False
+    return matrix
+
+
+def threshold_matrix(method):
+    """
+    Returns the threshold matrix of a dithering method from DITHER_METHODS.
+
+    Raises:
+    ValueError: If the method is unknown.
+    """
+    if method == "ordered":
+        return bayer_matrix()
+    if method == "blue_noise":
+        return blue_noise_matrix()
+    raise ValueError(f"Unknown dithering method: {method}")
+
+
+def quantize(values, bit_depth=8):
+    """
+    Rounds 0-255 color values, such as a row or a band, to the integer type of a bit depth.
+
+    Parameters:
+    values (ndarray): Color values of any shape and numeric type.
+    bit_depth (int): 8 for uint8 output, or 16 for uint16 output scaled to 0-65535.
+
+    Returns:
+    ndarray: A uint8 or uint16 array of the same shape.
+    """
+    import numpy as np
+
+    if bit_depth == 8:
+        if values.dtype == np.uint8:
+            return values
+        return np.rint(np.clip(values, 0, 255)).astype(np.uint8)
+    return np.rint(np.clip(values, 0, 255) * 257).astype(np.uint16)
+
+
+def dither_band(band, top, method):
+    """
+    Dithers one band of unrounded colors to 8 bits.
+
+    This is the general form of 'iter_dithered_bands', for images whose rows differ, such
+    as radial gradients. The threshold matrix is tiled from the top-left of the image.
+
+    Parameters:
+    band (ndarray): Unrounded 0-255 values shaped (rows, width, 3).
+    top (int): The image row of the first row of the band.
+    method (str): One of DITHER_METHODS.
+
+    Returns:
+    ndarray: A uint8 array shaped (rows, width, 3).
+    """
+    import numpy as np
+
+    matrix = threshold_matrix(method)
+    size = len(matrix)
+    rows, width = band.shape[:2]
+    thresholds = matrix[np.arange(top, top + rows) % size][:, np.arange(width) % size]
+    dithered = np.floor(band + thresholds[:, :, None])
+    return np.clip(dithered, 0, 255).astype(np.uint8)
+
+
+def iter_dithered_bands(row, height, band_height, method):
+    """
+    Yields bands of a row dithered to 8 bits, covering the full image height.
+
+    Every pixel becomes floor(value + threshold), with the threshold taken from the
+    method's matrix tiled over the image, so the average of a region keeps the unrounded
+    color. The matrix-height rows that the image repeats are computed in one vectorized
+    pass, and bands are gathered from them.
+
+    Parameters:
+    row (ndarray): Unrounded 0-255 values shaped (width, 3).
+    height (int): The height of the image.
+    band_height (int): The maximum number of rows per band.
+    method (str): One of DITHER_METHODS.
+
+    Yields:
+    ndarray: uint8 arrays shaped (rows, width, 3).
+    """
+    import numpy as np
+
+    matrix = threshold_matrix(method)
+    size = len(matrix)
+    width = len(row)
+    thresholds = np.tile(matrix, (1, -(-width // size)))[:, :width]
+
+    pattern = np.floor(row.astype(np.float64)[None, :, :] + thresholds[:, :, None])
+    pattern = np.clip(pattern, 0, 255).astype(np.uint8)
+
+    for top in range(0, height, band_height):
+        rows = np.arange(top, min(top + band_height, height)) % size
+        yield pattern.take(rows, axis=0)
+
+
+def write_png_chunk(fileobj, chunk_type, data):
+    """
+    Writes one PNG chunk: its length, type, data and CRC.
+    """
+    fileobj.write(struct.pack(">I", len(data)))
+    fileobj.write(chunk_type)
+    fileobj.write(data)
+    fileobj.write(struct.pack(">I", zlib.crc32(data, zlib.crc32(chunk_type))))
+
+
+def _sample_bytes(band, bit_depth):
+    # Big-endian bytes of a band as a uint8 array shaped (rows, bytes per row), the
+    # sample layout shared by PNG and PPM
+    import numpy as np
+
+    if bit_depth == 8:
+        samples = np.asarray(band, dtype=np.uint8)
+    else:
+        samples = np.ascontiguousarray(band, dtype=">u2")
+    return samples.reshape(len(samples), -1).view(np.uint8)
+
+
+def encode_png_data(width, bands, compress_level=6, bit_depth=8):
+    """
+    Filters and compresses row bands into the zlib stream of a PNG image.
+
+    Every row is encoded with the PNG 'Up' filter, which turns runs of repeated rows into
+    zeros and keeps the compressed size of banded gradients tiny.
+
+    The compressor is fully flushed after every band, which makes the compressed bytes of
+    a band depend only on its own data. A band whose filtered bytes equal the previous
+    band's reuses that band's compressed bytes instead of being compressed again, so the
+    cost of periodic images, such as dithered gradients with bands aligned to the
+    dithering matrix, is that of their first few bands.
+
+    Parameters:
+    width (int): The width of the image.
+    bands (iterable): Arrays shaped (rows, width, 3) covering the image from top to bottom.
+    compress_level (int): The zlib compression level.
+    bit_depth (int): 8, or 16 for bands of uint16 samples.
+
+    Yields:
+    tuple: The number of rows in each piece and its compressed bytes. The pieces together
+    form one zlib stream, as stored in the IDAT chunks of a PNG or the fdAT chunks of an
+    animated PNG.
+
+    Raises:
+    ValueError: If the bit depth is not supported.
+    """
+    import numpy as np
+
+    if bit_depth not in BIT_DEPTHS:
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+    row_bytes = width * 3 * bit_depth // 8
+
+    # A raw deflate stream inside a zlib header and Adler-32 trailer written here, since
+    # reused bands never pass through the compressor
+    compressor = zlib.compressobj(compress_level, zlib.DEFLATED, -zlib.MAX_WBITS)
+    checksum = zlib.adler32(b"")
+    previous_row = np.zeros(row_bytes, dtype=np.uint8)
+    previous_data = None
+    yield 0, b"\x78\x9c"
+
+    for band in bands:
+        # 'Up' works on bytes, so 16-bit samples are filtered in their big-endian form
+        scanlines = _sample_bytes(band, bit_depth)
+        filtered = np.empty((len(scanlines), row_bytes + 1), dtype=np.uint8)
+        filtered[:, 0] = 2  # 'Up' filter type
+        np.subtract(scanlines[0], previous_row, out=filtered[0, 1:])
+        np.subtract(scanlines[1:], scanlines[:-1], out=filtered[1:, 1:])
+        previous_row = scanlines[-1].copy()
+
+        data = filtered.tobytes()
+        if data != previous_data:
+            compressed = compressor.compress(data) + compressor.flush(zlib.Z_FULL_FLUSH)
+            previous_data = data
+        checksum = zlib.adler32(data, checksum)
+        yield len(scanlines), compressed
+
+    yield 0, compressor.flush() + struct.pack(">I", checksum)
+
+
+def write_png(fileobj, width, height, bands, compress_level=6, bit_depth=8):
+    """
+    Writes an RGB PNG from an iterable of row bands, encoded with 'encode_png_data'.
+
+    Parameters:
+    fileobj (file): A binary file object to write to.
+    width (int): The width of the image.
+    height (int): The height of the image.
+    bands (iterable): Arrays shaped (rows, width, 3) covering the image from top to bottom.
+    compress_level (int): The zlib compression level.
+    bit_depth (int): 8, or 16 for bands of uint16 samples.
+
+    Raises:
+    ValueError: If the bands do not add up to the declared height, or the bit depth is
+    not supported.
+    """
+    if bit_depth not in BIT_DEPTHS:
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+
+    write_png_header(fileobj, width, height, bit_depth)
+    rows_written = 0
+    for rows, compressed in encode_png_data(width, bands, compress_level, bit_depth):
+        rows_written += rows
+        if rows_written > height:
+            break
+        write_png_chunk(fileobj, b"IDAT", compressed)
+
+    if rows_written != height:
+        raise ValueError(f"Expected {height} rows but received {rows_written}")
+    write_png_chunk(fileobj, b"IEND", b"")
+
+
+def write_png_header(fileobj, width, height, bit_depth=8):
+    """
+    Writes the PNG signature and the IHDR chunk of an RGB image.
+    """
+    fileobj.write(PNG_SIGNATURE)
+    write_png_chunk(
+        fileobj, b"IHDR", struct.pack(">IIBBBBB", width, height, bit_depth, 2, 0, 0, 0)
+    )
+
+
+def write_ppm(fileobj, width, height, bands, bit_depth=8):
+    """
+    Writes a binary (P6) PPM image from an iterable of row bands.
+
+    Parameters:
+    fileobj (file): A binary file object to write to.
+    width (int): The width of the image.
+    height (int): The height of the image.
+    bands (iterable): Arrays shaped (rows, width, 3) covering the image from top to bottom.
+    bit_depth (int): 8, or 16 for bands of uint16 samples (a maximum value of 65535).
+    """
+    max_value = (1 << bit_depth) - 1
+    fileobj.write(f"P6\n{width} {height}\n{max_value}\n".encode("ascii"))
+    write_raw(fileobj, width, height, bands, bit_depth)
+
+
+def write_raw(fileobj, width, height, bands, bit_depth=8):
+    """
+    Writes headerless interleaved RGB samples from an iterable of row bands.
+
+    Parameters:
+    fileobj (file): A binary file object to write to.
+    width (int): The width of the image.
+    height (int): The height of the image.
+    bands (iterable): Arrays shaped (rows, width, 3) covering the image from top to bottom.
+    bit_depth (int): 8, or 16 for bands of uint16 samples, written big-endian.
+
+    Raises:
+    ValueError: If the bands do not add up to the declared height, or the bit depth is
+    not supported.
+    """
+    if bit_depth not in BIT_DEPTHS:
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+
+    rows_written = 0
+    for band in bands:
+        fileobj.write(_sample_bytes(band, bit_depth).tobytes())
+        rows_written += len(band)
+
+    if rows_written != height:
+        raise ValueError(f"Expected {height} rows but received {rows_written}")
+
+
+WRITERS = {
+    "png": write_png,
+    "ppm": write_ppm,
+    "raw": write_raw,
+}
+
+
+def format_from_path(file_path):
+    """
+    Determines the export format from a file extension.
+
+    Parameters:
+    file_path (str): The path of the output file.
+
+    Returns:
+    str: One of 'png', 'ppm' or 'raw'.
+
+    Raises:
+    ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in FORMATS_BY_EXTENSION:
+        raise ValueError(f"Unsupported export format: {extension or file_path}")
+    return FORMATS_BY_EXTENSION[extension]
+
+
+def _export_writer(file_path, width, height, file_format, bit_depth, dither):
+    # Validates the export options and returns the writer of the format
+    if width < 1 or height < 1:
+        raise ValueError("Export width and height must be at least 1 pixel")
+    if bit_depth not in BIT_DEPTHS:
+        raise ValueError(f"Unsupported bit depth: {bit_depth}")
+    if dither is not None:
+        if dither not in DITHER_METHODS:
+            raise ValueError(f"Unknown dithering method: {dither}")
+        if bit_depth != 8:
+            raise ValueError("Dithering only applies to 8-bit exports")
+
+    writer = WRITERS.get(file_format or format_from_path(file_path))
+    if writer is None:
+        raise ValueError(f"Unsupported export format: {file_format}")
+    return writer
+
+
+def export_gradient(
+    file_path,
+    color1,
+    color2,
+    width,
+    height,
+    num_midpoints,
+    file_format=None,
+    band_height=None,
+    color_space="srgb",
+    bit_depth=8,
+    dither=None,
+):
+    """
+    Streams a horizontal gradient between two RGB colors to an image file.
+
+    Only one row of the gradient is computed, and it is written out band by band, so
+    exports of tens of thousands of pixels per side use a few megabytes of memory. Only
+    the colors that land on a pixel column are sampled, so millions of intermediate colors
+    cost no more than a few thousand.
+
+    Parameters:
+    file_path (str): The path of the output file.
+    color1 (tuple): The RGB tuple of the first color.
+    color2 (tuple): The RGB tuple of the second color.
+    width (int): The width of the exported image.
+    height (int): The height of the exported image.
+    num_midpoints (int): The number of intermediate colors in the gradient.
+    file_format (str): 'png', 'ppm' or 'raw'. Inferred from the extension when omitted.
+    band_height (int): The number of rows written per band. Chosen automatically when omitted.
+    color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+    bit_depth (int): The bits per channel, 8 or 16.
+    dither (str): One of DITHER_METHODS to dither 8-bit output, or None to round.
+
+    Raises:
+    ValueError: If the size, format, bit depth or dithering method is invalid.
+    """
+    gradient = gradient_stops.MultiStopGradient.from_two_colors(color1, color2, color_space)
+    export_styled(
+        file_path,
+        gradient,
+        num_midpoints,
+        width,
+        height,
+        file_format=file_format,
+        band_height=band_height,
+        bit_depth=bit_depth,
+        dither=dither,
+    )
+
+
+def export_blended(
+    file_path,
+    blended_colors,
+    width,
+    height,
+    file_format=None,
+    band_height=None,
+    bit_depth=8,
+    dither=None,
+):
+    """
+    Streams a horizontal gradient made of already blended colors to an image file.
+
+    This is the export path for gradients that are not a simple pair of colors, such as
+    multi-stop gradients; 'export_gradient' calls it after blending its two colors. For
+    16-bit or dithered output, pass unrounded colors such as those returned by
+    MultiStopGradient.blend_values; 8-bit colors work too but gain nothing.
+
+    Parameters:
+    file_path (str): The path of the output file.
+    blended_colors (array-like or GradientSamples): The RGB colors of the bands, from left
+    to right.
+    width (int): The width of the exported image.
+    height (int): The height of the exported image.
+    file_format (str): 'png', 'ppm' or 'raw'. Inferred from the extension when omitted.
+    band_height (int): The number of rows written per band. Chosen automatically when omitted.
+    bit_depth (int): The bits per channel, 8 or 16.
+    dither (str): One of DITHER_METHODS to dither 8-bit output, or None to round.
+
+    Raises:
+    ValueError: If the size, format, bit depth or dithering method is invalid.
+    """
+    writer = _export_writer(file_path, width, height, file_format, bit_depth, dither)
+
+    row = gradient_engine.gradient_row(blended_colors, width)
+    band_height = band_height or default_band_height(width, 3 * bit_depth // 8)
+    if dither is not None:
+        # Bands that start on the same matrix row hold the same pixels, which lets the PNG
+        # writer reuse their compressed bytes
+        size = len(threshold_matrix(dither))
+        band_height = max(size, band_height - band_height % size)
+        bands = iter_dithered_bands(row, height, band_height, dither)
+    else:
+        bands = iter_row_bands(quantize(row, bit_depth), height, band_height)
+
+    with open(file_path, "wb") as fileobj:
+        writer(fileobj, width, height, bands, bit_depth=bit_depth)
+
+
+def export_styled(
+    file_path,
+    gradient,
+    num_midpoints,
+    width,
+    height,
+    style="horizontal",
+    file_format=None,
+    band_height=None,
+    bit_depth=8,
+    dither=None,
+):
+    """
+    Streams a gradient in any of gradient_styles.STYLES to an image file.
+
+    Horizontal gradients go through 'export_blended'. Other styles are rasterised band by
+    band with gradient_styles.StyleRasteriser, so memory stays bounded by a band here too.
+
+    Parameters:
+    file_path (str): The path of the output file.
+    gradient (MultiStopGradient): The gradient to export.
+    num_midpoints (int): The number of intermediate colors in the gradient.
+    width (int): The width of the exported image.
+    height (int): The height of the exported image.
+    style (str): One of the keys of gradient_styles.STYLES.
+    file_format (str): 'png', 'ppm' or 'raw'. Inferred from the extension when omitted.
+    band_height (int): The number of rows written per band. Chosen automatically when omitted.
+    bit_depth (int): The bits per channel, 8 or 16.
+    dither (str): One of DITHER_METHODS to dither 8-bit output, or None to round.
+
+    Raises:
+    ValueError: If the style, size, format, bit depth or dithering method is invalid.
+    """
+    precise = bit_depth != 8 or dither is not None
+    if style == "horizontal":
+        # Only the colors that land on a pixel column are sampled
+        export_blended(
+            file_path,
+            gradient.samples(num_midpoints, precise),
+            width,
+            height,
+            file_format,
+            band_height,
+            bit_depth=bit_depth,
+            dither=dither,
+        )
+        return
+
+    writer = _export_writer(file_path, width, height, file_format, bit_depth, dither)
+    rasteriser = gradient_styles.StyleRasteriser(
+        gradient, num_midpoints, style, width, height, precise=precise
+    )
+
+    # The float fields behind a band take several times the size of its pixels
+    band_height = band_height or default_band_height(width, 24)
+    if dither is not None:
+        bands = (
+            dither_band(band, top, dither) for top, band in rasteriser.iter_bands(band_height)
+        )
+    else:
+        bands = (quantize(band, bit_depth) for _, band in rasteriser.iter_bands(band_height))
+
+    with open(file_path, "wb") as fileobj:
+        writer(fileobj, width, height, bands, bit_depth=bit_depth)
@@ -0,0 +1,373 @@
+"""
+Local HTTP service for rendering Color Fusion gradients.
+
+A small asyncio server built on the standard library. Rendering runs in a process pool so
+the event loop stays responsive, identical requests that arrive while a render is in flight
+share that render instead of starting another, and finished responses are kept in an LRU
+cache, so a burst of identical requests costs a single render.
+
+Endpoints (all GET):
+
+- /gradient.png?c1=FF0000&c2=0000FF&steps=10&w=512&h=128&space=oklab&style=radial
+- /palette.json?c1=FF0000&c2=0000FF&steps=10&space=oklab
+- /stats: cache and coalescing counters as JSON
+
+Instead of c1 and c2, 'stops' takes 'position:hex' pairs separated by ';'. 'steps' is the
+number of intermediate colors, as on the GUI slider. A '#' in a color must be sent as %23,
+or left out.
+
+Usage:
+    python gradient_server.py --port 8765
+"""
+
+import argparse
+import asyncio
+import concurrent.futures
+import io
+import json
+import multiprocessing
+import urllib.parse
+
+import color_codec
+import color_spaces
+import gradient_cache
+import gradient_engine
+import gradient_export
+import gradient_stops
+import gradient_styles
+
+DEFAULT_MIDPOINTS = 10
+DEFAULT_WIDTH = 512
+DEFAULT_HEIGHT = 128
+
+# Limits that keep a single request from tying up a worker or the cache. /palette.json
+# returns every color, so the steps stay well below the GUI's limit, which only samples
+# the colors it draws.
+MAX_DIMENSION = 8192
+MAX_PIXELS = 16 * 1024 * 1024
+MAX_MIDPOINTS = 100000
+MAX_HEADER_LINES = 100
+
+# Rendered responses depend only on their URL, so clients and proxies may keep them. Errors
+# and the live counters of /stats must not be cached.
+RENDER_CACHE_CONTROL = "public, max-age=86400"
+NO_CACHE_CONTROL = "no-store"
+
+STATUS_TEXT = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    405: "Method Not Allowed",
+    414: "URI Too Long",
+    431: "Request Header Fields Too Large",
+    500: "Internal Server Error",
+}
+
+
+def render_png(stops, num_midpoints, color_space, width, height, style="horizontal"):
+    """
+    Renders a gradient to PNG bytes. Runs in a worker process.
+
+    Returns:
+    bytes: The encoded PNG image.
+    """
+    gradient = gradient_stops.MultiStopGradient(stops, color_space)
+    rasteriser = gradient_styles.StyleRasteriser(
+        gradient, num_midpoints, style, width, height
+    )
+    buffer = io.BytesIO()
+    gradient_export.write_png(
+        buffer,
+        width,
+        height,
+        (
+            band
+            for _, band in rasteriser.iter_bands(gradient_export.default_band_height(width))
+        ),
+    )
+    return buffer.getvalue()
+
+
+def render_palette(stops, num_midpoints, color_space):
+    """
+    Renders the blended colors of a gradient as JSON bytes. Runs in a worker process.
+
+    Returns:
+    bytes: A JSON object with the list of hex colors.
+    """
+    gradient = gradient_stops.MultiStopGradient(stops, color_space)
+    colors = color_codec.format_hex_array(gradient.blend(num_midpoints))
+    return json.dumps(
+        {"color_space": color_space, "midpoints": num_midpoints, "colors": colors}
+    ).encode("utf-8")
+
+
+def _int_param(query, name, default, minimum, maximum):
+    value = query.get(name, [None])[0]
+    if value is None or value == "":
+        return default
+    number = int(value)
+    if not minimum <= number <= maximum:
+        raise ValueError(f"'{name}' must be between {minimum} and {maximum}")
+    return number
+
+
+def parse_gradient_params(query):
+    """
+    Parses the gradient described by a request's query parameters.
+
+    Parameters:
+    query (dict): The parsed query string, as returned by urllib.parse.parse_qs.
+
+    Returns:
+    tuple: The stops as a tuple of (position, RGB tuple) pairs, the number of intermediate
+    colors and the color space.
+
+    Raises:
+    ValueError: If a parameter is missing or invalid.
+    """
+    if "stops" in query:
+        stops = []
+        for item in query["stops"][0].split(";"):
+            if not item.strip():
+                continue
+            position, _, color = item.partition(":")
+            stops.append((float(position), gradient_engine.get_rgb_from_hex(color.strip())))
+        if not stops:
+            raise ValueError("'stops' must list at least one stop")
+    elif "c1" in query and "c2" in query:
+        stops = [
+            (0.0, gradient_engine.get_rgb_from_hex(query["c1"][0].strip())),
+            (1.0, gradient_engine.get_rgb_from_hex(query["c2"][0].strip())),
+        ]
+    else:
+        raise ValueError("Either 'stops' or both 'c1' and 'c2' are required")
+
+    num_midpoints = _int_param(query, "steps", DEFAULT_MIDPOINTS, 0, MAX_MIDPOINTS)
+    color_space = query.get("space", ["srgb"])[0]
+    if color_space not in color_spaces.COLOR_SPACES:
+        raise ValueError(f"Unknown color space: {color_space}")
+
+    # Validate positions here rather than in the worker
+    gradient_stops.MultiStopGradient(stops, color_space)
+    return tuple(stops), num_midpoints, color_space
+
+
+class GradientServer:
+    """
+    Serves gradient images and palettes over HTTP, rendering in a process pool.
+    """
+
+    def __init__(self, workers=None, cache=None):
+        """
+        Parameters:
+        workers (int): The number of worker processes. Defaults to the number of CPUs.
+        cache (GradientCache): The response cache. A new 256 MB cache is used when omitted.
+        """
+        # Workers are spawned rather than forked: a forked worker would inherit the open
+        # client sockets and keep connections from closing
+        self.executor = concurrent.futures.ProcessPoolExecutor(
+            max_workers=workers, mp_context=multiprocessing.get_context("spawn")
+        )
+        self.cache = cache or gradient_cache.GradientCache(
+            max_entries=1024, max_bytes=256 * 1024 * 1024
+        )
+        self.in_flight = {}
+        self.renders = 0
+        self.coalesced = 0
+
+    def close(self):
+        """
+        Shuts down the worker processes.
+        """
+        self.executor.shutdown(cancel_futures=True)
+
+    async def render(self, key, function, *args):
+        """
+        Returns the response body for a key, rendering it in the pool only when needed.
+
+        Cached bodies are returned directly. If an identical render is already running, this
+        waits for it instead of starting another.
+
+        Parameters:
+        key (hashable): Identifies the response.
+        function (callable): The module-level worker function producing the body.
+        args: The arguments for the worker function.
+
+        Returns:
+        bytes: The response body.
+        """
+        body = self.cache.get(key)
+        if body is not None:
+            return body
+
+        pending = self.in_flight.get(key)
+        if pending is not None:
+            self.coalesced += 1
+            return await asyncio.shield(pending)
+
+        loop = asyncio.get_running_loop()
+        pending = loop.run_in_executor(self.executor, function, *args)
+        self.in_flight[key] = pending
+        self.renders += 1
+        try:
+            body = await asyncio.shield(pending)
+        finally:
+            del self.in_flight[key]
+
+        self.cache.put(key, body, len(body))
+        return body
+
+    async def dispatch(self, method, target):
+        """
+        Routes a request to its endpoint.
+
+        Parameters:
+        method (str): The HTTP method.
+        target (str): The request target, with its query string.
+
+        Returns:
+        tuple: The status code, content type, body and Cache-Control value of the response.
+        """
+        if method not in ("GET", "HEAD"):
+            return (
+                405,
+                "application/json",
+                b'{"error": "Only GET is supported"}',
+                NO_CACHE_CONTROL,
+            )
+
+        url = urllib.parse.urlsplit(target)
+        query = urllib.parse.parse_qs(url.query)
+
+        try:
+            if url.path == "/gradient.png":
+                stops, num_midpoints, color_space = parse_gradient_params(query)
+                width = _int_param(query, "w", DEFAULT_WIDTH, 1, MAX_DIMENSION)
+                height = _int_param(query, "h", DEFAULT_HEIGHT, 1, MAX_DIMENSION)
+                if width * height > MAX_PIXELS:
+                    raise ValueError(f"Images are limited to {MAX_PIXELS} pixels")
+                style = query.get("style", ["horizontal"])[0]
+                if style not in gradient_styles.STYLES:
+                    raise ValueError(f"Unknown gradient style: {style}")
+                args = (stops, num_midpoints, color_space, width, height, style)
+                body = await self.render(("png",) + args, render_png, *args)
+                return 200, "image/png", body, RENDER_CACHE_CONTROL
+
+            if url.path == "/palette.json":
+                args = parse_gradient_params(query)
+                body = await self.render(("palette",) + args, render_palette, *args)
+                return 200, "application/json", body, RENDER_CACHE_CONTROL
+
+            if url.path == "/stats":
+                stats = dict(self.cache.stats())
+                stats.update(
+                    renders=self.renders,
+                    coalesced=self.coalesced,
+                    in_flight=len(self.in_flight),
+                )
+                body = json.dumps(stats).encode("utf-8")
+                return 200, "application/json", body, NO_CACHE_CONTROL
+        except ValueError as e:
+            body = json.dumps({"error": str(e)}).encode("utf-8")
+            return 400, "application/json", body, NO_CACHE_CONTROL
+
+        return 404, "application/json", b'{"error": "Not found"}', NO_CACHE_CONTROL
+
+    async def handle_connection(self, reader, writer):
+        """
+        Handles one HTTP connection: reads a request, writes the response and closes it.
+        """
+        try:
+            # readline raises ValueError for a line longer than the stream limit, 64 KiB,
+            # after dropping what it read of the line
+            status = None
+            try:
+                request_line = await reader.readline()
+            except ValueError:
+                request_line, status = b"", 414
+
+            # Headers are not needed, but are read to the end even after an overlong line,
+            # since closing with unread input resets the connection before the response
+            # arrives
+            for _ in range(MAX_HEADER_LINES):
+                try:
+                    if (await reader.readline()) in (b"\r\n", b"\n", b""):
+                        break
+                except ValueError:
+                    status = status or 431
+            else:
+                status = status or 431
+
+            if status is not None:
+                method = "GET"
+                content_type, cache_control = "application/json", NO_CACHE_CONTROL
+                body = json.dumps({"error": STATUS_TEXT[status]}).encode("utf-8")
+            else:
+                parts = request_line.decode("latin-1").split()
+                if len(parts) != 3:
+                    return
+
+                method, target, _ = parts
+                try:
+                    status, content_type, body, cache_control = await self.dispatch(
+                        method, target
+                    )
+                except Exception as e:
+                    status, content_type = 500, "application/json"
+                    cache_control = NO_CACHE_CONTROL
+                    error = f"{type(e).__name__}: {e}"
+                    body = json.dumps({"error": error}).encode("utf-8")
+
+            headers = (
+                f"HTTP/1.1 {status} {STATUS_TEXT[status]}\r\n"
+                f"Content-Type: {content_type}\r\n"
+                f"Content-Length: {len(body)}\r\n"
+                f"Cache-Control: {cache_control}\r\n"
+                "Connection: close\r\n\r\n"
+            )
+            writer.write(headers.encode("latin-1"))
+            if method != "HEAD":
+                writer.write(body)
+            await writer.drain()
+        except ConnectionError:
+            pass
+        finally:
+            writer.close()
+
+    async def serve(self, host="127.0.0.1", port=8765):
+        """
+        Serves requests until cancelled.
+        """
+        server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            await server.serve_forever()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(
+        description="Serve Color Fusion gradients and palettes over HTTP."
+    )
+    parser.add_argument("--host", default="127.0.0.1", help="address to listen on")
+    parser.add_argument("--port", type=int, default=8765, help="port to listen on")
+    parser.add_argument(
+        "-j",
+        "--workers",
+        type=int,
+        default=None,
+        help="number of worker processes (default: number of CPUs)",
+    )
+    args = parser.parse_args(argv)
+
+    server = GradientServer(workers=args.workers)
+    print(f"Serving gradients on http://{args.host}:{args.port}/")
+    try:
+        asyncio.run(server.serve(args.host, args.port))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.close()
+
+
+if __name__ == "__main__":
+    main()
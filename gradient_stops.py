@@ -0,0 +1,377 @@
+"""
+Multi-stop gradients for Color Fusion.
+
+A gradient is a list of color stops at positions between 0 and 1, kept sorted by position.
+Sampling finds the surrounding pair of stops with a binary search, so a single sample costs
+O(log n) in the number of stops, and 'sample_many' does the same for many positions at once
+with NumPy. 'sample_values' returns the same colors unrounded, for high-bit-depth export.
+The classic two-color gradient is simply a gradient with stops at 0 and 1.
+
+'samples' gives the evenly spaced colors of 'blend' as a lazy GradientSamples sequence
+instead, for step counts in the millions: colors are computed only when they are indexed or
+iterated, in chunks, so memory does not grow with the number of steps.
+"""
+
+import bisect
+import operator
+
+import color_palette
+import color_spaces
+
+
+class MultiStopGradient:
+    """
+    A gradient defined by color stops at positions in the range 0-1.
+
+    Stops that share a position form a hard edge: positions before it take the earlier
+    stop's segment and positions at or after it take the later one.
+    """
+
+    def __init__(self, stops=(), color_space="srgb"):
+        """
+        Parameters:
+        stops (iterable): (position, color) pairs, in any order.
+        color_space (str): The space to interpolate in, one of color_spaces.COLOR_SPACES.
+        """
+        if color_space not in color_spaces.COLOR_SPACES:
+            raise ValueError(f"Unknown color space: {color_space}")
+
+        self.color_space = color_space
+        self.positions = []
+        self.colors = []
+        self._segments = None
+
+        for position, color in stops:
+            self.add_stop(position, color)
+
+    @classmethod
+    def from_two_colors(cls, color1, color2, color_space="srgb"):
+        """
+        Creates the classic two-color gradient, with color1 at 0 and color2 at 1.
+        """
+        return cls([(0.0, color1), (1.0, color2)], color_space)
+
+    def __len__(self):
+        return len(self.positions)
+
+    @property
+    def stops(self):
+        """
+        list: The (position, color) pairs, sorted by position.
+        """
+        return list(zip(self.positions, self.colors))
+
+    def add_stop(self, position, color):
+        """
+        Inserts a stop, keeping the stops sorted by position.
+
+        Parameters:
+        position (float): The position of the stop, from 0 to 1.
+        color (tuple): The RGB tuple of the stop.
+
+        Returns:
+        int: The index at which the stop was inserted.
+
+        Raises:
+        ValueError: If the position is outside the range 0-1.
+        """
+        position = float(position)
+        if not 0.0 <= position <= 1.0:
+            raise ValueError("Stop position must be between 0 and 1")
+
+        index = bisect.bisect_right(self.positions, position)
+        self.positions.insert(index, position)
+        self.colors.insert(index, tuple(color))
+        self._segments = None
+        return index
+
+    def remove_stop(self, index):
+        """
+        Removes the stop at the given index and returns it as a (position, color) pair.
+        """
+        stop = (self.positions.pop(index), self.colors.pop(index))
+        self._segments = None
+        return stop
+
+    def move_stop(self, index, position):
+        """
+        Moves a stop to a new position, keeping its color.
+
+        Returns:
+        int: The new index of the stop.
+        """
+        _, color = self.remove_stop(index)
+        return self.add_stop(position, color)
+
+    def set_color(self, index, color):
+        """
+        Replaces the color of the stop at the given index.
+        """
+        self.colors[index] = tuple(color)
+        self._segments = None
+
+    def _segment_arrays(self):
+        # Stop positions plus the start and end value of every segment in the interpolation space
+        if self._segments is None:
+            import numpy as np
+
+            if not self.positions:
+                raise ValueError("Gradient has no color stops")
+
+            positions = np.array(self.positions, dtype=np.float64)
+            colors = np.array(self.colors, dtype=np.uint8).reshape(-1, 3)
+            if len(colors) == 1:
+                positions = np.append(positions, positions)
+                colors = np.concatenate([colors, colors])
+
+            if self.color_space == "srgb":
+                values = colors.astype(np.float64)
+            else:
+                values = color_spaces.to_space(colors, self.color_space)
+
+            starts, ends = color_spaces.align_hues(
+                values[:-1], values[1:], self.color_space
+            )
+            self._segments = (positions, starts, ends - starts)
+        return self._segments
+
+    def sample(self, position):
+        """
+        Returns the color of the gradient at a single position.
+
+        Parameters:
+        position (float): The position to sample. Values outside the stops are clamped.
+
+        Returns:
+        tuple: The RGB tuple at that position.
+        """
+        if self.color_space != "srgb":
+            return tuple(self.sample_many([position])[0].tolist())
+
+        if not self.positions:
+            raise ValueError("Gradient has no color stops")
+        if len(self.positions) == 1:
+            return self.colors[0]
+
+        position = min(max(position, self.positions[0]), self.positions[-1])
+        index = bisect.bisect_right(self.positions, position) - 1
+        index = min(max(index, 0), len(self.positions) - 2)
+
+        left, right = self.positions[index], self.positions[index + 1]
+        if right <= left:
+            return self.colors[index + 1]
+
+        ratio = (position - left) / (right - left)
+        color1, color2 = self.colors[index], self.colors[index + 1]
+        return (
+            round(color1[0] + ratio * (color2[0] - color1[0])),
+            round(color1[1] + ratio * (color2[1] - color1[1])),
+            round(color1[2] + ratio * (color2[2] - color1[2])),
+        )
+
+    def _interpolate(self, positions):
+        # Values in the interpolation space at each position, before conversion to sRGB
+        import numpy as np
+
+        stop_positions, starts, deltas = self._segment_arrays()
+        positions = np.clip(
+            np.asarray(positions, dtype=np.float64).ravel(),
+            stop_positions[0],
+            stop_positions[-1],
+        )
+
+        index = np.searchsorted(stop_positions, positions, side="right") - 1
+        np.clip(index, 0, len(starts) - 1, out=index)
+
+        left = stop_positions[index]
+        span = stop_positions[index + 1] - left
+        has_span = span > 0
+        ratios = np.where(
+            has_span, (positions - left) / np.where(has_span, span, 1.0), 1.0
+        )
+
+        return starts[index] + ratios[:, None] * deltas[index]
+
+    def sample_many(self, positions):
+        """
+        Returns the colors of the gradient at many positions in one vectorized call.
+
+        Parameters:
+        positions (array-like): The positions to sample. Values outside the stops are clamped.
+
+        Returns:
+        ndarray: A uint8 array shaped (len(positions), 3).
+        """
+        import numpy as np
+
+        values = self._interpolate(positions)
+        if self.color_space == "srgb":
+            np.rint(values, out=values)
+            return values.astype(np.uint8)
+        return color_spaces.from_space(
+            color_spaces.wrap_hues(values, self.color_space), self.color_space
+        )
+
+    def sample_values(self, positions):
+        """
+        Same as 'sample_many', but returns the colors unrounded.
+
+        Parameters:
+        positions (array-like): The positions to sample. Values outside the stops are clamped.
+
+        Returns:
+        ndarray: A float64 array shaped (len(positions), 3), in the range 0-255.
+        """
+        values = color_spaces.wrap_hues(self._interpolate(positions), self.color_space)
+        return color_spaces.from_space_values(values, self.color_space)
+
+    def blend(self, num_midpoints):
+        """
+        Samples the gradient at evenly spaced positions from 0 to 1.
+
+        With two stops at 0 and 1 this gives the same colors as gradient_engine.blend_colors.
+
+        Parameters:
+        num_midpoints (int): The number of colors between the two ends.
+
+        Returns:
+        ndarray: A uint8 array shaped (num_midpoints + 2, 3).
+        """
+        import numpy as np
+
+        num_steps = max(num_midpoints, 0) + 2
+        return self.sample_many(np.arange(num_steps, dtype=np.float64) / (num_steps - 1))
+
+    def blend_values(self, num_midpoints):
+        """
+        Same as 'blend', but returns the colors unrounded, as a float64 array.
+        """
+        import numpy as np
+
+        num_steps = max(num_midpoints, 0) + 2
+        return self.sample_values(np.arange(num_steps, dtype=np.float64) / (num_steps - 1))
+
+    def blend_colors(self, num_midpoints):
+        """
+        Same as 'blend', but returns a list of RGB tuples.
+        """
+        return [tuple(color) for color in self.blend(num_midpoints).tolist()]
+
+    def blend_palette(self, num_midpoints):
+        """
+        Same as 'blend', but returns a compact Palette.
+        """
+        return color_palette.Palette(self.blend(num_midpoints))
+
+    def samples(self, num_midpoints, precise=False):
+        """
+        Same as 'blend', but returns a lazy GradientSamples sequence that computes colors
+        only when they are used.
+
+        Parameters:
+        num_midpoints (int): The number of colors between the two ends.
+        precise (bool): Whether colors are unrounded, as from 'blend_values'.
+
+        Returns:
+        GradientSamples: The colors.
+        """
+        return GradientSamples(self, num_midpoints, precise)
+
+
+class GradientSamples:
+    """
+    A lazy read-only sequence of the evenly spaced colors of a gradient.
+
+    Color i is sampled at position i / (len - 1), exactly as 'blend' samples it, but only
+    when it is used: indexing samples single colors, slices and index arrays are sampled
+    in one vectorized call, and iteration works through CHUNK_SIZE colors at a time. The
+    sequence itself holds nothing but the gradient, so millions of steps cost no memory.
+    """
+
+    # Number of colors sampled at a time while iterating
+    CHUNK_SIZE = color_palette.ITER_CHUNK
+
+    def __init__(self, gradient, num_midpoints, precise=False):
+        """
+        Parameters:
+        gradient (MultiStopGradient): The gradient to sample. Later changes to its stops
+        are seen by the sequence.
+        num_midpoints (int): The number of colors between the two ends.
+        precise (bool): Whether colors are unrounded float64 values, as from
+        'blend_values', instead of uint8 colors.
+        """
+        self.gradient = gradient
+        self.precise = precise
+        self._length = max(num_midpoints, 0) + 2
+
+    def __len__(self):
+        return self._length
+
+    def __repr__(self):
+        return f"GradientSamples({self._length} colors)"
+
+    def take(self, indices):
+        """
+        Samples the colors at the given indices.
+
+        Parameters:
+        indices (array-like): Color indices of any shape. Negative indices count from the end.
+
+        Returns:
+        ndarray: The colors shaped indices.shape + (3,), uint8 or float64 as chosen with
+        'precise'.
+
+        Raises:
+        IndexError: If an index is out of range.
+        """
+        import numpy as np
+
+        indices = np.asarray(indices, dtype=np.intp)
+        if indices.size and (
+            indices.min() < -self._length or indices.max() >= self._length
+        ):
+            raise IndexError("Gradient sample index out of range")
+        positions = np.where(indices < 0, indices + self._length, indices) / (
+            self._length - 1
+        )
+        if self.precise:
+            colors = self.gradient.sample_values(positions)
+        else:
+            colors = self.gradient.sample_many(positions)
+        return colors.reshape(indices.shape + (3,))
+
+    def __getitem__(self, index):
+        import numpy as np
+
+        if isinstance(index, slice):
+            colors = self.take(np.arange(*index.indices(self._length)))
+            return colors if self.precise else color_palette.Palette(colors)
+        if isinstance(index, np.ndarray):
+            return self.take(index)
+
+        index = operator.index(index)
+        if not -self._length <= index < self._length:
+            raise IndexError("Gradient sample index out of range")
+        color = self.take([index])[0].tolist()
+        return tuple(color)
+
+    def iter_chunks(self, chunk_size=None):
+        """
+        Yields the colors as consecutive arrays of chunk_size colors; the last may be shorter.
+
+        Parameters:
+        chunk_size (int): The number of colors per chunk. Defaults to CHUNK_SIZE.
+
+        Yields:
+        ndarray: Colors shaped (chunk_size, 3), uint8 or float64 as chosen with 'precise'.
+        """
+        import numpy as np
+
+        chunk_size = chunk_size or self.CHUNK_SIZE
+        for start in range(0, self._length, chunk_size):
+            yield self.take(np.arange(start, min(start + chunk_size, self._length)))
+
+    def __iter__(self):
+        for chunk in self.iter_chunks():
+            for red, green, blue in chunk.tolist():
+                yield red, green, blue
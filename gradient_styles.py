@@ -0,0 +1,243 @@
+"""
+Gradient styles other than left-to-right bands.
+
+Every style maps each pixel to a color through a field computed for a whole band of rows
+at once with NumPy: the column or row for the linear styles, the distance from the center
+for 'radial', the angle around the center for 'conic', and both coordinates for the
+four-corner 'bilinear' style. The banded styles quantize their field into the same number
+of equal bands as the horizontal gradient and look the colors up in the blended palette;
+'bilinear' interpolates between its corner colors in the gradient's color space.
+
+StyleRasteriser renders any style band by band, so the GUI preview (one band covering the
+canvas) and streamed exports (many bands) share the same code. Gradients with more than
+LAZY_STEPS steps are not blended up front; their colors are sampled from a lazy
+GradientSamples sequence only where a pixel uses them.
+"""
+
+import color_spaces
+import gradient_engine
+import gradient_stops
+
+# Gradients with more steps than this are sampled per pixel instead of blended up front
+LAZY_STEPS = 1 << 16
+
+# Gradient styles offered in the GUI, with their display names
+STYLES = {
+    "horizontal": "Horizontal",
+    "vertical": "Vertical",
+    "radial": "Radial",
+    "conic": "Conic",
+    "bilinear": "Four Corners",
+}
+
+
+def corner_colors(gradient):
+    """
+    Chooses the four corner colors of a bilinear gradient from its stops.
+
+    The first and last stops are the top-left and top-right corners. The bottom-left and
+    bottom-right corners are the first and last of the stops between them; with no stops in
+    between, the bottom corners swap the top ones so the colors meet diagonally.
+
+    Parameters:
+    gradient (MultiStopGradient): The gradient whose stops are used.
+
+    Returns:
+    tuple: The RGB tuples of the top-left, top-right, bottom-left and bottom-right corners.
+
+    Raises:
+    ValueError: If the gradient has no stops.
+    """
+    colors = gradient.colors
+    if not colors:
+        raise ValueError("Gradient has no color stops")
+
+    middle = colors[1:-1]
+    if middle:
+        return colors[0], colors[-1], middle[0], middle[-1]
+    return colors[0], colors[-1], colors[-1], colors[0]
+
+
+def position_field(style, width, height, top, rows):
+    """
+    Computes the gradient position of every pixel in a band of rows.
+
+    Positions are measured at pixel centers. 'radial' is 0 at the center of the image and 1
+    at its corners; 'conic' runs clockwise from 0 at the top of the center to 1.
+
+    Parameters:
+    style (str): 'horizontal', 'vertical', 'radial' or 'conic'.
+    width (int): The width of the image.
+    height (int): The height of the image.
+    top (int): The first row of the band.
+    rows (int): The number of rows in the band.
+
+    Returns:
+    ndarray: A float64 array shaped (rows, width), with values from 0 to 1.
+
+    Raises:
+    ValueError: If the style has no single position field.
+    """
+    import numpy as np
+
+    x = (np.arange(width) + 0.5 - width / 2)[None, :]
+    y = (np.arange(top, top + rows) + 0.5 - height / 2)[:, None]
+
+    if style == "horizontal":
+        return np.broadcast_to((x + width / 2) / width, (rows, width))
+    if style == "vertical":
+        return np.broadcast_to((y + height / 2) / height, (rows, width))
+    if style == "radial":
+        return np.hypot(x, y) / np.hypot(width / 2, height / 2)
+    if style == "conic":
+        return np.arctan2(x, -y) / (2 * np.pi) % 1.0
+    raise ValueError(f"Unknown position field: {style}")
+
+
+class StyleRasteriser:
+    """
+    Renders a gradient in one of STYLES, one band of rows at a time.
+    """
+
+    def __init__(
+        self, gradient, num_midpoints, style, width, height, precise=False, colors=None
+    ):
+        """
+        Parameters:
+        gradient (MultiStopGradient): The gradient to render.
+        num_midpoints (int): The number of intermediate colors, as for 'blend'. Bilinear
+        gradients use this many intermediate steps along each axis.
+        style (str): One of the keys of STYLES.
+        width (int): The width of the image.
+        height (int): The height of the image.
+        precise (bool): Whether bands hold unrounded float64 colors, for 16-bit or
+        dithered export, instead of uint8 colors.
+        colors (array-like or GradientSamples): The already blended colors of the
+        gradient, such as a cached Palette, to avoid blending again. Ignored when precise
+        is set.
+
+        Raises:
+        ValueError: If the style is unknown or the size is empty.
+        """
+        import numpy as np
+
+        if style not in STYLES:
+            raise ValueError(f"Unknown gradient style: {style}")
+        if width < 1 or height < 1:
+            raise ValueError("Width and height must be at least 1 pixel")
+
+        self.style = style
+        self.width = width
+        self.height = height
+        self.precise = precise
+        self.num_steps = max(num_midpoints, 0) + 2
+
+        if style == "bilinear":
+            self._prepare_bilinear(gradient)
+            return
+
+        if isinstance(colors, gradient_stops.GradientSamples) and not precise:
+            palette = colors
+        elif self.num_steps > LAZY_STEPS:
+            palette = gradient.samples(num_midpoints, precise)
+        elif precise:
+            palette = gradient.blend_values(num_midpoints)
+        elif colors is not None:
+            palette = np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+        else:
+            palette = gradient.blend(num_midpoints)
+        self.palette = palette
+
+        # The linear styles use the band edges of the horizontal gradient
+        if style == "horizontal":
+            self.line = gradient_engine.gradient_row(palette, width)
+        elif style == "vertical":
+            self.line = gradient_engine.gradient_row(palette, height)
+
+    def _prepare_bilinear(self, gradient):
+        # Colors along the top and bottom edges at every pixel column, in the
+        # interpolation space, and the vertical ratio of every step
+        import numpy as np
+
+        self.color_space = color_space = gradient.color_space
+        corners = np.array(corner_colors(gradient), dtype=np.uint8)
+        if color_space == "srgb":
+            values = corners.astype(np.float64)
+        else:
+            values = color_spaces.to_space(corners, color_space)
+
+        # Only the steps that fall on a pixel column are interpolated
+        ratios = self._steps(np.arange(self.width), self.width) / (self.num_steps - 1)
+        edges = color_spaces.interpolate(values[[0, 2]], values[[1, 3]], ratios, color_space)
+        top, bottom = color_spaces.align_hues(edges[0], edges[1], color_space)
+        self.edge_start = top
+        self.edge_delta = bottom - top
+
+    def _steps(self, coordinates, size):
+        # The step index of each pixel center along an axis
+        import numpy as np
+
+        steps = ((coordinates + 0.5) * (self.num_steps / size)).astype(np.intp)
+        return np.minimum(steps, self.num_steps - 1)
+
+    def band(self, top, rows):
+        """
+        Renders one band of rows.
+
+        Parameters:
+        top (int): The first row of the band.
+        rows (int): The number of rows.
+
+        Returns:
+        ndarray: An array shaped (rows, width, 3), uint8 or float64 as chosen with
+        'precise'. Bands of the linear styles may be read-only broadcast views.
+        """
+        import numpy as np
+
+        if self.style == "horizontal":
+            return np.broadcast_to(self.line, (rows, self.width, 3))
+        if self.style == "vertical":
+            column = self.line[top:top + rows, None, :]
+            return np.broadcast_to(column, (rows, self.width, 3))
+
+        if self.style == "bilinear":
+            row_ratios = self._steps(np.arange(top, top + rows), self.height) / (
+                self.num_steps - 1
+            )
+            values = self.edge_start[None, :, :] + row_ratios[:, None, None] * self.edge_delta
+            values = color_spaces.wrap_hues(values, self.color_space)
+            if self.precise:
+                return color_spaces.from_space_values(values, self.color_space)
+            if self.color_space == "srgb":
+                return np.rint(np.clip(values, 0, 255)).astype(np.uint8)
+            return color_spaces.from_space(values, self.color_space)
+
+        field = position_field(self.style, self.width, self.height, top, rows)
+        steps = np.minimum((field * self.num_steps).astype(np.intp), self.num_steps - 1)
+        if isinstance(self.palette, gradient_stops.GradientSamples):
+            return self.palette.take(steps)
+        return self.palette[steps]
+
+    def iter_bands(self, band_height):
+        """
+        Yields bands that together cover the full image height.
+
+        Parameters:
+        band_height (int): The maximum number of rows per band.
+
+        Yields:
+        tuple: The first row of the band and the band, as returned by 'band'.
+        """
+        for top in range(0, self.height, band_height):
+            yield top, self.band(top, min(band_height, self.height - top))
+
+    def render(self):
+        """
+        Renders the whole image as a single band.
+
+        Returns:
+        ndarray: A C-contiguous array shaped (height, width, 3).
+        """
+        import numpy as np
+
+        return np.ascontiguousarray(self.band(0, self.height))
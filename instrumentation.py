@@ -0,0 +1,303 @@
+"""
+Opt-in timing instrumentation for the Color Fusion redraw pipeline.
+
+Each redraw is recorded as a frame: its total time, the time spent in each named stage,
+whether it was skipped because nothing changed, and the number of canvas items afterwards.
+The last FRAME_HISTORY frames are kept in a ring buffer, alongside counters such as the
+number of redraw requests and how many of them were coalesced. A session can be saved as a
+JSON trace in the Trace Event format, which chrome://tracing and Perfetto open directly, or
+profiled with cProfile.
+
+Instrumentation is off unless the COLOR_FUSION_INSTRUMENT environment variable is set to a
+value other than '0'. While it is off, every method returns immediately and 'stage' hands
+back a shared no-op context manager, so the hooks cost next to nothing.
+
+StartupTimer times the phases of application start-up, from the first import to the first
+frame on screen. It only takes a few timestamps, so it always runs; its report is printed
+and saved with the trace when instrumentation is on.
+"""
+
+import collections
+import contextlib
+import json
+import os
+import time
+
+ENV_VAR = "COLOR_FUSION_INSTRUMENT"
+
+# Number of frames kept in the ring buffer
+FRAME_HISTORY = 512
+
+_NO_STAGE = contextlib.nullcontext()
+
+
+def enabled_from_env():
+    """
+    Returns whether instrumentation was requested through the environment.
+    """
+    return os.environ.get(ENV_VAR, "") not in ("", "0")
+
+
+class _Stage:
+    __slots__ = ("frame", "name", "start")
+
+    def __init__(self, frame, name):
+        self.frame = frame
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+
+    def __exit__(self, *exc_info):
+        self.frame["stages"].append((self.name, self.start, time.perf_counter() - self.start))
+
+
+class StartupTimer:
+    """
+    Records the phases of application start-up, up to the first frame drawn.
+    """
+
+    def __init__(self, start=None):
+        """
+        Parameters:
+        start (float): The time.perf_counter() value start-up is measured from, such as
+        when the main module started loading. Defaults to now.
+        """
+        self.start = time.perf_counter() if start is None else start
+        self.marks = []
+        self.finished = False
+
+    def mark(self, name):
+        """
+        Records the end of a start-up phase, such as 'imports' or 'widgets'. Ignored once
+        start-up has finished.
+        """
+        if not self.finished:
+            self.marks.append((name, time.perf_counter()))
+
+    def finish(self, name="first_frame"):
+        """
+        Records the last phase and stops recording.
+
+        Returns:
+        bool: Whether this call finished start-up, False if it had already finished.
+        """
+        if self.finished:
+            return False
+        self.mark(name)
+        self.finished = True
+        return True
+
+    def phases(self):
+        """
+        Returns the recorded phases.
+
+        Returns:
+        list: (name, start, duration) tuples, with the start measured from 'start' and both
+        in seconds.
+        """
+        phases = []
+        previous = self.start
+        for name, end in self.marks:
+            phases.append((name, previous - self.start, end - previous))
+            previous = end
+        return phases
+
+    def report(self):
+        """
+        Formats the phases as text, one line per phase with its duration and the time
+        elapsed at its end.
+        """
+        lines = ["Start-up times:"]
+        for name, start, duration in self.phases():
+            elapsed = start + duration
+            lines.append(f"  {name:<12} {duration * 1000:8.1f} ms  (at {elapsed * 1000:8.1f} ms)")
+        return "\n".join(lines)
+
+
+class Instrumentation:
+    """
+    Records per-frame stage timings and counters of the redraw pipeline.
+    """
+
+    def __init__(self, enabled=False, capacity=FRAME_HISTORY):
+        """
+        Parameters:
+        enabled (bool): Whether anything is recorded.
+        capacity (int): The number of frames kept.
+        """
+        self.enabled = enabled
+        self.frames = collections.deque(maxlen=capacity)
+        self.counters = collections.Counter()
+        self.session_start = time.perf_counter()
+        self.startup = None
+        self._frame = None
+        self._profiler = None
+
+    def count(self, name, amount=1):
+        """
+        Adds to a named counter, such as 'redraw_requests' or 'coalesced'.
+        """
+        if self.enabled:
+            self.counters[name] += amount
+
+    def begin_frame(self):
+        """
+        Starts recording a frame.
+        """
+        if self.enabled:
+            self._frame = {"start": time.perf_counter(), "stages": []}
+
+    def stage(self, name):
+        """
+        Returns a context manager that times a stage of the current frame.
+
+        Parameters:
+        name (str): The name of the stage, such as 'blend' or 'draw'.
+        """
+        if self._frame is None:
+            return _NO_STAGE
+        return _Stage(self._frame, name)
+
+    def end_frame(self, skipped=False, items=None):
+        """
+        Finishes the current frame and stores it in the ring buffer.
+
+        Parameters:
+        skipped (bool): Whether the redraw was skipped because its inputs were unchanged.
+        items (int): The number of canvas items after the frame, if known.
+
+        Returns:
+        dict: The frame record, or None when nothing is being recorded.
+        """
+        frame, self._frame = self._frame, None
+        if frame is None:
+            return None
+
+        frame["duration"] = time.perf_counter() - frame["start"]
+        frame["skipped"] = skipped
+        frame["items"] = items
+        self.frames.append(frame)
+        self.counters["skipped" if skipped else "redraws"] += 1
+        return frame
+
+    def reset(self):
+        """
+        Clears the recorded frames and counters.
+        """
+        self.frames.clear()
+        self.counters.clear()
+        self.session_start = time.perf_counter()
+
+    def summary(self):
+        """
+        Summarizes the frames in the ring buffer.
+
+        Returns:
+        dict: The counters, and the mean, p95 and maximum time in milliseconds of whole
+        frames ('frame') and of each stage, over the frames that were not skipped.
+        """
+        drawn = [frame for frame in self.frames if not frame["skipped"]]
+        timings = collections.defaultdict(list)
+        for frame in drawn:
+            timings["frame"].append(frame["duration"])
+            for name, _, duration in frame["stages"]:
+                timings[name].append(duration)
+
+        stages = {}
+        for name, durations in timings.items():
+            durations.sort()
+            stages[name] = {
+                "mean_ms": sum(durations) / len(durations) * 1000,
+                "p95_ms": durations[min(len(durations) - 1, int(len(durations) * 0.95))] * 1000,
+                "max_ms": durations[-1] * 1000,
+            }
+        return {"counters": dict(self.counters), "stages": stages}
+
+    def start_profile(self):
+        """
+        Starts profiling with cProfile, if it is not already running.
+        """
+        if self._profiler is None:
+            import cProfile
+
+            self._profiler = cProfile.Profile()
+            self._profiler.enable()
+
+    @property
+    def profiling(self):
+        """
+        bool: Whether cProfile is running.
+        """
+        return self._profiler is not None
+
+    def stop_profile(self, file_path=None):
+        """
+        Stops profiling, optionally saving the statistics for pstats or snakeviz.
+
+        Parameters:
+        file_path (str): Where to save the profile, or None to discard it.
+        """
+        profiler, self._profiler = self._profiler, None
+        if profiler is None:
+            return
+        profiler.disable()
+        if file_path:
+            profiler.dump_stats(file_path)
+
+    def dump_trace(self, file_path):
+        """
+        Saves the frames in the ring buffer as a Trace Event JSON file.
+
+        Every frame and stage becomes a complete ('X') event, with times in microseconds
+        from the start of the session, and the counters are stored as metadata. The phases
+        of 'startup', when set to a StartupTimer, become events too, and times are then
+        measured from the start of start-up instead.
+
+        Parameters:
+        file_path (str): The path of the JSON file.
+        """
+        events = []
+        origin = self.session_start
+        if self.startup is not None:
+            origin = min(origin, self.startup.start)
+            for name, start, duration in self.startup.phases():
+                events.append(
+                    {
+                        "name": f"startup: {name}",
+                        "ph": "X",
+                        "pid": os.getpid(),
+                        "tid": 0,
+                        "ts": (self.startup.start + start - origin) * 1e6,
+                        "dur": duration * 1e6,
+                    }
+                )
+        for frame in self.frames:
+            events.append(
+                {
+                    "name": "skipped frame" if frame["skipped"] else "frame",
+                    "ph": "X",
+                    "pid": os.getpid(),
+                    "tid": 0,
+                    "ts": (frame["start"] - origin) * 1e6,
+                    "dur": frame["duration"] * 1e6,
+                    "args": {"items": frame["items"]},
+                }
+            )
+            for name, start, duration in frame["stages"]:
+                events.append(
+                    {
+                        "name": name,
+                        "ph": "X",
+                        "pid": os.getpid(),
+                        "tid": 0,
+                        "ts": (start - origin) * 1e6,
+                        "dur": duration * 1e6,
+                    }
+                )
+
+        with open(file_path, "w", encoding="utf-8") as trace_file:
+            json.dump(
+                {"traceEvents": events, "otherData": {"counters": dict(self.counters)}},
+                trace_file,
+            )
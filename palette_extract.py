@@ -0,0 +1,347 @@
+"""
+Dominant color extraction from images.
+
+Pixels are never clustered directly. They are counted into a histogram of binned colors
+(HISTOGRAM_BITS bits per channel, 32768 bins by default) that also keeps the sum of the exact
+colors in every bin, and the quantizers work on the few thousand occupied bins instead:
+median cut splits the bins into boxes, and k-means refines those boxes in OKLab.
+
+Images are downsampled to about MAX_SAMPLE_PIXELS before counting. JPEG files are decoded
+directly at a reduced scale, so their memory stays bounded however large they are. Other
+formats, such as PNG and TIFF, are decoded at full size and then reduced, so they are
+refused above MAX_DECODE_PIXELS. Pixel arrays, including memory-mapped ones, are subsampled
+and counted in row bands, and callers with their own tile source can feed
+ColorHistogram.add one tile at a time. PIL and NumPy are imported lazily.
+"""
+
+import math
+import threading
+
+import color_palette
+import color_spaces
+
+HISTOGRAM_BITS = 5
+
+# Images and arrays larger than this are subsampled before counting
+MAX_SAMPLE_PIXELS = 1 << 21
+
+# Largest image decoded in one piece, after any reduced-scale decoding. PIL holds RGB
+# images in 4 bytes per pixel, so this is about 512 MB.
+MAX_DECODE_PIXELS = 1 << 27
+
+# Number of pixels counted at a time
+BAND_PIXELS = 1 << 20
+
+KMEANS_ITERATIONS = 10
+
+# Held while PIL's decompression bomb limit is lifted to open an image, so that concurrent
+# loads cannot interleave the lift and the restore and leave the limit lifted for good
+_bomb_limit_lock = threading.Lock()
+
+
+class ColorHistogram:
+    """
+    Counts colors into bins, keeping the sum of the exact colors in every bin.
+    """
+
+    def __init__(self, bits=HISTOGRAM_BITS):
+        """
+        Parameters:
+        bits (int): The number of bits kept per channel, from 1 to 8.
+        """
+        import numpy as np
+
+        if not 1 <= bits <= 8:
+            raise ValueError("Histogram bits must be between 1 and 8")
+        self.bits = bits
+        self.counts = np.zeros(1 << (3 * bits), dtype=np.int64)
+        self.sums = np.zeros((1 << (3 * bits), 3), dtype=np.float64)
+
+    @property
+    def total(self):
+        """
+        int: The number of pixels counted so far.
+        """
+        return int(self.counts.sum())
+
+    def add(self, pixels):
+        """
+        Counts a block of pixels, such as one tile or band of an image.
+
+        Parameters:
+        pixels (array-like): RGB or RGBA values shaped (..., 3) or (..., 4). Alpha is ignored.
+        """
+        import numpy as np
+
+        pixels = np.asarray(pixels)
+        pixels = pixels.reshape(-1, pixels.shape[-1])[:, :3]
+        for start in range(0, len(pixels), BAND_PIXELS):
+            band = pixels[start:start + BAND_PIXELS].astype(np.intp)
+            shift = 8 - self.bits
+            bins = (
+                ((band[:, 0] >> shift) << (2 * self.bits))
+                | ((band[:, 1] >> shift) << self.bits)
+                | (band[:, 2] >> shift)
+            )
+            self.counts += np.bincount(bins, minlength=len(self.counts))
+            for channel in range(3):
+                self.sums[:, channel] += np.bincount(
+                    bins, weights=band[:, channel], minlength=len(self.counts)
+                )
+
+    def add_array(self, pixels, max_pixels=MAX_SAMPLE_PIXELS):
+        """
+        Counts an image held as an array, subsampling it evenly when it is larger than
+        max_pixels and reading it in row bands.
+
+        Parameters:
+        pixels (array-like): RGB or RGBA values shaped (height, width, channels). A
+        numpy.memmap over a raw file works and is only read where sampled.
+        max_pixels (int): The approximate number of pixels counted.
+        """
+        height, width = pixels.shape[:2]
+        step = max(1, math.ceil(math.sqrt(height * width / max_pixels)))
+        rows_per_band = max(1, BAND_PIXELS // max(1, width // step))
+        for top in range(0, height, rows_per_band * step):
+            self.add(pixels[top:top + rows_per_band * step:step, ::step])
+
+    def _occupied_bins(self):
+        # The mean color and pixel count of every occupied bin
+        import numpy as np
+
+        occupied = np.flatnonzero(self.counts)
+        if len(occupied) == 0:
+            raise ValueError("No pixels have been counted")
+        counts = self.counts[occupied].astype(np.float64)
+        return self.sums[occupied] / counts[:, None], counts
+
+    def median_cut(self, num_colors):
+        """
+        Quantizes the histogram with median cut.
+
+        The box with the largest weighted squared error is split in two along its most spread
+        channel, until there are num_colors boxes or none can be split. The split point is
+        the one that leaves the two halves with the least total squared error, which keeps
+        tight clusters whole where a split at the median would cut through them.
+
+        Parameters:
+        num_colors (int): The number of colors wanted.
+
+        Returns:
+        tuple: The colors as a uint8 array shaped (K, 3), and the number of pixels each one
+        stands for, both sorted from most to least common. K is at most num_colors.
+        """
+        means, counts = self._occupied_bins()
+        colors, weights = self._median_cut_boxes(means, counts, num_colors)
+        return self._finish(colors, weights)
+
+    def _median_cut_boxes(self, means, counts, num_colors):
+        import numpy as np
+
+        def box_stats(members):
+            weights = counts[members]
+            mean = (means[members] * weights[:, None]).sum(axis=0) / weights.sum()
+            spread = ((means[members] - mean) ** 2 * weights[:, None]).sum(axis=0)
+            return mean, spread
+
+        boxes = [np.arange(len(means))]
+        stats = [box_stats(boxes[0])]
+        while len(boxes) < num_colors:
+            errors = [
+                spread.sum() if len(box) > 1 else -1.0
+                for box, (_, spread) in zip(boxes, stats)
+            ]
+            index = int(np.argmax(errors))
+            if errors[index] <= 0:
+                break
+
+            box = boxes.pop(index)
+            _, spread = stats.pop(index)
+            channel = int(np.argmax(spread))
+            box = box[np.argsort(means[box, channel], kind="stable")]
+
+            # Squared error of every possible (left, right) split, from running sums
+            weights = counts[box]
+            weighted = means[box] * weights[:, None]
+            left_weight = np.cumsum(weights)[:-1]
+            left_sum = np.cumsum(weighted, axis=0)[:-1]
+            right_weight = weights.sum() - left_weight
+            right_sum = weighted.sum(axis=0) - left_sum
+            split_errors = -(
+                (left_sum**2).sum(axis=1) / left_weight
+                + (right_sum**2).sum(axis=1) / right_weight
+            )
+            split = int(np.argmin(split_errors)) + 1
+
+            for part in (box[:split], box[split:]):
+                boxes.append(part)
+                stats.append(box_stats(part))
+
+        colors = np.array([mean for mean, _ in stats])
+        weights = np.array([counts[box].sum() for box in boxes])
+        return colors, weights
+
+    def kmeans(self, num_colors, iterations=KMEANS_ITERATIONS):
+        """
+        Quantizes the histogram with k-means in OKLab, starting from the median cut colors.
+
+        Parameters:
+        num_colors (int): The number of colors wanted.
+        iterations (int): The maximum number of refinement passes.
+
+        Returns:
+        tuple: The colors and pixel counts, as returned by 'median_cut'.
+        """
+        import numpy as np
+
+        means, counts = self._occupied_bins()
+        colors, _ = self._median_cut_boxes(means, counts, num_colors)
+
+        # Bin means are averages of 8-bit colors, so they are rounded before conversion
+        points = color_spaces.to_space(np.rint(means).astype(np.uint8), "oklab")
+        centers = color_spaces.to_space(np.rint(colors).astype(np.uint8), "oklab")
+        for _ in range(iterations):
+            new_centers, _ = _cluster_means(points, centers, points, counts)
+            converged = new_centers.shape == centers.shape and np.allclose(
+                new_centers, centers, atol=1e-6
+            )
+            centers = new_centers
+            if converged:
+                break
+
+        # Each final color is the mean of its bins in sRGB
+        colors, weights = _cluster_means(points, centers, means, counts)
+        return self._finish(colors, weights)
+
+    @staticmethod
+    def _finish(colors, weights):
+        import numpy as np
+
+        order = np.argsort(-weights, kind="stable")
+        colors = np.clip(np.rint(colors[order]), 0, 255).astype(np.uint8)
+        return colors, weights[order].astype(np.int64)
+
+
+def _cluster_means(points, centers, values, counts):
+    # Assigns every point to its nearest center, and returns the weighted mean of 'values'
+    # and the total weight of every non-empty cluster
+    import numpy as np
+
+    distances = (centers**2).sum(axis=1)[None, :] - 2 * points @ centers.T
+    labels = distances.argmin(axis=1)
+    weights = np.bincount(labels, weights=counts, minlength=len(centers))
+    used = weights > 0
+    sums = np.stack(
+        [
+            np.bincount(labels, weights=counts * values[:, channel], minlength=len(centers))
+            for channel in range(3)
+        ],
+        axis=1,
+    )
+    return sums[used] / weights[used, None], weights[used]
+
+
+def _sample_image(image, max_pixels, max_decode_pixels):
+    # Decodes an image reduced to about max_pixels, refusing it when more than
+    # max_decode_pixels would be decoded first (None for no limit)
+    import numpy as np
+
+    scale = math.sqrt(image.width * image.height / max_pixels)
+    if scale > 1:
+        target = (max(1, int(image.width / scale)), max(1, int(image.height / scale)))
+        # Only has an effect on formats whose decoder can scale, such as JPEG, and
+        # changes the size to the one that will be decoded
+        image.draft("RGB", target)
+    if max_decode_pixels is not None and image.width * image.height > max_decode_pixels:
+        raise ValueError(
+            f"Image is too large to load: {image.width} x {image.height} pixels would be "
+            f"decoded, and the limit is {max_decode_pixels}"
+        )
+
+    if scale > 1:
+        if image.mode not in ("RGB", "RGBA", "L"):
+            image = image.convert("RGB")
+        factor = int(min(image.width / target[0], image.height / target[1]))
+        if factor > 1:
+            image = image.reduce(factor)
+
+    return np.asarray(image.convert("RGB"))
+
+
+def load_image_sample(source, max_pixels=MAX_SAMPLE_PIXELS):
+    """
+    Opens an image downsampled to about max_pixels, as an RGB array.
+
+    JPEG images are decoded directly at a reduced scale, so the full-size image is never
+    held in memory. Other formats are decoded at full size and reduced by box filtering
+    right after, so images opened here are refused when more than MAX_DECODE_PIXELS would
+    be decoded. PIL's own decompression bomb limit, which would reject large photos at
+    any scale, is lifted for them in favour of this check. The limit is process-wide, so
+    it is lifted under a lock and only while the image header is read.
+
+    Parameters:
+    source (str, file or Image): The path or file of the image, or an open PIL image.
+    max_pixels (int): The approximate number of pixels kept.
+
+    Returns:
+    ndarray: A uint8 array shaped (height, width, 3).
+
+    Raises:
+    OSError: If the image cannot be read.
+    ValueError: If the image is too large to decode.
+    """
+    from PIL import Image
+
+    if isinstance(source, Image.Image):
+        return _sample_image(source, max_pixels, None)
+
+    with _bomb_limit_lock:
+        limit = Image.MAX_IMAGE_PIXELS
+        Image.MAX_IMAGE_PIXELS = None
+        try:
+            image = Image.open(source)
+        finally:
+            Image.MAX_IMAGE_PIXELS = limit
+
+    try:
+        with image:
+            return _sample_image(image, max_pixels, MAX_DECODE_PIXELS)
+    except Image.DecompressionBombError as e:
+        raise ValueError(str(e)) from e
+
+
+def extract_palette(source, num_colors=5, method="median_cut", max_pixels=MAX_SAMPLE_PIXELS):
+    """
+    Extracts the dominant colors of an image.
+
+    Parameters:
+    source (str, file, Image or ndarray): The path or file of the image, an open PIL image,
+    or pixels in an array shaped (height, width, channels).
+    num_colors (int): The number of colors wanted.
+    method (str): 'median_cut', or 'kmeans' to refine the median cut colors in OKLab.
+    max_pixels (int): The approximate number of pixels sampled from the image.
+
+    Returns:
+    Palette: Up to num_colors colors, from most to least common.
+
+    Raises:
+    OSError: If the image cannot be read.
+    ValueError: If the method is unknown, or the image has no pixels or is too large to
+    decode.
+    """
+    import numpy as np
+
+    if method not in ("median_cut", "kmeans"):
+        raise ValueError(f"Unknown quantization method: {method}")
+
+    histogram = ColorHistogram()
+    if isinstance(source, np.ndarray):
+        histogram.add_array(source, max_pixels)
+    else:
+        histogram.add_array(load_image_sample(source, max_pixels), max_pixels)
+
+    if method == "kmeans":
+        colors, _ = histogram.kmeans(num_colors)
+    else:
+        colors, _ = histogram.median_cut(num_colors)
+    return color_palette.Palette(colors)
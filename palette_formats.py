@@ -0,0 +1,322 @@
+"""
+Palette export for Color Fusion: CSS, JSON, Adobe ASE, GIMP GPL and NumPy files.
+
+Every writer takes the blended colors as they are already held, a Palette or a uint8 array
+shaped (N, 3), and writes them in one pass. A lazy GradientSamples sequence works too and is
+sampled one chunk at a time, so gradients with millions of steps are never materialized.
+
+The text formats have a fixed width per color, so each chunk of CHUNK_COLORS colors is
+assembled as one byte matrix with NumPy, from table lookups for hex codes and channel
+values, and written with a single call. Nothing is formatted per color, and memory stays
+bounded by one chunk.
+"""
+
+import functools
+import io
+import json
+import os
+
+import color_codec
+import gradient_stops
+
+# Number of colors assembled and written at a time
+CHUNK_COLORS = 1 << 16
+
+DEFAULT_NAME = "Color Fusion"
+
+FORMATS_BY_EXTENSION = {
+    ".css": "css",
+    ".json": "json",
+    ".ase": "ase",
+    ".gpl": "gpl",
+    ".npy": "npy",
+}
+
+
+def _colors_array(colors):
+    # The colors as a uint8 array shaped (N, 3), without copying uint8 input. Lazy
+    # GradientSamples are kept as they are, to be sampled chunk by chunk
+    import numpy as np
+
+    if isinstance(colors, gradient_stops.GradientSamples):
+        return colors
+    return np.asarray(colors, dtype=np.uint8).reshape(-1, 3)
+
+
+@functools.lru_cache(maxsize=None)
+def _byte_decimals():
+    # The three right-aligned, space-padded decimal digits of every byte value
+    import numpy as np
+
+    text = "".join(f"{value:3d}" for value in range(256))
+    return np.frombuffer(text.encode("ascii"), dtype=np.uint8).reshape(256, 3)
+
+
+def _decimal_ascii(values, width):
+    # The zero-padded ASCII digits of non-negative integers, in 'width' columns
+    import numpy as np
+
+    values = np.asarray(values, dtype=np.int64)
+    chars = np.empty((len(values), width), dtype=np.uint8)
+    for column in range(width - 1, -1, -1):
+        values, digits = np.divmod(values, 10)
+        chars[:, column] = digits
+    chars += ord("0")
+    return chars
+
+
+def _records(count, *fields):
+    # Joins fixed-width fields into 'count' records: each field is either bytes repeated on
+    # every record or a uint8 array with one row per record
+    import numpy as np
+
+    widths = [
+        len(field) if isinstance(field, bytes) else field.shape[1] for field in fields
+    ]
+    records = np.empty((count, sum(widths)), dtype=np.uint8)
+    column = 0
+    for field, width in zip(fields, widths):
+        if isinstance(field, bytes):
+            field = np.frombuffer(field, dtype=np.uint8)
+        records[:, column:column + width] = field
+        column += width
+    return records.tobytes()
+
+
+def _chunks(colors):
+    # The index of the first color and the colors of every chunk, as uint8 arrays
+    import numpy as np
+
+    for start in range(0, len(colors), CHUNK_COLORS):
+        yield start, np.asarray(colors[start:start + CHUNK_COLORS], dtype=np.uint8)
+
+
+def write_css(fileobj, colors, name=DEFAULT_NAME):
+    """
+    Writes colors as CSS custom properties on ':root', numbered from 0 as in
+    '--color-07', followed by a '--gradient' property holding a linear-gradient() through
+    every color.
+
+    Parameters:
+    fileobj (file): A binary file to write to.
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    name (str): The palette name, written in a comment.
+    """
+    import numpy as np
+
+    colors = _colors_array(colors)
+    digits = len(str(max(len(colors) - 1, 0)))
+    comment = name.replace("*/", "* /")
+    fileobj.write(f"/* {comment}: {len(colors)} colors */\n:root {{\n".encode("utf-8"))
+
+    for start, chunk in _chunks(colors):
+        indices = np.arange(start, start + len(chunk))
+        fileobj.write(
+            _records(
+                len(chunk),
+                b"  --color-",
+                _decimal_ascii(indices, digits),
+                b": ",
+                color_codec.hex_ascii_array(chunk),
+                b";\n",
+            )
+        )
+
+    fileobj.write(b"  --gradient: linear-gradient(to right")
+    for _, chunk in _chunks(colors):
+        fileobj.write(_records(len(chunk), b", ", color_codec.hex_ascii_array(chunk)))
+    fileobj.write(b");\n}\n")
+
+
+def write_json(fileobj, colors, name=DEFAULT_NAME):
+    """
+    Writes colors as a JSON object with the palette name and the list of hex codes, as in
+    {"name": "Color Fusion", "colors": ["#FF0000", "#0000FF"]}.
+
+    Parameters:
+    fileobj (file): A binary file to write to.
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    name (str): The palette name.
+    """
+    colors = _colors_array(colors)
+    fileobj.write(f'{{"name": {json.dumps(name)}, "colors": ['.encode("utf-8"))
+    for start, chunk in _chunks(colors):
+        records = _records(
+            len(chunk), b', "', color_codec.hex_ascii_array(chunk), b'"'
+        )
+        # The first color has no separator before it
+        fileobj.write(records[2:] if start == 0 else records)
+    fileobj.write(b"]}\n")
+
+
+def write_gpl(fileobj, colors, name=DEFAULT_NAME):
+    """
+    Writes colors as a GIMP palette, one 'R G B<tab>#RRGGBB' line per color. The same
+    format is read by Inkscape and Krita.
+
+    Parameters:
+    fileobj (file): A binary file to write to.
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    name (str): The palette name.
+    """
+    colors = _colors_array(colors)
+    name = " ".join(name.splitlines())
+    fileobj.write(f"GIMP Palette\nName: {name}\n#\n".encode("utf-8"))
+    decimals = _byte_decimals()
+    for _, chunk in _chunks(colors):
+        fileobj.write(
+            _records(
+                len(chunk),
+                decimals[chunk[:, 0]],
+                b" ",
+                decimals[chunk[:, 1]],
+                b" ",
+                decimals[chunk[:, 2]],
+                b"\t",
+                color_codec.hex_ascii_array(chunk),
+                b"\n",
+            )
+        )
+
+
+def write_ase(fileobj, colors, name=DEFAULT_NAME):
+    """
+    Writes colors as an Adobe Swatch Exchange file, which Photoshop, Illustrator and
+    InDesign import. The colors are RGB swatches named by their hex codes, in a group
+    named after the palette.
+
+    Parameters:
+    fileobj (file): A binary file to write to.
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    name (str): The palette name, used for the swatch group.
+    """
+    import numpy as np
+
+    colors = _colors_array(colors)
+    group_name = name.encode("utf-16-be") + b"\x00\x00"
+    group_block = (len(group_name) // 2).to_bytes(2, "big") + group_name
+
+    # Version 1.0, and the group start and end around the color blocks
+    fileobj.write(b"ASEF" + b"\x00\x01\x00\x00" + (len(colors) + 2).to_bytes(4, "big"))
+    fileobj.write(b"\xc0\x01" + len(group_block).to_bytes(4, "big") + group_block)
+
+    for _, chunk in _chunks(colors):
+        # Names are the 7 characters of the hex code plus a terminator, in UTF-16BE
+        names = np.zeros((len(chunk), 16), dtype=np.uint8)
+        names[:, 1:14:2] = color_codec.hex_ascii_array(chunk)
+        channels = (chunk / np.float32(255)).astype(">f4").view(np.uint8)
+        fileobj.write(
+            _records(
+                len(chunk),
+                b"\x00\x01\x00\x00\x00\x24\x00\x08",
+                names,
+                b"RGB ",
+                channels,
+                # Color type 2: a normal (process) swatch
+                b"\x00\x02",
+            )
+        )
+
+    fileobj.write(b"\xc0\x02\x00\x00\x00\x00")
+
+
+def write_npy(fileobj, colors, name=DEFAULT_NAME):
+    """
+    Writes colors as a NumPy .npy file holding a uint8 array shaped (N, 3), which
+    numpy.load reads back directly.
+
+    Parameters:
+    fileobj (file): A binary file to write to.
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    name (str): Unused; .npy files have no place for a name.
+    """
+    import numpy as np
+
+    colors = _colors_array(colors)
+    np.lib.format.write_array_header_1_0(
+        fileobj, {"descr": "|u1", "fortran_order": False, "shape": (len(colors), 3)}
+    )
+    for _, chunk in _chunks(colors):
+        fileobj.write(chunk.tobytes())
+
+
+WRITERS = {
+    "css": write_css,
+    "json": write_json,
+    "ase": write_ase,
+    "gpl": write_gpl,
+    "npy": write_npy,
+}
+
+
+def format_from_path(file_path):
+    """
+    Determines the palette format from a file extension.
+
+    Parameters:
+    file_path (str): The path of the output file.
+
+    Returns:
+    str: One of the keys of WRITERS.
+
+    Raises:
+    ValueError: If the extension is not supported.
+    """
+    extension = os.path.splitext(file_path)[1].lower()
+    if extension not in FORMATS_BY_EXTENSION:
+        raise ValueError(f"Unsupported palette format: {extension or file_path}")
+    return FORMATS_BY_EXTENSION[extension]
+
+
+def _writer(file_format):
+    writer = WRITERS.get(file_format)
+    if writer is None:
+        raise ValueError(f"Unsupported palette format: {file_format}")
+    return writer
+
+
+def palette_bytes(colors, file_format, name=DEFAULT_NAME):
+    """
+    Encodes colors in a palette format in memory.
+
+    Parameters:
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    file_format (str): One of the keys of WRITERS.
+    name (str): The palette name.
+
+    Returns:
+    bytes: The encoded palette.
+
+    Raises:
+    ValueError: If the format is not supported.
+    """
+    writer = _writer(file_format)
+    buffer = io.BytesIO()
+    writer(buffer, colors, name)
+    return buffer.getvalue()
+
+
+def export_palette(file_path, colors, file_format=None, name=DEFAULT_NAME):
+    """
+    Writes colors to a palette file.
+
+    Parameters:
+    file_path (str): The path of the output file.
+    colors (array-like): The colors, as a Palette, an array shaped (N, 3) or lazy
+    GradientSamples.
+    file_format (str): One of the keys of WRITERS. Inferred from the extension when
+    omitted.
+    name (str): The palette name.
+
+    Raises:
+    ValueError: If the format is not supported.
+    """
+    writer = _writer(file_format or format_from_path(file_path))
+    with open(file_path, "wb") as fileobj:
+        writer(fileobj, colors, name)
@@ -0,0 +1,90 @@
+import numpy as np
+import pytest
+
+import color_codec
+
+
+def test_format_and_parse_round_trip_every_byte():
+    for value in range(256):
+        color = (value, 255 - value, (value * 37) % 256)
+        code = color_codec.format_hex(color)
+        assert code == "#{:02X}{:02X}{:02X}".format(*color)
+        assert color_codec.parse_hex(code) == color
+        assert color_codec.parse_hex(code.lower()) == color
+
+
+def test_rgba_round_trip():
+    color = (18, 52, 86, 120)
+    assert color_codec.format_hex_rgba(color) == "#12345678"
+    assert color_codec.parse_hex_rgba("#12345678") == color
+    assert color_codec.parse_hex("#12345678") == color[:3]
+
+
+@pytest.mark.parametrize(
+    "code, expected",
+    [
+        ("#FFA500", (255, 165, 0, 255)),
+        ("ffa500", (255, 165, 0, 255)),
+        ("#fa0", (255, 170, 0, 255)),
+        ("#fa08", (255, 170, 0, 136)),
+        ("orange", (255, 165, 0, 255)),
+        ("RebeccaPurple", (102, 51, 153, 255)),
+    ],
+)
+def test_parse_hex_rgba_forms(code, expected):
+    assert color_codec.parse_hex_rgba(code) == expected
+
+
+@pytest.mark.parametrize("code", [" #FFA500", "#FFA500\n", "\tffa500 ", " orange "])
+def test_whitespace_is_ignored_for_hex_codes_and_names(code):
+    assert color_codec.parse_hex(code) == (255, 165, 0)
+    assert color_codec.parse_hex_rgba(code) == (255, 165, 0, 255)
+
+
+@pytest.mark.parametrize(
+    "code",
+    [
+        "",
+        "#",
+        "#12",
+        "#12345",
+        "#1234567",
+        "#GG0000",
+        "#12 456",
+        "# FFFFFF",
+        "##FFFFFF",
+        "notacolor",
+    ],
+)
+def test_invalid_codes_raise_value_error(code):
+    with pytest.raises(ValueError):
+        color_codec.parse_hex(code)
+    with pytest.raises(ValueError):
+        color_codec.parse_hex_array([code])
+
+
+def test_pack_round_trip():
+    color = (171, 205, 239)
+    assert color_codec.pack_rgb(color) == 0xABCDEF
+    assert color_codec.unpack_rgb(0xABCDEF) == color
+
+
+def test_array_functions_match_the_single_color_ones():
+    colors = np.random.default_rng(0).integers(0, 256, (500, 3)).astype(np.uint8)
+    codes = color_codec.format_hex_array(colors)
+    assert codes == [color_codec.format_hex(color) for color in colors.tolist()]
+    assert color_codec.hex_ascii_array(colors).tobytes().decode("ascii") == "".join(codes)
+
+    assert np.array_equal(color_codec.parse_hex_array(codes), colors)
+    mixed = [code.lower() for code in codes[:10]] + ["red", " #00FF00 ", "#00f"]
+    expected = [color_codec.parse_hex(code) for code in mixed]
+    assert color_codec.parse_hex_array(mixed).tolist() == [list(color) for color in expected]
+
+    packed = color_codec.pack_array(colors)
+    assert packed.tolist() == [color_codec.pack_rgb(color) for color in colors.tolist()]
+    assert np.array_equal(color_codec.unpack_array(packed), colors)
+
+
+def test_empty_arrays():
+    assert color_codec.parse_hex_array([]).shape == (0, 3)
+    assert color_codec.format_hex_array(np.empty((0, 3), dtype=np.uint8)) == []
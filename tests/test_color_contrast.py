@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+
+import color_contrast
+import color_palette
+
+WHITE = (255, 255, 255)
+BLACK = (0, 0, 0)
+
+
+def test_black_on_white_is_21_to_1():
+    assert color_contrast.relative_luminance([BLACK, WHITE]).tolist() == pytest.approx([0, 1])
+    assert color_contrast.contrast_ratios([WHITE], [BLACK])[0, 0] == pytest.approx(21.0)
+    assert color_contrast.contrast_ratios([BLACK], [BLACK])[0, 0] == pytest.approx(1.0)
+
+
+@pytest.mark.parametrize(
+    "gray, ratio_on_white, level",
+    [
+        # The usual examples of the AA and AAA boundaries for body text on white
+        (0x76, 4.54, "AA"),
+        (0x77, 4.48, "AA Large"),
+        (0x59, 7.00, "AAA"),
+        (0x5A, 6.90, "AA"),
+        (0x95, 2.996, "Fail"),
+    ],
+)
+def test_wcag_levels_at_the_boundaries(gray, ratio_on_white, level):
+    ratio = color_contrast.contrast_ratios([WHITE], [(gray, gray, gray)])[0, 0]
+    assert ratio == pytest.approx(ratio_on_white, abs=0.01)
+    assert color_contrast.wcag_levels(ratio) == level
+
+
+def test_wcag_levels_use_inclusive_thresholds():
+    levels = color_contrast.wcag_levels([7.0, 6.99, 4.5, 4.49, 3.0, 2.99, 21.0, 1.0])
+    assert levels.tolist() == ["AAA", "AA", "AA", "AA Large", "AA Large", "Fail", "AAA", "Fail"]
+
+
+def test_analyze_contrast_against_black_and_white():
+    colors = [WHITE, BLACK, (128, 128, 128), (0, 0, 255), (255, 0, 0)]
+    analysis = color_contrast.analyze_contrast(colors)
+
+    assert analysis["ratios"].shape == (5, 2)
+    assert analysis["best"].tolist() == [0, 1, 0, 1, 0]
+    assert analysis["best_ratio"] == pytest.approx([21.0, 21.0, 5.317, 8.592, 5.252], abs=0.001)
+    assert analysis["level"].tolist() == ["AAA", "AAA", "AA", "AAA", "AA"]
+    assert analysis["luminance"][2] == pytest.approx(0.2159, abs=0.0001)
+
+
+def test_legible_text_colors_pick_the_highest_contrast():
+    text_colors = [(40, 40, 40), (250, 250, 250), (0, 0, 255)]
+    colors = np.random.default_rng(0).integers(0, 256, (200, 3))
+    chosen = color_contrast.legible_text_colors(colors, text_colors)
+    ratios = color_contrast.contrast_ratios(colors, text_colors)
+    assert np.array_equal(ratios[np.arange(200), chosen], ratios.max(axis=1))
+    assert color_contrast.legible_text_colors([WHITE, BLACK]).tolist() == [0, 1]
+
+
+def test_palettes_and_empty_inputs():
+    palette = color_palette.Palette([BLACK, WHITE])
+    assert color_contrast.legible_text_colors(palette).tolist() == [1, 0]
+    analysis = color_contrast.analyze_contrast(np.empty((0, 3), dtype=np.uint8))
+    assert analysis["best"].shape == (0,)
+    assert analysis["level"].shape == (0,)
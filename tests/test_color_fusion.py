@@ -0,0 +1,141 @@
+import types
+
+import numpy as np
+import pytest
+
+tk = pytest.importorskip("tkinter")
+
+import color_fusion
+import gradient_benchmark
+import gradient_cache
+import gradient_stops
+import gradient_styles
+import instrumentation
+
+
+class FakeEntry:
+    # Stands in for a PlaceholderEntry
+    def __init__(self, text, placeholder):
+        self.text = text
+        self.placeholder = placeholder
+
+    def get(self):
+        return self.text
+
+
+class FakePhotoImage:
+    # Stands in for tk.PhotoImage, which needs a display
+    def __init__(self, data=None, format=None, **options):
+        self.data = data
+
+
+def headless_app(style, midpoints):
+    Flag = gradient_benchmark._Flag
+    app = types.SimpleNamespace(
+        gradient_display=gradient_benchmark.HeadlessCanvas(120, 50),
+        color_one_entry=FakeEntry("#FF0000", "Color One"),
+        color_two_entry=FakeEntry("#0000FF", "Color Two"),
+        intermediate_colors_text=Flag(str(midpoints)),
+        intermediate_colors_scale=Flag(midpoints),
+        middle_stops=gradient_stops.MultiStopGradient([(0.5, (0, 255, 0))]),
+        color_space=Flag("OKLab"),
+        gradient_style=Flag(gradient_styles.STYLES[style]),
+        show_separations=Flag(False),
+        smooth_gradient=Flag(False),
+        show_contrast=Flag(False),
+        instrumentation=instrumentation.Instrumentation(),
+        startup=None,
+        last_redraw_inputs=None,
+        last_valid_gradient=None,
+        last_valid_stops=None,
+        gradient_items=[],
+        gradient_item_states=[],
+        error_message_item=None,
+        gradient_image_item=None,
+        gradient_photo=None,
+        gradient_pixels=None,
+        contrast_items=[],
+        overlay_items=None,
+    )
+    for name in (
+        "update_gradient_display",
+        "finish_instrumented_frame",
+        "handle_gradient_error",
+        "display_error_message",
+        "get_rgb_from_hex",
+        "get_num_midpoints",
+        "get_color_space",
+        "get_gradient_style",
+        "build_gradient",
+        "draw_gradient",
+        "draw_gradient_image",
+        "draw_horizontal_gradient",
+        "draw_contrast_annotations",
+    ):
+        setattr(app, name, types.MethodType(getattr(color_fusion.ColorFusionApp, name), app))
+    return app
+
+
+@pytest.mark.parametrize(
+    "style, midpoints",
+    [
+        ("bilinear", 10),
+        ("radial", 10),
+        ("conic", gradient_styles.LAZY_STEPS + 10),
+        ("horizontal", 10),
+    ],
+)
+def test_invalid_color_redraws_the_last_valid_gradient(monkeypatch, style, midpoints):
+    monkeypatch.setattr(tk, "PhotoImage", FakePhotoImage)
+    app = headless_app(style, midpoints)
+
+    app.update_gradient_display()
+    assert app.last_valid_stops is not None
+    drawn = app.gradient_photo.data if app.gradient_photo else None
+    pixels = app.gradient_pixels
+
+    # Typing an invalid hex code goes through handle_gradient_error
+    app.color_one_entry.text = "#GG0000"
+    app.update_gradient_display()
+
+    assert app.error_message_item is None
+    if pixels is not None:
+        np.testing.assert_array_equal(app.gradient_pixels, pixels)
+    if drawn is not None:
+        assert app.gradient_photo.data == drawn
+
+
+@pytest.mark.parametrize("style", ["horizontal", "radial"])
+def test_largest_midpoint_count_is_sampled_lazily(monkeypatch, style):
+    monkeypatch.setattr(tk, "PhotoImage", FakePhotoImage)
+
+    def materialized(*args):
+        raise AssertionError("the whole gradient was materialized")
+
+    cache = gradient_cache.GradientCache()
+    monkeypatch.setattr(cache, "blend", materialized)
+    monkeypatch.setattr(cache, "hex_colors", materialized)
+    monkeypatch.setattr(gradient_cache, "default_cache", cache)
+
+    app = headless_app(style, color_fusion.MAX_INTERMEDIATE_COLORS + 1)
+    assert app.get_num_midpoints() == color_fusion.MAX_INTERMEDIATE_COLORS
+    app.update_gradient_display()
+    assert isinstance(app.last_valid_gradient, gradient_stops.GradientSamples)
+    assert len(app.last_valid_gradient) == color_fusion.MAX_INTERMEDIATE_COLORS + 2
+    assert app.error_message_item is None
+
+
+def test_legible_text_color_follows_the_brightness_rule():
+    app = types.SimpleNamespace()
+    for name in ("get_legible_text_color", "is_color_dark"):
+        setattr(app, name, types.MethodType(getattr(color_fusion.ColorFusionApp, name), app))
+
+    dark_text, light_text = color_fusion.TEXT_COLORS
+    rng = np.random.default_rng(3)
+    for rgb in [(0, 0, 0), (255, 255, 255), (122, 122, 122), (123, 123, 123)] + [
+        tuple(color) for color in rng.integers(0, 256, (200, 3)).tolist()
+    ]:
+        expected = light_text if app.is_color_dark(rgb) else dark_text
+        assert app.get_legible_text_color(rgb) == expected
+    assert app.get_legible_text_color((0, 0, 255)) == light_text
+    assert app.get_legible_text_color((255, 255, 0)) == dark_text
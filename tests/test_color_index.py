@@ -0,0 +1,79 @@
+import numpy as np
+
+import color_codec
+import color_index
+import color_spaces
+
+
+def brute_force_nearest(colors, queries):
+    # Repeated colors do not change the nearest distance
+    unique = np.unique(np.asarray(colors, dtype=np.uint8), axis=0)
+    entries = color_spaces.to_space(unique, "oklab")
+    points = color_spaces.to_space(np.asarray(queries, dtype=np.uint8), "oklab")
+    rows = max(1, (1 << 21) // len(entries))
+    return np.concatenate(
+        [
+            np.linalg.norm(points[start:start + rows, None, :] - entries, axis=2).min(axis=1)
+            for start in range(0, len(points), rows)
+        ]
+    )
+
+
+def assert_matches_brute_force(index, colors, queries):
+    best, distances = index.query(queries)
+    expected = brute_force_nearest(colors, queries)
+    np.testing.assert_allclose(distances, expected, rtol=0, atol=1e-12)
+    # Ties may resolve to either entry, but the chosen entry must be at that distance
+    found = color_spaces.to_space(np.asarray(colors, dtype=np.uint8)[best], "oklab")
+    points = color_spaces.to_space(np.asarray(queries, dtype=np.uint8), "oklab")
+    np.testing.assert_allclose(
+        np.linalg.norm(found - points, axis=1), expected, rtol=0, atol=1e-12
+    )
+
+
+def test_random_palette_matches_brute_force():
+    rng = np.random.default_rng(11)
+    colors = rng.integers(0, 256, (3000, 3))
+    index = color_index.ColorIndex([str(i) for i in range(len(colors))], colors)
+    queries = rng.integers(0, 256, (20000, 3))
+    assert_matches_brute_force(index, colors, queries)
+
+
+def test_clustered_palette_matches_brute_force():
+    # A palette crowded into one corner leaves most queries far from every cell
+    rng = np.random.default_rng(12)
+    colors = rng.integers(0, 24, (500, 3))
+    colors[0] = (255, 255, 255)
+    index = color_index.ColorIndex([str(i) for i in range(len(colors))], colors)
+    queries = rng.integers(0, 256, (5000, 3))
+    assert_matches_brute_force(index, colors, queries)
+
+
+def test_duplicate_heavy_palette_matches_brute_force():
+    # Repeated colors must not shrink the cells, or most queries fall back to a full scan
+    rng = np.random.default_rng(13)
+    unique = rng.integers(0, 256, (1000, 3))
+    colors = np.repeat(unique, 50, axis=0)
+    index = color_index.ColorIndex([str(i) for i in range(len(colors))], colors)
+    unique_index = color_index.ColorIndex([str(i) for i in range(len(unique))], unique)
+    assert index.cell_size == unique_index.cell_size
+
+    queries = rng.integers(0, 256, (5000, 3))
+    assert_matches_brute_force(index, colors, queries)
+    # Each color stands for its first entry
+    best, _ = index.query(colors[::50])
+    assert (best % 50 == 0).all()
+
+
+def test_single_entry_palette():
+    index = color_index.ColorIndex(["only"], [(10, 20, 30)])
+    best, _ = index.query([(0, 0, 0), (255, 255, 255)])
+    assert best.tolist() == [0, 0]
+
+
+def test_css_index_finds_exact_named_colors():
+    index = color_index.css_index()
+    for color in list(color_codec.CSS_COLORS.values())[:40]:
+        _, found, distance = index.nearest(color)
+        assert found == color
+        assert distance < 1e-12
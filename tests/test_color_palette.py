@@ -0,0 +1,97 @@
+import array
+
+import numpy as np
+import pytest
+
+import color_palette
+import gradient_cache
+import gradient_stops
+
+
+def sample_colors(count):
+    return [((index * 7) % 256, (index * 13) % 256, (index * 29) % 256) for index in range(count)]
+
+
+def test_indexing_matches_the_list_of_tuples():
+    colors = sample_colors(10)
+    palette = color_palette.Palette(colors)
+    assert len(palette) == 10
+    assert palette[0] == colors[0]
+    assert palette[-1] == colors[-1]
+    assert isinstance(palette[3], tuple)
+    assert all(isinstance(value, int) for value in palette[3])
+    with pytest.raises(IndexError):
+        palette[10]
+
+
+def test_slices_are_palettes_sharing_the_buffer():
+    colors = sample_colors(10)
+    palette = color_palette.Palette(colors)
+    for part in (slice(2, 7), slice(None, None, 3), slice(None, None, -1), slice(5, 5)):
+        sliced = palette[part]
+        assert isinstance(sliced, color_palette.Palette)
+        assert sliced.to_list() == colors[part]
+    assert np.shares_memory(palette[2:7].array, palette.array)
+
+
+@pytest.mark.parametrize("count", [0, 1, 9, 10, 11, 25])
+def test_iteration_crosses_chunk_boundaries(monkeypatch, count):
+    monkeypatch.setattr(color_palette, "ITER_CHUNK", 10)
+    colors = sample_colors(count)
+    palette = color_palette.Palette(colors)
+    assert list(palette) == colors
+    assert palette.to_list() == colors
+
+
+def test_equality():
+    colors = sample_colors(10)
+    palette = color_palette.Palette(colors)
+    assert palette == color_palette.Palette(np.array(colors, dtype=np.uint8))
+    assert palette == color_palette.Palette(palette)
+    assert palette != color_palette.Palette(colors[:-1])
+    assert palette != color_palette.Palette(colors[:-1] + [(0, 0, 1)])
+    assert palette != colors
+    with pytest.raises(TypeError):
+        hash(palette)
+
+
+def test_conversions_round_trip():
+    colors = sample_colors(10)
+    palette = color_palette.Palette(colors)
+    assert color_palette.Palette.from_hex(palette.to_hex()) == palette
+    assert color_palette.Palette.from_packed(palette.to_packed()) == palette
+    packed = array.array("I", palette.to_packed().tolist())
+    assert color_palette.Palette.from_packed(packed) == palette
+    assert palette.nbytes == 30
+    assert memoryview(palette.data).tobytes() == np.array(colors, dtype=np.uint8).tobytes()
+
+
+def test_palette_is_read_only_but_the_callers_array_is_not():
+    colors = np.array(sample_colors(4), dtype=np.uint8)
+    palette = color_palette.Palette(colors)
+    assert np.shares_memory(palette.array, colors)
+    with pytest.raises(ValueError):
+        palette.array[0] = (1, 2, 3)
+    with pytest.raises(ValueError):
+        np.asarray(palette)[0] = (1, 2, 3)
+
+    colors[0] = (1, 2, 3)
+    assert palette[0] == (1, 2, 3)
+    copied = np.array(palette, copy=True)
+    copied[1] = (4, 5, 6)
+    assert palette[1] != (4, 5, 6)
+
+
+def test_cache_palettes_share_the_cached_read_only_array():
+    cache = gradient_cache.GradientCache()
+    gradient = gradient_stops.MultiStopGradient.from_two_colors((255, 0, 0), (0, 0, 255))
+    first = cache.palette(gradient, 50)
+    second = cache.palette(gradient, 50)
+
+    blended = cache.blend(gradient, 50)
+    assert np.shares_memory(first.array, blended)
+    assert np.shares_memory(second.array, blended)
+    assert first == color_palette.Palette(gradient.blend(50))
+    with pytest.raises(ValueError):
+        first.array[0] = (0, 0, 0)
+    assert np.shares_memory(first[10:20].array, blended)
@@ -0,0 +1,54 @@
+import numpy as np
+import pytest
+
+import color_spaces
+import gradient_engine
+
+
+NON_SRGB_SPACES = [space for space in color_spaces.COLOR_SPACES if space != "srgb"]
+
+
+def hue_of(color, color_space):
+    values = color_spaces.to_space(np.array([color], dtype=np.uint8), color_space)
+    return values[0, color_spaces.HUE_CHANNELS[color_space]]
+
+
+def hue_distance(hue1, hue2):
+    return abs((hue1 - hue2 + 0.5) % 1.0 - 0.5)
+
+
+@pytest.mark.parametrize("color_space", NON_SRGB_SPACES)
+def test_round_trip_is_exact_for_every_gray(color_space):
+    grays = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+    back = color_spaces.from_space(color_spaces.to_space(grays, color_space), color_space)
+    np.testing.assert_array_equal(back, grays)
+
+
+@pytest.mark.parametrize("gray", [(255, 255, 255), (128, 128, 128), (0, 0, 0), (17, 17, 17)])
+@pytest.mark.parametrize("color", [(0, 0, 255), (255, 0, 0), (0, 160, 0), (255, 200, 0)])
+@pytest.mark.parametrize("color_space", ["lch", "hsl"])
+def test_blend_from_gray_keeps_the_hue_of_the_other_end(gray, color, color_space):
+    # A gray has no hue, so blending to a color must not detour through other hues. Only
+    # clearly saturated midpoints are checked, since rounding moves the hue of the rest
+    target_hue = hue_of(color, color_space)
+    for blended in (
+        gradient_engine.blend_colors(gray, color, 8, color_space)[1:-1],
+        gradient_engine.blend_colors(color, gray, 8, color_space)[1:-1],
+    ):
+        for midpoint in blended:
+            if max(midpoint) - min(midpoint) > 24:
+                distance = hue_distance(hue_of(midpoint, color_space), target_hue)
+                assert distance < 0.02, midpoint
+
+
+def test_white_to_blue_in_lch_stays_blue():
+    blended = gradient_engine.blend_colors((255, 255, 255), (0, 0, 255), 4, "lch")
+    for red, green, blue in blended[1:-1]:
+        assert blue >= green and blue >= red
+
+
+def test_gray_threshold_separates_grays_from_colors():
+    grays = np.repeat(np.arange(256, dtype=np.uint8)[:, None], 3, axis=1)
+    assert color_spaces.to_space(grays, "lch")[:, 1].max() <= color_spaces.GRAY_CHROMA
+    near_grays = np.array([(128, 128, 129), (0, 0, 1), (254, 255, 255)], dtype=np.uint8)
+    assert color_spaces.to_space(near_grays, "lch")[:, 1].min() > color_spaces.GRAY_CHROMA
@@ -0,0 +1,80 @@
+import numpy as np
+import pytest
+from PIL import Image
+
+import gradient_animation
+
+
+def sweep(style="horizontal", loop=True, num_frames=6):
+    keyframes = [
+        (0, (255, 0, 0), (0, 0, 255), 4),
+        (1, (0, 255, 0), (255, 255, 0), 20),
+    ]
+    return gradient_animation.Animation(
+        keyframes, num_frames, 48, 20, style=style, fps=10, loop=loop
+    )
+
+
+def expected_frames(animation):
+    return [
+        animation.frame_rasteriser(index).render() for index in range(animation.num_frames)
+    ]
+
+
+@pytest.mark.parametrize("style", ["horizontal", "radial"])
+@pytest.mark.parametrize("loop", [True, False])
+def test_apng_round_trip(tmp_path, style, loop):
+    animation = sweep(style, loop)
+    path = tmp_path / "sweep.png"
+    gradient_animation.export_animation(str(path), animation, workers=1)
+
+    with Image.open(path) as image:
+        assert image.format == "PNG"
+        assert image.n_frames == animation.num_frames
+        assert image.info["loop"] == (0 if loop else 1)
+        for index, expected in enumerate(expected_frames(animation)):
+            image.seek(index)
+            assert image.info["duration"] == 100
+            np.testing.assert_array_equal(np.asarray(image.convert("RGB")), expected)
+
+
+def test_png_frame_sequence_round_trip(tmp_path):
+    animation = sweep("conic")
+    path = tmp_path / "frame.png"
+    gradient_animation.export_animation(str(path), animation, "frames", workers=1)
+
+    for index, expected in enumerate(expected_frames(animation)):
+        with Image.open(gradient_animation.frame_path(str(path), index)) as image:
+            np.testing.assert_array_equal(np.asarray(image), expected)
+
+
+def test_gif_round_trip_uses_exact_palette(tmp_path):
+    animation = sweep()
+    path = tmp_path / "sweep.gif"
+    gradient_animation.export_animation(str(path), animation, workers=1)
+
+    with Image.open(path) as image:
+        assert image.n_frames == animation.num_frames
+        for index, expected in enumerate(expected_frames(animation)):
+            image.seek(index)
+            np.testing.assert_array_equal(np.asarray(image.convert("RGB")), expected)
+
+
+@pytest.mark.parametrize("fps", [0, -1, 101, 100000, 12.5])
+def test_invalid_frame_rates_are_rejected(fps):
+    with pytest.raises(ValueError):
+        gradient_animation.Animation([(0, (0, 0, 0), (255, 255, 255), 2)], 2, 8, 8, fps=fps)
+
+
+@pytest.mark.parametrize("fps", [1, gradient_animation.MAX_FPS])
+@pytest.mark.parametrize("extension", ["gif", "png"])
+def test_frame_rate_limits_export(tmp_path, fps, extension):
+    animation = gradient_animation.Animation(
+        [(0, (0, 0, 0), (255, 255, 255), 2)], 2, 8, 8, fps=fps
+    )
+    path = tmp_path / f"limit.{extension}"
+    gradient_animation.export_animation(str(path), animation, workers=1)
+    with Image.open(path) as image:
+        assert image.n_frames == 2
+        image.seek(1)
+        assert image.info["duration"] == 1000 / fps
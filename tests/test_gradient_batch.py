@@ -0,0 +1,90 @@
+import json
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import gradient_batch
+import gradient_engine
+
+
+def parse(**fields):
+    record = {"color1": "#FF0000", "color2": "#0000FF"}
+    record.update(fields)
+    return gradient_batch.parse_job(record, 0, "out", "png")
+
+
+def test_missing_and_blank_fields_take_defaults():
+    for job in (parse(), parse(midpoints="", width="", height=" ", bit_depth=None)):
+        assert job["midpoints"] == gradient_batch.DEFAULT_MIDPOINTS
+        assert job["width"] == job["height"] == gradient_batch.DEFAULT_SIZE
+        assert job["bit_depth"] == 8
+
+
+@pytest.mark.parametrize("midpoints", [0, "0", 0.0])
+def test_zero_midpoints_is_kept(midpoints):
+    assert parse(midpoints=midpoints)["midpoints"] == 0
+
+
+def test_csv_and_json_values_are_parsed():
+    job = parse(midpoints="25", width=" 640", height=480, bit_depth="16")
+    assert (job["midpoints"], job["width"], job["height"], job["bit_depth"]) == (
+        25,
+        640,
+        480,
+        16,
+    )
+
+
+@pytest.mark.parametrize(
+    "fields",
+    [
+        {"width": 0},
+        {"height": "0"},
+        {"width": -5},
+        {"midpoints": -1},
+        {"bit_depth": 0},
+        {"bit_depth": "12"},
+        {"midpoints": "ten"},
+        {"width": 10.5},
+        {"height": True},
+        {"midpoints": [3]},
+    ],
+)
+def test_invalid_numbers_are_rejected(fields):
+    with pytest.raises(ValueError):
+        parse(**fields)
+
+
+def test_batch_renders_zero_midpoints_and_reports_bad_jobs(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    records = [
+        {"color1": "#000000", "color2": "#FFFFFF", "midpoints": 0, "width": 10, "height": 2,
+         "output": "two.png"},
+        {"color1": "#000000", "color2": "#FFFFFF", "width": 0, "output": "bad.png"},
+    ]
+    jobs.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    errors = gradient_batch.run_batch(str(jobs), str(tmp_path), workers=1, progress=None)
+    assert [line for line, _ in errors] == [2]
+    with Image.open(tmp_path / "two.png") as image:
+        expected = gradient_engine.render_gradient((0, 0, 0), (255, 255, 255), 10, 2, 0)
+        np.testing.assert_array_equal(np.asarray(image), np.asarray(expected))
+
+
+def test_batch_creates_output_subdirectories(tmp_path):
+    jobs = tmp_path / "jobs.jsonl"
+    records = [
+        {"color1": "#000000", "color2": "#FFFFFF", "width": 10, "height": 2,
+         "output": "sub/deeper/x.png"},
+        {"color1": "#000000", "color2": "#FFFFFF", "midpoints": 4,
+         "output": "sub/x.json"},
+    ]
+    jobs.write_text("".join(json.dumps(record) + "\n" for record in records))
+
+    output_dir = tmp_path / "out"
+    errors = gradient_batch.run_batch(str(jobs), str(output_dir), workers=1, progress=None)
+    assert errors == []
+    with Image.open(output_dir / "sub" / "deeper" / "x.png") as image:
+        assert image.size == (10, 2)
+    assert len(json.loads((output_dir / "sub" / "x.json").read_text())["colors"]) == 6
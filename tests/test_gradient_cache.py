@@ -0,0 +1,38 @@
+import numpy as np
+import pytest
+
+import gradient_cache
+import gradient_engine
+import gradient_stops
+
+
+def red_to_blue():
+    return gradient_stops.MultiStopGradient.from_two_colors((255, 0, 0), (0, 0, 255), "oklab")
+
+
+def test_rendered_images_can_be_modified_without_touching_the_cache():
+    cache = gradient_cache.GradientCache()
+    first = cache.render(red_to_blue(), 8, 40, 6)
+    expected = first.tobytes()
+    first.paste((0, 255, 0), (0, 0, 40, 6))
+
+    second = cache.render(red_to_blue(), 8, 40, 6)
+    assert second is not first
+    assert second.tobytes() == expected
+    assert cache.stats()["hits"] == 1
+
+
+@pytest.mark.parametrize("num_midpoints", [8, 38, 1000])
+def test_rendered_images_match_render_gradient(num_midpoints):
+    image = gradient_cache.GradientCache().render(red_to_blue(), num_midpoints, 40, 6)
+    expected = gradient_engine.render_gradient(
+        (255, 0, 0), (0, 0, 255), 40, 6, num_midpoints, color_space="oklab"
+    )
+    assert image.tobytes() == expected.tobytes()
+
+
+def test_blended_colors_are_read_only():
+    colors = gradient_cache.GradientCache().blend(red_to_blue(), 8)
+    np.testing.assert_array_equal(colors, red_to_blue().blend(8))
+    with pytest.raises(ValueError):
+        colors[0] = 0
@@ -0,0 +1,87 @@
+import itertools
+
+import numpy as np
+import pytest
+
+import color_spaces
+import gradient_engine
+
+
+def legacy_blend_colors(color1, color2, num_midpoints):
+    # The original per-color loop that blend_colors replaced
+    blended_colors = [color1]
+    for i in range(1, num_midpoints + 1):
+        ratio = i / (num_midpoints + 1)
+        blended_colors.append(
+            tuple(round(a + ratio * (b - a)) for a, b in zip(color1, color2))
+        )
+    blended_colors.append(color2)
+    return blended_colors
+
+
+COLOR_PAIRS = [
+    ((0, 0, 0), (255, 255, 255)),
+    ((255, 0, 0), (0, 0, 255)),
+    ((18, 52, 86), (171, 205, 239)),
+    ((200, 10, 100), (7, 250, 31)),
+    ((128, 128, 128), (128, 128, 128)),
+]
+
+
+@pytest.mark.parametrize("color1, color2", COLOR_PAIRS)
+@pytest.mark.parametrize("num_midpoints", [0, 1, 2, 3, 7, 10, 99, 254, 1000])
+def test_blend_colors_matches_legacy_loop(color1, color2, num_midpoints):
+    assert gradient_engine.blend_colors(color1, color2, num_midpoints) == (
+        legacy_blend_colors(color1, color2, num_midpoints)
+    )
+
+
+def test_blend_colors_array_matches_blend_colors_per_pair():
+    rng = np.random.default_rng(5)
+    colors1 = rng.integers(0, 256, (40, 3))
+    colors2 = rng.integers(0, 256, (40, 3))
+    for color_space in color_spaces.COLOR_SPACES:
+        blended = gradient_engine.blend_colors_array(colors1, colors2, 12, color_space)
+        for pair, (color1, color2) in enumerate(zip(colors1.tolist(), colors2.tolist())):
+            expected = gradient_engine.blend_colors(color1, color2, 12, color_space)
+            assert [tuple(color) for color in blended[pair].tolist()] == expected
+
+
+@pytest.mark.parametrize("color_space", color_spaces.COLOR_SPACES)
+def test_blend_keeps_end_colors_exact(color_space):
+    blended = gradient_engine.blend_colors((3, 141, 59), (250, 20, 199), 30, color_space)
+    assert blended[0] == (3, 141, 59)
+    assert blended[-1] == (250, 20, 199)
+    assert len(blended) == 32
+
+
+def test_band_indices_matches_searchsorted():
+    for num_colors, width in itertools.product(
+        [1, 2, 3, 7, 10, 64, 99, 100, 101, 333, 1024, 5000], [1, 2, 5, 99, 100, 640, 1023]
+    ):
+        color_width = width / num_colors
+        starts = np.floor(np.arange(num_colors) * color_width)
+        expected = np.searchsorted(starts, np.arange(width), side="right") - 1
+        np.testing.assert_array_equal(
+            gradient_engine.band_indices(num_colors, width), expected
+        )
+
+
+@pytest.mark.parametrize(
+    "width, height, num_midpoints",
+    [(1, 1, 0), (7, 3, 0), (100, 4, 3), (101, 5, 10), (640, 2, 638), (333, 3, 1000)],
+)
+@pytest.mark.parametrize("color_space", ["srgb", "oklab"])
+def test_row_and_rectangles_render_identical_bytes(width, height, num_midpoints, color_space):
+    args = ((255, 0, 0), (0, 64, 255), width, height, num_midpoints)
+    row = gradient_engine.render_gradient(*args, method="row", color_space=color_space)
+    rectangles = gradient_engine.render_gradient(
+        *args, method="rectangles", color_space=color_space
+    )
+    assert row.size == rectangles.size == (width, height)
+    assert row.tobytes() == rectangles.tobytes()
+
+
+def test_render_gradient_rejects_unknown_method():
+    with pytest.raises(ValueError):
+        gradient_engine.render_gradient((0, 0, 0), (255, 255, 255), 10, 10, 2, "circles")
@@ -0,0 +1,108 @@
+import struct
+import zlib
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import gradient_engine
+import gradient_export
+import gradient_stops
+
+
+def read_png(path):
+    # A minimal PNG decoder for RGB images, which unlike PIL keeps 16-bit samples
+    with open(path, "rb") as fileobj:
+        data = fileobj.read()
+    assert data[:8] == gradient_export.PNG_SIGNATURE
+    pos, idat = 8, b""
+    while pos < len(data):
+        length, chunk_type = struct.unpack(">I4s", data[pos:pos + 8])
+        body = data[pos + 8:pos + 8 + length]
+        (crc,) = struct.unpack(">I", data[pos + 8 + length:pos + 12 + length])
+        assert crc == zlib.crc32(body, zlib.crc32(chunk_type))
+        if chunk_type == b"IHDR":
+            width, height, bit_depth, color_type = struct.unpack(">IIBB", body[:10])
+            assert color_type == 2
+        elif chunk_type == b"IDAT":
+            idat += body
+        pos += 12 + length
+
+    bytes_per_pixel = 3 * bit_depth // 8
+    row_bytes = width * bytes_per_pixel
+    raw = np.frombuffer(zlib.decompress(idat), dtype=np.uint8).reshape(height, row_bytes + 1)
+    rows = np.zeros((height, row_bytes), dtype=np.uint8)
+    previous = np.zeros(row_bytes, dtype=np.uint8)
+    for y in range(height):
+        filter_type, line = raw[y, 0], raw[y, 1:]
+        if filter_type == 0:
+            rows[y] = line
+        elif filter_type == 2:
+            rows[y] = line + previous
+        else:
+            raise AssertionError(f"Unexpected PNG filter type {filter_type}")
+        previous = rows[y]
+
+    if bit_depth == 8:
+        return rows.reshape(height, width, 3)
+    return rows.view(">u2").reshape(height, width, 3).astype(np.uint16)
+
+
+@pytest.mark.parametrize("band_height", [None, 1, 3, 64])
+def test_png_matches_rendered_gradient(tmp_path, band_height):
+    path = tmp_path / "gradient.png"
+    gradient_export.export_gradient(
+        str(path), (255, 0, 0), (0, 0, 255), 333, 70, 40, band_height=band_height
+    )
+    expected = gradient_engine.render_gradient((255, 0, 0), (0, 0, 255), 333, 70, 40)
+    with Image.open(path) as image:
+        assert image.mode == "RGB"
+        assert image.tobytes() == expected.tobytes()
+    np.testing.assert_array_equal(read_png(path), np.asarray(expected))
+
+
+def test_16_bit_png_keeps_unrounded_colors(tmp_path):
+    path = tmp_path / "deep.png"
+    gradient_export.export_gradient(
+        str(path), (10, 20, 30), (12, 250, 31), 500, 9, 498, bit_depth=16
+    )
+    gradient = gradient_stops.MultiStopGradient.from_two_colors((10, 20, 30), (12, 250, 31))
+    row = gradient_engine.gradient_row(gradient.blend_values(498), 500)
+    expected = gradient_export.quantize(row, 16)
+
+    pixels = read_png(path)
+    assert pixels.dtype == np.uint16
+    for y in range(9):
+        np.testing.assert_array_equal(pixels[y], expected)
+    # Every 8-bit value is a multiple of 257 in 16 bits, so the extra precision shows
+    assert np.any(pixels % 257)
+
+
+@pytest.mark.parametrize("style", ["vertical", "radial", "conic", "bilinear"])
+def test_styled_png_matches_rasteriser(tmp_path, style):
+    import gradient_styles
+
+    path = tmp_path / "styled.png"
+    gradient = gradient_stops.MultiStopGradient(
+        [(0, (255, 200, 0)), (0.5, (0, 120, 255)), (1, (40, 0, 60))]
+    )
+    gradient_export.export_styled(str(path), gradient, 30, 61, 47, style=style, band_height=5)
+    expected = gradient_styles.StyleRasteriser(gradient, 30, style, 61, 47).render()
+    np.testing.assert_array_equal(read_png(path), expected)
+
+
+def test_ppm_matches_png(tmp_path):
+    png, ppm = tmp_path / "a.png", tmp_path / "a.ppm"
+    for path in (png, ppm):
+        gradient_export.export_gradient(str(path), (0, 0, 0), (255, 255, 255), 128, 16, 7)
+    with Image.open(png) as png_image, Image.open(ppm) as ppm_image:
+        assert png_image.tobytes() == ppm_image.tobytes()
+
+
+def test_png_rejects_short_bands(tmp_path):
+    row = np.zeros((10, 3), dtype=np.uint8)
+    with open(tmp_path / "short.png", "wb") as fileobj:
+        with pytest.raises(ValueError):
+            gradient_export.write_png(
+                fileobj, 10, 5, gradient_export.iter_row_bands(row, 4, 2)
+            )
@@ -0,0 +1,132 @@
+import asyncio
+import json
+
+import pytest
+
+import gradient_server
+
+
+@pytest.fixture(scope="module")
+def server():
+    server = gradient_server.GradientServer(workers=1)
+    yield server
+    server.close()
+
+
+def fetch_many(server, request_lines):
+    # Sends requests concurrently through handle_connection and returns the status, headers
+    # and body of each response
+    async def exchange(port, request_line):
+        reader, writer = await asyncio.open_connection("127.0.0.1", port)
+        writer.write(f"{request_line} HTTP/1.1\r\nHost: test\r\n\r\n".encode("latin-1"))
+        await writer.drain()
+        response = await reader.read()
+        writer.close()
+        return response
+
+    async def exchange_all():
+        listener = await asyncio.start_server(server.handle_connection, "127.0.0.1", 0)
+        port = listener.sockets[0].getsockname()[1]
+        async with listener:
+            return await asyncio.gather(
+                *(exchange(port, request_line) for request_line in request_lines)
+            )
+
+    results = []
+    for response in asyncio.run(exchange_all()):
+        head, body = response.split(b"\r\n\r\n", 1)
+        status_line, *header_lines = head.decode("latin-1").split("\r\n")
+        headers = dict(line.split(": ", 1) for line in header_lines)
+        results.append((int(status_line.split()[1]), headers, body))
+    return results
+
+
+def fetch(server, request_line):
+    return fetch_many(server, [request_line])[0]
+
+
+def test_rendered_png_is_cacheable(server):
+    status, headers, body = fetch(server, "GET /gradient.png?c1=FF0000&c2=0000FF&w=32&h=8")
+    assert status == 200
+    assert headers["Content-Type"] == "image/png"
+    assert headers["Cache-Control"] == gradient_server.RENDER_CACHE_CONTROL
+    assert body.startswith(b"\x89PNG")
+
+
+def test_rendered_palette_is_cacheable(server):
+    status, headers, body = fetch(server, "GET /palette.json?c1=000000&c2=FFFFFF&steps=1")
+    assert status == 200
+    assert headers["Cache-Control"] == gradient_server.RENDER_CACHE_CONTROL
+    assert json.loads(body)
+
+
+@pytest.mark.parametrize(
+    "request_line, expected_status",
+    [
+        ("GET /gradient.png?c1=nothex&c2=0000FF", 400),
+        ("GET /gradient.png?c1=FF0000&c2=0000FF&w=0", 400),
+        ("GET /missing", 404),
+        ("POST /gradient.png?c1=FF0000&c2=0000FF", 405),
+        ("GET /stats", 200),
+    ],
+)
+def test_errors_and_stats_are_not_cached(server, request_line, expected_status):
+    status, headers, _ = fetch(server, request_line)
+    assert status == expected_status
+    assert headers["Cache-Control"] == gradient_server.NO_CACHE_CONTROL
+
+
+def test_internal_errors_are_not_cached(monkeypatch):
+    server = gradient_server.GradientServer(workers=1)
+
+    async def broken_dispatch(method, target):
+        raise RuntimeError("boom")
+
+    monkeypatch.setattr(server, "dispatch", broken_dispatch)
+    try:
+        status, headers, body = fetch(server, "GET /gradient.png")
+    finally:
+        server.close()
+    assert status == 500
+    assert headers["Cache-Control"] == gradient_server.NO_CACHE_CONTROL
+    assert b"boom" in body
+
+
+def test_concurrent_identical_requests_share_one_render():
+    server = gradient_server.GradientServer(workers=1)
+    request_line = "GET /gradient.png?c1=FF0000&c2=0000FF&steps=30&w=300&h=40&style=radial"
+    try:
+        responses = fetch_many(server, [request_line] * 20)
+        stats = json.loads(fetch(server, "GET /stats")[2])
+        assert stats["renders"] == 1
+        assert stats["coalesced"] == 19
+        assert stats["in_flight"] == 0
+        assert {status for status, _, _ in responses} == {200}
+        assert len({body for _, _, body in responses}) == 1
+
+        # A repeat request is answered from the response cache
+        hits = stats["hits"]
+        status, _, body = fetch(server, request_line)
+        stats = json.loads(fetch(server, "GET /stats")[2])
+        assert status == 200 and body == responses[0][2]
+        assert stats["renders"] == 1
+        assert stats["hits"] == hits + 1
+    finally:
+        server.close()
+
+
+def test_overlong_request_line_is_refused(server):
+    stops = ";".join(f"{index / 9999:.4f}:FF0000" for index in range(10000))
+    status, headers, body = fetch(server, f"GET /gradient.png?stops={stops}")
+    assert status == 414
+    assert headers["Cache-Control"] == gradient_server.NO_CACHE_CONTROL
+    assert json.loads(body) == {"error": "URI Too Long"}
+
+
+def test_overlong_header_is_refused(server):
+    # fetch appends " HTTP/1.1" and a Host header, which ends the request as
+    # "X-Version: HTTP/1.1"
+    request = "GET /stats HTTP/1.1\r\nX-Padding: " + "a" * 70000 + "\r\nX-Version:"
+    status, headers, _ = fetch(server, request)
+    assert status == 431
+    assert headers["Cache-Control"] == gradient_server.NO_CACHE_CONTROL
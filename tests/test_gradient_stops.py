@@ -0,0 +1,75 @@
+import numpy as np
+import pytest
+
+import color_palette
+import color_spaces
+import gradient_engine
+import gradient_stops
+
+
+def three_stop_gradient(color_space="srgb"):
+    return gradient_stops.MultiStopGradient(
+        [(0, (255, 0, 0)), (0.3, (20, 200, 40)), (1, (0, 0, 255))], color_space
+    )
+
+
+@pytest.mark.parametrize("color_space", color_spaces.COLOR_SPACES)
+def test_two_stop_blend_matches_blend_colors(color_space):
+    gradient = gradient_stops.MultiStopGradient.from_two_colors(
+        (12, 200, 99), (240, 31, 180), color_space
+    )
+    assert gradient.blend_colors(50) == gradient_engine.blend_colors(
+        (12, 200, 99), (240, 31, 180), 50, color_space
+    )
+
+
+@pytest.mark.parametrize("color_space", color_spaces.COLOR_SPACES)
+@pytest.mark.parametrize("num_midpoints", [0, 1, 5, 254, 4097])
+def test_samples_match_blend(color_space, num_midpoints):
+    gradient = three_stop_gradient(color_space)
+    samples = gradient.samples(num_midpoints)
+    expected = gradient.blend(num_midpoints)
+
+    assert len(samples) == len(expected)
+    np.testing.assert_array_equal(samples[:], expected)
+    np.testing.assert_array_equal(np.concatenate(list(samples.iter_chunks(1000))), expected)
+    assert list(samples) == [tuple(color) for color in expected.tolist()]
+    assert samples[-1] == tuple(expected[-1].tolist())
+
+
+def test_precise_samples_match_blend_values():
+    gradient = three_stop_gradient("oklab")
+    samples = gradient.samples(300, precise=True)
+    values = gradient.blend_values(300)
+    np.testing.assert_array_equal(samples[:], values)
+    np.testing.assert_array_equal(samples.take(np.arange(0, 302, 7)), values[::7])
+
+
+def test_samples_slices_and_index_arrays():
+    gradient = three_stop_gradient()
+    samples = gradient.samples(999)
+    expected = gradient.blend(999)
+
+    assert isinstance(samples[10:20], color_palette.Palette)
+    np.testing.assert_array_equal(samples[5:500:3], expected[5:500:3])
+    indices = np.array([[0, 1], [-1, 500]])
+    np.testing.assert_array_equal(samples[indices], expected[indices])
+
+
+def test_samples_reject_out_of_range_indices():
+    samples = three_stop_gradient().samples(8)
+    with pytest.raises(IndexError):
+        samples[10]
+    with pytest.raises(IndexError):
+        samples[-11]
+    with pytest.raises(IndexError):
+        samples.take([0, 10])
+
+
+def test_gradient_row_samples_only_visible_colors():
+    gradient = three_stop_gradient()
+    samples = gradient.samples(10_000_000)
+    row = gradient_engine.gradient_row(samples, 640)
+    expected = samples.take(gradient_engine.band_indices(len(samples), 640))
+    np.testing.assert_array_equal(row, expected)
+    assert row.shape == (640, 3)
@@ -0,0 +1,126 @@
+import json
+
+import pytest
+
+import instrumentation
+
+
+@pytest.fixture
+def clock(monkeypatch):
+    # A perf_counter that only moves when the test advances it, in seconds
+    now = [100.0]
+    monkeypatch.setattr(instrumentation.time, "perf_counter", lambda: now[0])
+    return now
+
+
+def record_frame(instr, clock, stages, skipped=False, items=None):
+    instr.begin_frame()
+    for name, duration in stages:
+        with instr.stage(name):
+            clock[0] += duration
+    return instr.end_frame(skipped=skipped, items=items)
+
+
+def test_disabled_instrumentation_records_nothing(clock):
+    instr = instrumentation.Instrumentation()
+    instr.count("redraw_requests")
+    assert record_frame(instr, clock, [("draw", 0.01)]) is None
+    assert instr.stage("draw") is instr.stage("blend")
+    assert len(instr.frames) == 0
+    assert instr.summary() == {"counters": {}, "stages": {}}
+
+
+def test_enabled_from_env(monkeypatch):
+    for value, expected in (("", False), ("0", False), ("1", True), ("yes", True)):
+        monkeypatch.setenv(instrumentation.ENV_VAR, value)
+        assert instrumentation.enabled_from_env() is expected
+    monkeypatch.delenv(instrumentation.ENV_VAR)
+    assert instrumentation.enabled_from_env() is False
+
+
+def test_ring_buffer_drops_the_oldest_frames_at_capacity(clock):
+    instr = instrumentation.Instrumentation(enabled=True, capacity=3)
+    for index in range(5):
+        record_frame(instr, clock, [("draw", 0.001)], items=index)
+
+    assert len(instr.frames) == 3
+    assert [frame["items"] for frame in instr.frames] == [2, 3, 4]
+    # Counters keep counting every frame, not only the ones still in the buffer
+    assert instr.counters["redraws"] == 5
+
+
+def test_summary_aggregates_stages_over_drawn_frames(clock):
+    instr = instrumentation.Instrumentation(enabled=True)
+    record_frame(instr, clock, [("blend", 0.002), ("draw", 0.004)])
+    record_frame(instr, clock, [("blend", 0.004), ("draw", 0.008)])
+    record_frame(instr, clock, [("draw", 1.0)], skipped=True)
+    instr.count("coalesced", 2)
+
+    summary = instr.summary()
+    assert summary["counters"] == {"redraws": 2, "skipped": 1, "coalesced": 2}
+    stages = summary["stages"]
+    assert set(stages) == {"frame", "blend", "draw"}
+    assert stages["blend"]["mean_ms"] == pytest.approx(3.0)
+    assert stages["blend"]["max_ms"] == pytest.approx(4.0)
+    assert stages["draw"]["p95_ms"] == pytest.approx(8.0)
+    assert stages["frame"]["mean_ms"] == pytest.approx(9.0)
+
+    instr.reset()
+    assert instr.summary() == {"counters": {}, "stages": {}}
+
+
+def test_dump_trace_writes_trace_event_json(tmp_path, clock):
+    instr = instrumentation.Instrumentation(enabled=True)
+    clock[0] += 0.5
+    record_frame(instr, clock, [("blend", 0.002), ("draw", 0.003)], items=64)
+    record_frame(instr, clock, [], skipped=True, items=64)
+    instr.count("redraw_requests", 3)
+
+    path = tmp_path / "trace.json"
+    instr.dump_trace(str(path))
+    trace = json.loads(path.read_text(encoding="utf-8"))
+
+    assert trace["otherData"]["counters"] == {"redraws": 1, "skipped": 1, "redraw_requests": 3}
+    events = trace["traceEvents"]
+    assert [event["name"] for event in events] == ["frame", "blend", "draw", "skipped frame"]
+    for event in events:
+        assert event["ph"] == "X"
+        assert {"pid", "tid", "ts", "dur"} <= set(event)
+    frame, blend, draw, _ = events
+    assert frame["ts"] == pytest.approx(500_000)
+    assert frame["dur"] == pytest.approx(5_000)
+    assert frame["args"] == {"items": 64}
+    assert draw["ts"] == pytest.approx(502_000)
+    assert draw["dur"] == pytest.approx(3_000)
+
+
+def test_startup_timer_phases_and_trace(tmp_path, clock):
+    timer = instrumentation.StartupTimer(start=99.0)
+    clock[0] = 99.25
+    timer.mark("imports")
+    clock[0] = 100.0
+    assert timer.finish() is True
+    assert timer.finish() is False
+    timer.mark("ignored")
+
+    assert timer.phases() == [
+        ("imports", 0.0, pytest.approx(0.25)),
+        ("first_frame", pytest.approx(0.25), pytest.approx(0.75)),
+    ]
+    assert "first_frame" in timer.report()
+
+    instr = instrumentation.Instrumentation(enabled=True)
+    instr.startup = timer
+    record_frame(instr, clock, [("draw", 0.001)])
+    path = tmp_path / "trace.json"
+    instr.dump_trace(str(path))
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+
+    assert [event["name"] for event in events[:2]] == [
+        "startup: imports",
+        "startup: first_frame",
+    ]
+    # Times are measured from the start of start-up
+    assert events[0]["ts"] == pytest.approx(0)
+    assert events[1]["ts"] == pytest.approx(250_000)
+    assert events[2]["ts"] == pytest.approx(1_000_000)
@@ -0,0 +1,94 @@
+import threading
+import time
+
+import numpy as np
+import pytest
+from PIL import Image
+
+import palette_extract
+
+
+def two_color_image(width, height):
+    pixels = np.zeros((height, width, 3), dtype=np.uint8)
+    pixels[:] = (30, 90, 200)
+    pixels[: height // 2, : width // 3] = (240, 10, 10)
+    return Image.fromarray(pixels)
+
+
+@pytest.fixture
+def small_limits(monkeypatch):
+    # Stands in for huge images: PIL's bomb limit and the decode limit scaled down
+    monkeypatch.setattr(Image, "MAX_IMAGE_PIXELS", 10_000)
+    monkeypatch.setattr(palette_extract, "MAX_DECODE_PIXELS", 500_000)
+
+
+def test_jpeg_above_pil_bomb_limit_is_decoded_at_reduced_scale(tmp_path, small_limits):
+    path = tmp_path / "photo.jpg"
+    two_color_image(1600, 1200).save(path, quality=95)
+
+    sample = palette_extract.load_image_sample(str(path), max_pixels=20_000)
+    assert sample.shape[0] * sample.shape[1] <= 4 * 20_000
+    assert Image.MAX_IMAGE_PIXELS == 10_000
+
+    colors = palette_extract.extract_palette(str(path), 2, max_pixels=20_000).array
+    assert np.abs(colors.astype(int) - [30, 90, 200]).sum(axis=1).min() < 12
+    assert np.abs(colors.astype(int) - [240, 10, 10]).sum(axis=1).min() < 12
+
+
+def test_png_within_decode_limit_is_reduced(tmp_path, small_limits):
+    path = tmp_path / "image.png"
+    two_color_image(600, 400).save(path)
+
+    sample = palette_extract.load_image_sample(str(path), max_pixels=20_000)
+    assert 0 < sample.shape[0] * sample.shape[1] <= 4 * 20_000
+    assert Image.MAX_IMAGE_PIXELS == 10_000
+
+
+def test_png_above_decode_limit_raises_value_error(tmp_path, small_limits):
+    path = tmp_path / "huge.png"
+    two_color_image(1000, 600).save(path)
+
+    with pytest.raises(ValueError, match="too large"):
+        palette_extract.load_image_sample(str(path))
+    with pytest.raises(ValueError):
+        palette_extract.extract_palette(str(path))
+
+
+def test_open_images_and_arrays_are_not_limited(small_limits):
+    image = two_color_image(1000, 600)
+    assert palette_extract.load_image_sample(image, max_pixels=1_000_000).shape == (
+        600,
+        1000,
+        3,
+    )
+    colors = palette_extract.extract_palette(np.asarray(image), 2).array
+    assert sorted(map(tuple, colors.tolist())) == [(30, 90, 200), (240, 10, 10)]
+
+
+def test_concurrent_loads_restore_the_bomb_limit(tmp_path, small_limits, monkeypatch):
+    path = tmp_path / "photo.jpg"
+    two_color_image(400, 300).save(path)
+    real_open = Image.open
+
+    def slow_open(source):
+        # Widens the window in which the limit is lifted, so unguarded loads interleave
+        time.sleep(0.01)
+        return real_open(source)
+
+    monkeypatch.setattr(Image, "open", slow_open)
+    threads = [
+        threading.Thread(target=palette_extract.load_image_sample, args=(str(path),))
+        for _ in range(8)
+    ]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert Image.MAX_IMAGE_PIXELS == 10_000
+
+
+def test_unreadable_file_raises_os_error(tmp_path):
+    path = tmp_path / "not_an_image.png"
+    path.write_bytes(b"hello")
+    with pytest.raises(OSError):
+        palette_extract.load_image_sample(str(path))
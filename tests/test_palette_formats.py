@@ -0,0 +1,158 @@
+import io
+import json
+import re
+import struct
+
+import numpy as np
+import pytest
+
+import color_codec
+import color_palette
+import gradient_stops
+import palette_formats
+
+
+@pytest.fixture
+def colors():
+    rng = np.random.default_rng(23)
+    return rng.integers(0, 256, (1000, 3)).astype(np.uint8)
+
+
+@pytest.fixture
+def small_chunks(monkeypatch):
+    # Several chunks, with a partial one at the end
+    monkeypatch.setattr(palette_formats, "CHUNK_COLORS", 64)
+
+
+def hex_codes(colors):
+    return [color_codec.format_hex(tuple(color)) for color in colors.tolist()]
+
+
+def parse_ase(data):
+    # Parses an Adobe Swatch Exchange file into its group name and (name, RGB, type) swatches
+    assert data[:4] == b"ASEF"
+    major, minor, count = struct.unpack(">HHI", data[4:12])
+    assert (major, minor) == (1, 0)
+
+    blocks = []
+    pos = 12
+    for _ in range(count):
+        block_type, length = struct.unpack(">HI", data[pos:pos + 6])
+        blocks.append((block_type, data[pos + 6:pos + 6 + length]))
+        pos += 6 + length
+    assert pos == len(data)
+
+    def name_of(body):
+        (chars,) = struct.unpack(">H", body[:2])
+        text = body[2:2 + 2 * chars].decode("utf-16-be")
+        assert text.endswith("\x00")
+        return text[:-1], body[2 + 2 * chars:]
+
+    (start_type, start), *swatches, (end_type, end) = blocks
+    assert start_type == 0xC001 and end_type == 0xC002 and end == b""
+    group, rest = name_of(start)
+    assert rest == b""
+
+    parsed = []
+    for block_type, body in swatches:
+        assert block_type == 0x0001
+        assert len(body) == 36
+        name, rest = name_of(body)
+        assert rest[:4] == b"RGB "
+        red, green, blue, color_type = struct.unpack(">fffH", rest[4:])
+        parsed.append((name, (red, green, blue), color_type))
+    return group, parsed
+
+
+@pytest.mark.parametrize("wrap", [np.asarray, color_palette.Palette])
+def test_npy_round_trip(colors, small_chunks, wrap):
+    data = palette_formats.palette_bytes(wrap(colors), "npy")
+    loaded = np.load(io.BytesIO(data))
+    assert loaded.dtype == np.uint8
+    np.testing.assert_array_equal(loaded, colors)
+
+
+def test_json_round_trip(colors, small_chunks):
+    data = palette_formats.palette_bytes(colors, "json", name='My "best" palette')
+    document = json.loads(data)
+    assert document == {"name": 'My "best" palette', "colors": hex_codes(colors)}
+
+
+def test_css_lists_every_color_and_the_gradient(colors, small_chunks):
+    text = palette_formats.palette_bytes(colors, "css", name="a */ b").decode("ascii")
+    assert text.startswith("/* a * / b: 1000 colors */\n:root {\n")
+    properties = re.findall(r"--color-(\d+): (#[0-9A-F]{6});", text)
+    assert [int(index) for index, _ in properties] == list(range(1000))
+    assert all(len(index) == 3 for index, _ in properties)
+    assert [code for _, code in properties] == hex_codes(colors)
+
+    gradient = re.search(r"--gradient: linear-gradient\(to right, (.*)\);\n}\n$", text)
+    assert gradient.group(1).split(", ") == hex_codes(colors)
+
+
+def test_gpl_lines(colors, small_chunks):
+    data = palette_formats.palette_bytes(colors, "gpl", name="Two\nlines")
+    lines = data.decode("utf-8").splitlines()
+    assert lines[:3] == ["GIMP Palette", "Name: Two lines", "#"]
+    assert len(lines) == 3 + len(colors)
+    for line, color, code in zip(lines[3:], colors.tolist(), hex_codes(colors)):
+        channels, hex_code = line.split("\t")
+        assert [int(value) for value in channels.split()] == color
+        assert len(channels) == 11
+        assert hex_code == code
+
+
+def test_ase_block_layout(colors, small_chunks):
+    data = palette_formats.palette_bytes(colors, "ase", name="Brand Ω")
+    (count,) = struct.unpack(">I", data[8:12])
+    assert count == len(colors) + 2
+    # Header, group start, 36-byte color blocks with their 6-byte headers, group end
+    group_block = 2 + 2 * len("Brand Ω\x00")
+    assert len(data) == 12 + 6 + group_block + len(colors) * (6 + 36) + 6
+
+    group, swatches = parse_ase(data)
+    assert group == "Brand Ω"
+    assert [name for name, _, _ in swatches] == hex_codes(colors)
+    assert all(color_type == 2 for _, _, color_type in swatches)
+    values = np.array([rgb for _, rgb, _ in swatches])
+    np.testing.assert_allclose(values * 255, colors, atol=1e-3)
+
+
+def test_lazy_samples_match_materialized_colors(small_chunks):
+    gradient = gradient_stops.MultiStopGradient(
+        [(0, (255, 0, 0)), (0.4, (250, 250, 250)), (1, (0, 0, 255))], "oklab"
+    )
+    samples = gradient.samples(300)
+    blended = gradient.blend(300)
+    for file_format in palette_formats.WRITERS:
+        assert palette_formats.palette_bytes(samples, file_format) == (
+            palette_formats.palette_bytes(blended, file_format)
+        )
+
+
+@pytest.mark.parametrize("file_format", sorted(palette_formats.WRITERS))
+def test_empty_and_single_color_palettes(file_format):
+    for colors in (np.zeros((0, 3), dtype=np.uint8), np.array([[1, 2, 3]], dtype=np.uint8)):
+        data = palette_formats.palette_bytes(colors, file_format)
+        if file_format == "npy":
+            np.testing.assert_array_equal(np.load(io.BytesIO(data)), colors)
+        elif file_format == "json":
+            assert json.loads(data)["colors"] == hex_codes(colors)
+        elif file_format == "ase":
+            assert len(parse_ase(data)[1]) == len(colors)
+
+
+def test_export_palette_infers_the_format(tmp_path, colors):
+    for extension, file_format in palette_formats.FORMATS_BY_EXTENSION.items():
+        path = tmp_path / f"palette{extension.upper()}"
+        palette_formats.export_palette(str(path), colors)
+        assert path.read_bytes() == palette_formats.palette_bytes(colors, file_format)
+
+
+def test_unsupported_formats_raise_value_error(tmp_path, colors):
+    with pytest.raises(ValueError):
+        palette_formats.format_from_path("palette.txt")
+    with pytest.raises(ValueError):
+        palette_formats.palette_bytes(colors, "aco")
+    with pytest.raises(ValueError):
+        palette_formats.export_palette(str(tmp_path / "palette"), colors)